@@ -0,0 +1,61 @@
+"""全店舗 × 全商品の一括需要予測（夜間バッチ用）
+
+需要予測データのすべての店舗 × 商品の系列について SARIMAX（需要予測ページと同じ設定）を
+プロセスプールで並列に学習し、予測値と精度指標を列指向の Arrow IPC ファイルに書き出す。
+
+    python batch_forecast.py [--output data/output/forecast] [--horizon 28] [--holdout 28]
+                             [--workers 8] [--timeout 120]
+
+出力:
+    <output>/forecasts.arrow  店舗, 商品, 日付, 予測値（データの最終日の翌日から horizon 日分）
+    <output>/metrics.arrow    店舗, 商品, status（ok / failed / timeout）, error, train_days,
+                              MAE, RMSE, MAPE（末尾 holdout 日での精度）, seconds
+失敗・時間切れの系列があった場合は終了コード 1 を返す（他の系列の結果は書き出す）。
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+from utils import batch_forecast, demand_data
+
+DEFAULT_OUTPUT_DIR = os.path.join("data", "output", "forecast")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_DIR, help="出力先のディレクトリ")
+    parser.add_argument("--horizon", type=int, default=batch_forecast.DEFAULT_HORIZON, help="予測する日数")
+    parser.add_argument("--holdout", type=int, default=batch_forecast.DEFAULT_HOLDOUT, help="精度の評価に使う末尾の日数")
+    parser.add_argument("--workers", type=int, default=None, help="ワーカープロセス数（既定は CPU コア数）")
+    parser.add_argument("--timeout", type=float, default=batch_forecast.DEFAULT_TIMEOUT, help="1系列あたりの時間制限[秒]")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    start = time.perf_counter()
+    series_list = list(batch_forecast.iter_series(demand_data.load_demand_data()))
+
+    def report(done, total, result):
+        metrics = result['metrics']
+        logging.info("[%d/%d] 店舗=%s 商品=%s %s (%.1fs)", done, total, metrics['store'], metrics['item'],
+                     metrics['status'], metrics['seconds'])
+
+    results = batch_forecast.run_batch(
+        series_list, workers=args.workers, horizon=args.horizon, holdout=args.holdout,
+        timeout=args.timeout, on_result=report,
+    )
+    paths = batch_forecast.write_results(results, args.output)
+
+    failed = [result['metrics'] for result in results if result['metrics']['status'] != 'ok']
+    logging.info("%d系列を %.1f 秒で予測しました（失敗 %d系列）: %s", len(results), time.perf_counter() - start,
+                 len(failed), ", ".join(paths.values()))
+    for metrics in failed:
+        logging.warning("店舗=%s 商品=%s %s: %s", metrics['store'], metrics['item'], metrics['status'], metrics['error'])
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
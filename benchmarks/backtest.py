@@ -0,0 +1,61 @@
+"""ローリング・オリジンのバックテストのスループットのベンチマーク
+
+同梱の需要予測データの店舗を stores 店舗に増やしたデータについて、backtest.run_backtest を
+- cold: 起点ごとに最初から学習（refit_every=1, ウォームスタートなし）
+- warm: 起点ごとに前の起点のパラメータからウォームスタートで学習（refit_every=1）
+- reuse: refit_every 起点ごとにウォームスタートで学習し、その間は学習済みのパラメータを使う
+の3通り × ワーカー数ごとに実行し、所要時間・1秒あたりのバックテスト（起点）数・
+1日先と horizon 日先の MAE を表示する。
+
+使い方（リポジトリのルートで実行）:
+    python benchmarks/backtest.py [--stores 1] [--workers 1,2,4] [--horizon 28] [--step 7] [--window 0]
+"""
+import argparse
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.synthetic import scale_demand_stores  # noqa: E402
+from utils import backtest, batch_forecast  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stores", type=int, default=1, help="店舗数")
+    parser.add_argument("--workers", default="1,2,4", help="ワーカープロセス数（カンマ区切り）")
+    parser.add_argument("--horizon", type=int, default=backtest.DEFAULT_HORIZON, help="予測する日数")
+    parser.add_argument("--step", type=int, default=backtest.DEFAULT_STEP, help="起点をずらす日数")
+    parser.add_argument("--initial", type=int, default=backtest.DEFAULT_INITIAL, help="最初の起点までの日数")
+    parser.add_argument("--window", type=int, default=0, help="学習期間の日数（0 は起点までの全期間）")
+    parser.add_argument("--refit-every", type=int, default=backtest.DEFAULT_REFIT_EVERY,
+                        help="reuse で学習し直す起点の間隔")
+    args = parser.parse_args()
+
+    series_list = list(batch_forecast.iter_series(scale_demand_stores(args.stores)))
+    modes = [
+        ("cold", dict(refit_every=1, warm_start=False)),
+        ("warm", dict(refit_every=1, warm_start=True)),
+        ("reuse", dict(refit_every=args.refit_every, warm_start=True)),
+    ]
+    print(f"series={len(series_list)} cpu={os.cpu_count()}")
+    print(f"{'mode':<6} {'workers':>8} {'origins':>8} {'time[s]':>8} {'backtests/s':>12}"
+          f" {'MAE h=1':>8} {f'MAE h={args.horizon}':>9}")
+    for mode, options in modes:
+        for workers in [int(workers) for workers in args.workers.split(",")]:
+            start = time.perf_counter()
+            results = backtest.run_backtest(
+                series_list, horizon=args.horizon, step=args.step, initial=args.initial,
+                window=args.window or None, workers=workers, **options,
+            )
+            elapsed = time.perf_counter() - start
+            origins = sum(len(result['origin_dates']) for result in results)
+            summary = backtest.summarize(results)
+            print(f"{mode:<6} {workers:>8} {origins:>8} {elapsed:>8.2f} {origins / elapsed:>12.2f}"
+                  f" {summary['MAE'].iloc[0]:>8.3f} {summary['MAE'].iloc[-1]:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
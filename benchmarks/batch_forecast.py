@@ -0,0 +1,44 @@
+"""全店舗 × 全商品の一括需要予測のスループットのベンチマーク
+
+同梱の需要予測データの店舗を stores 店舗に増やしたデータ（店舗数 × 5商品の系列）について、
+batch_forecast.run_batch の所要時間と1秒あたりの系列数をワーカー数ごとに表示する。
+系列ごとの学習は独立しているため、CPU コア数まではワーカー数にほぼ比例して速くなる。
+
+使い方（リポジトリのルートで実行）:
+    python benchmarks/batch_forecast.py [--stores 4] [--workers 1,2,4,8] [--horizon 28] [--holdout 28]
+"""
+import argparse
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.synthetic import scale_demand_stores  # noqa: E402
+from utils import batch_forecast  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stores", type=int, default=4, help="店舗数")
+    parser.add_argument("--workers", default="1,2,4,8", help="ワーカープロセス数（カンマ区切り）")
+    parser.add_argument("--horizon", type=int, default=batch_forecast.DEFAULT_HORIZON, help="予測する日数")
+    parser.add_argument("--holdout", type=int, default=batch_forecast.DEFAULT_HOLDOUT, help="精度の評価に使う末尾の日数")
+    args = parser.parse_args()
+
+    series_list = list(batch_forecast.iter_series(scale_demand_stores(args.stores)))
+    print(f"series={len(series_list)} cpu={os.cpu_count()}")
+    print(f"{'workers':>8} {'time[s]':>9} {'series/s':>9} {'speedup':>8} {'failed':>7}")
+    baseline = None
+    for workers in [int(workers) for workers in args.workers.split(",")]:
+        start = time.perf_counter()
+        results = batch_forecast.run_batch(series_list, workers=workers, horizon=args.horizon, holdout=args.holdout)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        failed = sum(result['metrics']['status'] != 'ok' for result in results)
+        print(f"{workers:>8} {elapsed:>9.2f} {len(results) / elapsed:>9.2f} {baseline / elapsed:>7.2f}x {failed:>7}")
+
+
+if __name__ == "__main__":
+    main()
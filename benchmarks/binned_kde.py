@@ -0,0 +1,74 @@
+"""カーネル密度推定のベンチマーク（binned_kde と scipy.stats.gaussian_kde の比較）
+
+スーパーマーケットデータの合計金額から無作為に復元抽出した rows 件のデータで、
+create_rich_histogram と同じ 200 点の密度を両方式で計算し、実行時間と誤差を比較する。
+誤差は密度の最大値に対する最大絶対誤差（相対誤差）で、--tolerance を超えると終了コード 1 を返す。
+gaussian_kde は --max-exact-rows を超える件数では実行しない（数分かかるため）。
+
+使い方（リポジトリのルートで実行）:
+    python benchmarks/binned_kde.py [--rows 1000,100000,1000000,10000000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import binned_kde  # noqa: E402
+
+DATA_PATH = "data/input/supermarket_analysis.csv"
+COLUMN = "合計金額"
+GRID_POINTS = 200
+
+
+def sample_values(rows, seed=0):
+    """合計金額を rows 件に復元抽出（重複を避けるため小さなノイズを加える）"""
+    values = pd.read_csv(DATA_PATH, encoding="utf-8-sig")[COLUMN].dropna().to_numpy(dtype=np.float64)
+    rng = np.random.default_rng(seed)
+    return rng.choice(values, rows) * rng.normal(1.0, 0.01, rows)
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="1000,100000,1000000,10000000", help="データ件数（カンマ区切り）")
+    parser.add_argument("--max-exact-rows", type=int, default=1_000_000, help="gaussian_kde を実行する最大件数")
+    parser.add_argument("--tolerance", type=float, default=1e-3, help="許容する相対誤差")
+    args = parser.parse_args()
+
+    from scipy.stats import gaussian_kde
+
+    failed = False
+    print(f"{'rows':>12} {'binned[s]':>10} {'gaussian_kde[s]':>16} {'speedup':>9} {'max rel err':>12}")
+    for rows in [int(rows) for rows in args.rows.split(",")]:
+        values = sample_values(rows)
+        result, binned_seconds = timed(lambda: binned_kde.histogram_with_kde(values, bins=30, grid_points=GRID_POINTS))
+
+        if rows > args.max_exact_rows:
+            print(f"{rows:>12,} {binned_seconds:>10.4f} {'-':>16} {'-':>9} {'-':>12}")
+            continue
+
+        x = np.linspace(values.min(), values.max(), GRID_POINTS)
+        exact, exact_seconds = timed(lambda: gaussian_kde(values)(x))
+        error = np.abs(result['density'] - exact).max() / exact.max()
+        failed |= error > args.tolerance
+        print(
+            f"{rows:>12,} {binned_seconds:>10.4f} {exact_seconds:>16.4f}"
+            f" {exact_seconds / binned_seconds:>8.0f}x {error:>12.2e}"
+            + ("  許容誤差超過" if error > args.tolerance else "")
+        )
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""分布グラフの作成時間とブラウザに送るデータ量のベンチマーク
+
+データ分析ページの分布グラフ（create_histogram, create_rich_histogram, create_bar_chart）と
+回帰直線付きの散布図（create_scatter_with_regression）について、
+同梱データを scale 倍にしたときの作成時間と、図の JSON のサイズ（st.plotly_chart が
+ブラウザに送るデータ量の目安）を計測する。
+比較として、生データをそのまま px.histogram に渡す従来の作り方も計測する。
+
+使い方（リポジトリのルートで実行）:
+    python benchmarks/chart_payload.py [--scales 1,10,100,1000]
+"""
+import argparse
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.synthetic import ANALYTICS_PAGE, get_page, scale_supermarket  # noqa: E402
+
+TOTAL_COLUMN = '合計金額'
+GENDER_COLUMN = '性別'
+PRICE_COLUMN = '単価'
+
+
+def raw_histogram(df, column):
+    """従来の作り方（生データをブラウザで集計）"""
+    import plotly.express as px
+
+    return px.histogram(df, x=column, nbins=30)
+
+
+def measure(build):
+    start = time.perf_counter()
+    fig = build()
+    elapsed = time.perf_counter() - start
+    return elapsed, len(fig.to_json().encode('utf-8'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="1,10,100,1000", help="データの拡大倍率（カンマ区切り）")
+    args = parser.parse_args()
+
+    analytics = get_page(ANALYTICS_PAGE)
+    charts = [
+        ("px.histogram (raw rows)", lambda df: raw_histogram(df, TOTAL_COLUMN)),
+        ("create_histogram", lambda df: analytics.create_histogram(df, TOTAL_COLUMN)),
+        ("create_rich_histogram", lambda df: analytics.create_rich_histogram(df, TOTAL_COLUMN)),
+        ("create_bar_chart (category)", lambda df: analytics.create_bar_chart(df, GENDER_COLUMN)),
+        ("create_bar_chart (numeric)", lambda df: analytics.create_bar_chart(df, TOTAL_COLUMN)),
+        ("create_scatter_with_regression", lambda df: analytics.create_scatter_with_regression(df, PRICE_COLUMN, TOTAL_COLUMN)),
+    ]
+
+    print(f"{'chart':<30} {'rows':>12} {'build[s]':>10} {'json[KB]':>10}")
+    for scale in [int(scale) for scale in args.scales.split(",")]:
+        df = scale_supermarket(scale)
+        for name, build in charts:
+            elapsed, size = measure(lambda: build(df))
+            print(f"{name:<30} {len(df):>12,} {elapsed:>10.4f} {size / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
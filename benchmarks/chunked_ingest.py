@@ -0,0 +1,87 @@
+"""アップロードされた CSV の取り込みのベンチマーク
+
+同梱のスーパーマーケットデータを scale 倍にした CSV（メモリ上のバイト列、アップロードと同じ状態）を
+1. pd.read_csv で一度に読み込み、describe() する場合
+2. chunked_ingest.ingest_csv でチャンクごとに取り込み、メモリマップで読み込む場合
+で比較し、実行時間と tracemalloc で計測したピーク確保量（CSV のバイト列自体は除く）を表示する。
+取り込み中に集計した統計量が pandas の結果と一致するかも確認する。
+
+使い方（リポジトリのルートで実行）:
+    python benchmarks/chunked_ingest.py [--scale 3000] [--chunk-rows 200000]
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from utils import chunked_ingest, dataset_schema  # noqa: E402
+
+DATA_PATH = os.path.join(REPO_ROOT, "data", "input", "supermarket_analysis.csv")
+
+
+def build_csv(scale):
+    """同梱 CSV のデータ行を scale 回繰り返したバイト列"""
+    with open(DATA_PATH, "rb") as f:
+        header, body = f.read().split(b"\n", 1)
+    body = body.rstrip(b"\n") + b"\n"
+    return header + b"\n" + body * scale
+
+
+def measure(func):
+    """実行時間と、別に実行して tracemalloc で計測したピーク確保量（計測のオーバーヘッドを時間に含めない）"""
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=3000, help="データの複製倍率")
+    parser.add_argument("--chunk-rows", type=int, default=chunked_ingest.DEFAULT_CHUNK_ROWS, help="1チャンクの行数")
+    args = parser.parse_args()
+
+    data = build_csv(args.scale)
+    print(f"CSV: {len(data) / 1024 / 1024:.1f}MB")
+
+    def read_all():
+        df = pd.read_csv(io.BytesIO(data), encoding="utf-8-sig")
+        return df.select_dtypes(include=[np.number]).describe().T
+
+    expected, full_seconds, full_peak = measure(read_all)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_path = os.path.join(tmp_dir, "upload.arrow")
+
+        def ingest():
+            result = chunked_ingest.ingest_csv(
+                io.BytesIO(data), cache_path, dataset_schema.SUPERMARKET_SCHEMA,
+                histogram_columns=["合計金額"], chunk_rows=args.chunk_rows,
+            )
+            df = chunked_ingest.read_ingested(cache_path, dataset_schema.SUPERMARKET_SCHEMA["categorical"])
+            return result, df
+
+        (result, df), ingest_seconds, ingest_peak = measure(ingest)
+
+    error = np.abs(result["statistics"].describe().to_numpy() - expected.to_numpy()) / np.abs(expected.to_numpy())
+    print(f"{'方式':<28} {'行数':>12} {'時間[s]':>9} {'ピーク[MB]':>11}")
+    print(f"{'pd.read_csv (一括)':<28} {int(expected['count'].iloc[0]):>12,} {full_seconds:>9.2f} {full_peak:>11.1f}")
+    print(f"{'ingest_csv (チャンク)':<28} {result['rows']:>12,} {ingest_seconds:>9.2f} {ingest_peak:>11.1f}")
+    print(f"統計量の最大相対誤差: {np.nanmax(error):.2e}")
+
+
+if __name__ == "__main__":
+    main()
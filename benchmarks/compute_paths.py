@@ -0,0 +1,296 @@
+"""各ページの計算処理のベンチマーク
+
+主要な関数を直接呼び出すケースと、Streamlit の AppTest でページ全体を
+ヘッドレスで実行するケースを、同梱データの 1倍・10倍・100倍の規模で計測する。
+各ケースは独立したプロセスで実行し、以下を記録する。
+- wall_seconds: 実行時間（repeat 回の中央値）
+- peak_rss_mb: プロセスの最大常駐メモリ
+- alloc_peak_mb: tracemalloc で計測した1回あたりのピーク確保量
+- retained_blocks: 実行後も確保されたままのメモリブロック数
+
+benchmarks/baselines/compute_paths.json と比較し、実行時間または確保量が
+許容幅（--tolerance）を超えて悪化したケースがあれば終了コード 1 を返す。
+
+使い方（リポジトリのルートで実行）:
+    python benchmarks/compute_paths.py
+    python benchmarks/compute_paths.py --cases create_rich_histogram,page:analytics --scales 1,10
+    python benchmarks/compute_paths.py --update-baseline
+"""
+import argparse
+import inspect
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(REPO_ROOT, "benchmarks", "baselines", "compute_paths.json")
+MAIN_SCRIPT_PATH = os.path.join(REPO_ROOT, "main.py")
+
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault("CACHE_WARMUP", "0")
+
+from benchmarks.synthetic import (  # noqa: E402
+    AI_CHATBOT_PAGE,
+    ANALYTICS_PAGE,
+    DEMAND_FORECAST_PAGE,
+    RECOMMENDATION_PAGE,
+    get_page,
+    scale_books,
+    scale_demand_series,
+    scale_supermarket,
+)
+from utils import forecasting  # noqa: E402
+
+DEFAULT_SCALES = (1, 10, 100)
+
+
+class StubOpenAIClient:
+    """OpenAI クライアントのスタブ（API を呼ばずに固定の応答を返す）"""
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model, messages, **kwargs):
+        content = f"スタブ応答: {messages[-1]['content']}"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+# --- 直接呼び出しのケース ---
+
+def case_create_rich_histogram(scale):
+    analytics = get_page(ANALYTICS_PAGE)
+    df = scale_supermarket(scale)
+    return lambda: analytics.create_rich_histogram(df, '合計金額')
+
+
+def case_create_beautiful_correlation_heatmap(scale):
+    analytics = get_page(ANALYTICS_PAGE)
+    df = scale_supermarket(scale)
+    return lambda: analytics.create_beautiful_correlation_heatmap(df)
+
+
+def case_train_sarimax_model_forecast(scale):
+    demand = get_page(DEMAND_FORECAST_PAGE)
+    df_item, item = scale_demand_series(scale)
+    df_train, df_test = demand.split_train_test(df_item, demand.get_default_split_date(df_item))
+
+    def run():
+        # モデルのレジストリを経由せずに毎回学習する
+        model = forecasting.fit_sarimax(df_train['販売個数'])
+        return model.forecast(steps=len(df_test))
+
+    return run
+
+
+def case_prepare_tfidf_matrix(scale):
+    recommendation = get_page(RECOMMENDATION_PAGE)
+    df = scale_books(scale)
+    prepare_tfidf_matrix = inspect.unwrap(recommendation.prepare_tfidf_matrix)
+    return lambda: prepare_tfidf_matrix(df)
+
+
+def case_get_content_based_recommendations(scale):
+    recommendation = get_page(RECOMMENDATION_PAGE)
+    df = scale_books(scale)
+    df_unique, tfidf_matrix, _, error = inspect.unwrap(recommendation.prepare_tfidf_matrix)(df)
+    if error:
+        raise RuntimeError(error)
+    book_id = df_unique['book_id'].iloc[0]
+    return lambda: recommendation.get_content_based_recommendations(df_unique, tfidf_matrix, [book_id], 10)
+
+
+# --- AppTest でページ全体を実行するケース ---
+
+def _open_page(label_index):
+    """AppTest で main.py を起動し、指定したページに切り替える"""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(MAIN_SCRIPT_PATH, default_timeout=600)
+    at.run()
+    labels = at.radio(key="active_page").options
+    at.radio(key="active_page").set_value(labels[label_index]).run()
+    return at
+
+
+def _check_app(at):
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return at
+
+
+def case_process_user_input(scale):
+    """スタブの OpenAI クライアントで、履歴が 10×scale 件ある状態から1往復"""
+    chatbot = get_page(AI_CHATBOT_PAGE)
+    chatbot.initialize_openai_client = lambda: (StubOpenAIClient(), "スタブクライアント")
+
+    at = _open_page(4)
+    history = []
+    for i in range(5 * scale):
+        history.append({"role": "user", "content": f"質問 {i}"})
+        history.append({"role": "assistant", "content": f"回答 {i}"})
+    at.session_state["messages"] = at.session_state["messages"][:1] + history
+
+    return lambda: _check_app(at.chat_input[0].set_value("データサイエンスの始め方は？").run())
+
+
+def _page_case(label_index):
+    def case(scale):
+        at = _open_page(label_index)
+        return lambda: _check_app(at.run())
+    return case
+
+
+# (ケース名, セットアップ関数, 対象の規模)
+CASES = [
+    ("create_rich_histogram", case_create_rich_histogram, DEFAULT_SCALES),
+    ("create_beautiful_correlation_heatmap", case_create_beautiful_correlation_heatmap, DEFAULT_SCALES),
+    ("train_sarimax_model+forecast", case_train_sarimax_model_forecast, DEFAULT_SCALES),
+    ("prepare_tfidf_matrix", case_prepare_tfidf_matrix, DEFAULT_SCALES),
+    ("get_content_based_recommendations", case_get_content_based_recommendations, DEFAULT_SCALES),
+    ("process_user_input", case_process_user_input, DEFAULT_SCALES),
+    # ページ全体はバンドルデータのみ（1倍）
+    ("page:top", _page_case(0), (1,)),
+    ("page:analytics", _page_case(1), (1,)),
+    ("page:demand_forecast", _page_case(2), (1,)),
+    ("page:recommendation", _page_case(3), (1,)),
+    ("page:ai_chatbot", _page_case(4), (1,)),
+]
+
+
+def _current_rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+def run_case_in_process(name, scale, repeat):
+    """1つのケースを現在のプロセスで計測"""
+    setup = {case_name: case for case_name, case, _ in CASES}[name]
+    func = setup(scale)
+    func()  # ウォームアップ（遅延インポートやキャッシュの初期化を除外する）
+    rss_before_mb = _current_rss_mb()
+
+    wall_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        wall_times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, alloc_peak = tracemalloc.get_traced_memory()
+    retained_blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    tracemalloc.stop()
+
+    return {
+        "case": name,
+        "scale": scale,
+        "wall_seconds": statistics.median(wall_times),
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "rss_before_mb": rss_before_mb,
+        "alloc_peak_mb": alloc_peak / 1024 / 1024,
+        "retained_blocks": retained_blocks,
+    }
+
+
+def run_case(name, scale, repeat):
+    """1つのケースを独立したプロセスで計測"""
+    result = subprocess.run(
+        [sys.executable, __file__, "--worker", name, str(scale), "--repeat", str(repeat)],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        return {"case": name, "scale": scale, "error": result.stderr.strip().splitlines()[-1:]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _baseline_key(name, scale):
+    return f"{name}@{scale}x"
+
+
+def compare_with_baseline(result, baseline, tolerance):
+    """ベースラインと比較して悪化した指標を返す"""
+    entry = baseline.get(_baseline_key(result["case"], result["scale"]))
+    if entry is None or "error" in result:
+        return []
+    regressions = []
+    for metric in ("wall_seconds", "alloc_peak_mb"):
+        if result[metric] > entry[metric] * (1 + tolerance):
+            regressions.append(f"{metric} {entry[metric]:.4g} -> {result[metric]:.4g}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", help="実行するケース名（カンマ区切り、省略時はすべて）")
+    parser.add_argument("--scales", help="実行する規模（カンマ区切り、例: 1,10）")
+    parser.add_argument("--repeat", type=int, default=3, help="各ケースの計測回数（中央値を採用）")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="ベースラインに対する許容悪化率")
+    parser.add_argument("--update-baseline", action="store_true", help="計測結果でベースラインを更新")
+    parser.add_argument("--worker", nargs=2, metavar=("CASE", "SCALE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        name, scale = args.worker
+        print(json.dumps(run_case_in_process(name, int(scale), args.repeat)))
+        return 0
+
+    selected_cases = set(args.cases.split(",")) if args.cases else None
+    selected_scales = {int(scale) for scale in args.scales.split(",")} if args.scales else None
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results = []
+    failed = []
+    print(f"{'case':<40} {'scale':>5} {'wall[s]':>9} {'peakRSS[MB]':>12} {'alloc[MB]':>10} {'blocks':>9}")
+    for name, _, scales in CASES:
+        if selected_cases and name not in selected_cases:
+            continue
+        for scale in scales:
+            if selected_scales and scale not in selected_scales:
+                continue
+            result = run_case(name, scale, args.repeat)
+            results.append(result)
+            if "error" in result:
+                print(f"{name:<40} {scale:>4}x  ERROR {result['error']}")
+                failed.append(_baseline_key(name, scale))
+                continue
+            regressions = compare_with_baseline(result, baseline, args.tolerance)
+            print(
+                f"{name:<40} {scale:>4}x {result['wall_seconds']:>9.4f} {result['peak_rss_mb']:>12.1f}"
+                f" {result['alloc_peak_mb']:>10.2f} {result['retained_blocks']:>9}"
+                + (f"  REGRESSION: {', '.join(regressions)}" if regressions else "")
+            )
+            if regressions:
+                failed.append(_baseline_key(name, scale))
+
+    if args.update_baseline:
+        for result in results:
+            if "error" not in result:
+                baseline[_baseline_key(result["case"], result["scale"])] = {
+                    metric: round(result[metric], 6)
+                    for metric in ("wall_seconds", "peak_rss_mb", "alloc_peak_mb", "retained_blocks")
+                }
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(dict(sorted(baseline.items())), f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"ベースラインを更新しました: {BASELINE_PATH}")
+        return 0
+
+    if failed:
+        print(f"性能が悪化した、または失敗したケース: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
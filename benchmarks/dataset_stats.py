@@ -0,0 +1,63 @@
+"""数値列の統計量の計算時間のベンチマーク
+
+データ分析ページで使う統計量（相関行列・基本統計量・合計金額の中央値・単価と合計金額の相関）を
+pandas で個別に計算する場合と、dataset_stats.DatasetStatistics で一度に計算する場合を比較する。
+あわせて、append_ratio の割合の行が追加されたときに、全体を計算し直す場合と
+追加分だけを集計して結合（update）する場合の時間も比較する。
+
+使い方（リポジトリのルートで実行）:
+    python benchmarks/dataset_stats.py [--scales 1,100,10000] [--append-ratio 0.01]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.synthetic import scale_supermarket  # noqa: E402
+from utils import dataset_stats  # noqa: E402
+
+
+def pandas_statistics(df):
+    """従来の計算（表示ごとに個別に計算）"""
+    numeric = df.select_dtypes(include=[np.number])
+    numeric.dropna().corr()
+    numeric.describe()
+    df['合計金額'].dropna().median()
+    df['単価'].corr(df['合計金額'])
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="1,100,10000", help="データの拡大倍率（カンマ区切り）")
+    parser.add_argument("--append-ratio", type=float, default=0.01, help="追加される行の割合")
+    args = parser.parse_args()
+
+    print(f"{'rows':>12} {'pandas[s]':>10} {'engine[s]':>10} {'rescan[s]':>10} {'update[s]':>10}")
+    for scale in [int(scale) for scale in args.scales.split(",")]:
+        df = scale_supermarket(scale)
+        _, pandas_seconds = timed(lambda: pandas_statistics(df))
+        _, engine_seconds = timed(lambda: dataset_stats.DatasetStatistics.from_frame(df))
+
+        split = len(df) - max(1, int(len(df) * args.append_ratio))
+        base = dataset_stats.DatasetStatistics.from_frame(df.iloc[:split])
+        _, rescan_seconds = timed(lambda: dataset_stats.DatasetStatistics.from_frame(df))
+        _, update_seconds = timed(lambda: base.update(df.iloc[split:]))
+        print(
+            f"{len(df):>12,} {pandas_seconds:>10.4f} {engine_seconds:>10.4f}"
+            f" {rescan_seconds:>10.4f} {update_seconds:>10.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
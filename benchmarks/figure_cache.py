@@ -0,0 +1,78 @@
+"""グラフのキャッシュ（figure_cache）の効果のベンチマーク
+
+データ分析ページの4つのグラフ（合計金額の分布・性別の棒グラフ・回帰直線付き散布図・相関ヒートマップ）
+について、再実行時に st.plotly_chart が行う処理（図の作成 → to_dict による検証 → JSON 化）を
+1. 毎回図を作成する場合
+2. figure_cache.cached_figure でキャッシュから返す場合（2回目以降の再実行）
+で比較する。キャッシュから返した図の JSON が作成した図と一致するかも確認する。
+初回（キャッシュなし）にはデータセットのチェックサムの計算が含まれる。
+
+使い方（リポジトリのルートで実行）:
+    python benchmarks/figure_cache.py [--scales 1,100,3000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.synthetic import ANALYTICS_PAGE, get_page, scale_supermarket  # noqa: E402
+from utils import figure_cache  # noqa: E402
+
+TOTAL_COLUMN = '合計金額'
+GENDER_COLUMN = '性別'
+PRICE_COLUMN = '単価'
+
+
+def render(fig):
+    """st.plotly_chart と同じ検証・JSON 化"""
+    import plotly
+    import plotly.io
+
+    figure = plotly.tools.return_figure_from_figure_or_data(fig, validate_figure=True)
+    return plotly.io.to_json(figure, validate=False)
+
+
+def best_of(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="1,100,3000", help="データの拡大倍率（カンマ区切り）")
+    parser.add_argument("--repeat", type=int, default=5, help="実行回数（最短時間を表示）")
+    args = parser.parse_args()
+
+    analytics = get_page(ANALYTICS_PAGE)
+    charts = [
+        ("create_rich_histogram", analytics.create_rich_histogram, (TOTAL_COLUMN,)),
+        ("create_bar_chart", analytics.create_bar_chart, (GENDER_COLUMN,)),
+        ("create_scatter_with_regression", analytics.create_scatter_with_regression, (PRICE_COLUMN, TOTAL_COLUMN)),
+        ("create_beautiful_correlation_heatmap", analytics.create_beautiful_correlation_heatmap, ()),
+    ]
+
+    print(f"{'chart':<38} {'rows':>12} {'rebuild[ms]':>12} {'first[ms]':>10} {'cached[ms]':>11} {'same':>5}")
+    for scale in [int(scale) for scale in args.scales.split(",")]:
+        df = scale_supermarket(scale)
+        cache = figure_cache.FigureCache()
+        for name, func, chart_args in charts:
+            expected, rebuild_seconds = best_of(lambda: render(func(df, *chart_args)), args.repeat)
+            _, first_seconds = best_of(lambda: render(figure_cache.cached_figure(func, df, *chart_args, cache=cache)), 1)
+            cached, cached_seconds = best_of(
+                lambda: render(figure_cache.cached_figure(func, df, *chart_args, cache=cache)), args.repeat
+            )
+            print(
+                f"{name:<38} {len(df):>12,} {rebuild_seconds * 1000:>12.1f} {first_seconds * 1000:>10.1f}"
+                f" {cached_seconds * 1000:>11.2f} {str(cached == expected):>5}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""ウィジェット操作時の再実行時間のベンチマーク
+
+各ページの操作部分は @st.fragment で囲んであり、その中のウィジェットを操作すると
+フラグメントだけが再実行される。AppTest はフラグメント単位の再実行を再現できないため、
+ウィジェットを操作した AppTest の実行で以下の2つを計測して比較する。
+- before: アプリ全体の再実行時間（フラグメント化する前はウィジェット操作ごとにこれだけかかっていた）
+- after: フラグメント本体の実行時間（instrumentation.timed で記録、フラグメントの再実行で実行される部分）
+
+使い方（リポジトリのルートで実行）:
+    python benchmarks/fragment_reruns.py [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import timedelta
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN_SCRIPT_PATH = os.path.join(REPO_ROOT, "main.py")
+
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault("CACHE_WARMUP", "0")
+os.environ["APP_DIAGNOSTICS"] = "1"
+
+from utils import instrumentation  # noqa: E402
+
+
+def change_split_date(at):
+    """需要予測: 学習・予測期間の分割点を1日ずらす"""
+    date_input = at.date_input[0]
+    return date_input.set_value(date_input.value - timedelta(days=1))
+
+
+def change_recommendation_count(at):
+    """レコメンド: レコメンド数のスライダーを動かす"""
+    slider = at.slider[0]
+    return slider.set_value(15 if slider.value != 15 else 10)
+
+
+def change_sample_question(at):
+    """AIチャットボット: 質問例を選び直す"""
+    selectbox = at.selectbox[0]
+    options = [option for option in selectbox.options if option]
+    return selectbox.set_value(options[1] if selectbox.value == options[0] else options[0])
+
+
+# (ケース名, ページのインデックス, フラグメント関数名, ウィジェット操作)
+CASES = [
+    ("demand_forecast: 分割点の変更", 2, "render_forecast_section", change_split_date),
+    ("recommendation: レコメンド数の変更", 3, "render_recommendation_section", change_recommendation_count),
+    ("ai_chatbot: 質問例の選択", 4, "render_chat_section", change_sample_question),
+]
+
+
+def open_page(label_index):
+    """AppTest で main.py を起動し、指定したページに切り替える"""
+    from streamlit.testing.v1 import AppTest
+
+    os.chdir(REPO_ROOT)
+    at = AppTest.from_file(MAIN_SCRIPT_PATH, default_timeout=600)
+    at.run()
+    labels = at.radio(key="active_page").options
+    at.radio(key="active_page").set_value(labels[label_index]).run()
+    return at
+
+
+def measure(label_index, fragment_name, interact, repeat):
+    """ウィジェットを repeat 回操作し、アプリ全体とフラグメント本体の実行時間の中央値を返す"""
+    at = open_page(label_index)
+    interact(at).run()  # ウォームアップ（遅延インポートやキャッシュの初期化を除外する）
+
+    app_times = []
+    fragment_times = []
+    for _ in range(repeat):
+        widget_change = interact(at)
+        start = time.perf_counter()
+        widget_change.run()
+        app_times.append(time.perf_counter() - start)
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+        fragment_times.append(instrumentation.get_timings()[fragment_name]['last_seconds'])
+    return statistics.median(app_times), statistics.median(fragment_times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="各ケースの計測回数（中央値を採用）")
+    args = parser.parse_args()
+
+    print(f"{'操作':<40} {'before[s]':>10} {'after[s]':>10} {'短縮率':>8}")
+    for name, label_index, fragment_name, interact in CASES:
+        app_seconds, fragment_seconds = measure(label_index, fragment_name, interact, args.repeat)
+        reduction = 1 - fragment_seconds / app_seconds
+        print(f"{name:<40} {app_seconds:>10.4f} {fragment_seconds:>10.4f} {reduction:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
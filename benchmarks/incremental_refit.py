@@ -0,0 +1,91 @@
+"""分割点を動かした場合の SARIMAX モデルの取得時間と精度のベンチマーク
+
+同梱の需要予測データの全商品について、デフォルトの分割点（80%地点）で学習したモデルを
+レジストリに保存しておき、分割点を shift 日ずらした場合の
+- cold: 最初から学習し直す時間
+- registry: model_registry.get_sarimax_model の時間（max_drift_days 以内は再学習せず、
+  それを超える場合は最も近いモデルのパラメータからウォームスタートで学習）
+と、分割点の翌日から horizon 日の予測の MAE（cold / registry）を商品の平均で表示する。
+レジストリは一時ディレクトリに作るため、data/cache/models は変更しない。
+
+使い方（リポジトリのルートで実行）:
+    python benchmarks/incremental_refit.py [--shifts -28,-7,-1,1,7,28,56] [--horizon 28] [--max-drift-days 28]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.synthetic import DEMAND_FORECAST_PAGE, get_page  # noqa: E402
+from utils import forecasting, model_registry  # noqa: E402
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def mae(results, y_test):
+    return float(np.mean(np.abs(y_test - np.asarray(results.forecast(steps=len(y_test))))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shifts", default="-28,-7,-1,1,7,28,56", help="分割点をずらす日数（カンマ区切り）")
+    parser.add_argument("--horizon", type=int, default=28, help="精度を評価する日数")
+    parser.add_argument("--max-drift-days", type=int, default=model_registry.MAX_DRIFT_DAYS,
+                        help="再学習せずにモデルを作る分割点の差の上限[日]")
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    demand = get_page(DEMAND_FORECAST_PAGE)
+    df, _ = demand.load_demand_data()
+    df_filtered = demand.filter_store_data(df)
+    items = sorted(df_filtered['商品'].unique())
+    shifts = [int(shift) for shift in args.shifts.split(",")]
+    rows = {shift: [] for shift in shifts}
+
+    for item in items:
+        df_item = demand.filter_item_data(df_filtered, item)
+        store = demand.get_store_name(df_item)
+        default_split = demand.get_default_split_date(df_item)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for shift in shifts:
+                # 分割点ごとに、デフォルトの分割点のモデルだけを保存したレジストリから始める
+                registry = model_registry.ModelRegistry(cache_dir=tmp_dir)
+                df_anchor, _ = demand.split_train_test(df_item, default_split)
+                model_registry.get_sarimax_model(store, item, default_split, df_anchor['販売個数'], registry=registry)
+
+                split_date = default_split + pd.Timedelta(days=shift)
+                df_train, df_test = demand.split_train_test(df_item, split_date)
+                y_train = df_train['販売個数'].to_numpy(dtype=np.float64)
+                y_test = df_test['販売個数'].to_numpy(dtype=np.float64)[:args.horizon]
+
+                cold, cold_ms = timed(lambda: forecasting.fit_sarimax(y_train))
+                fast, fast_ms = timed(lambda: model_registry.get_sarimax_model(
+                    store, item, split_date, y_train, registry=registry, max_drift_days=args.max_drift_days
+                ))
+                method = "incremental" if registry.incremental else "warm start"
+                rows[shift].append((cold_ms, fast_ms, mae(cold, y_test), mae(fast, y_test), method))
+                registry.clear()
+
+    print(f"{'shift':>6} {'method':<12} {'cold[ms]':>9} {'registry[ms]':>13} {'speedup':>8}"
+          f" {'MAE cold':>9} {'MAE registry':>13}")
+    for shift in shifts:
+        cold_ms, fast_ms, cold_mae, fast_mae = (np.mean([row[i] for row in rows[shift]]) for i in range(4))
+        method = rows[shift][0][4]
+        print(f"{shift:>6} {method:<12} {cold_ms:>9.1f} {fast_ms:>13.1f} {cold_ms / fast_ms:>7.1f}x"
+              f" {cold_mae:>9.3f} {fast_mae:>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
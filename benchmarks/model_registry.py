@@ -0,0 +1,78 @@
+"""SARIMAX モデルのレジストリのベンチマーク
+
+同梱の需要予測データの全商品について、デフォルトの分割点（80%地点）で
+1. レジストリにない状態での学習（cold）
+2. 別のレジストリ（再起動後・別プロセスに相当）からのディスク読み込み（disk）
+3. 同じレジストリからの取得（memory）
+の時間と、保存したモデルのファイルサイズ、ヒット・ミス数を表示する。
+レジストリは一時ディレクトリに作るため、data/cache/models は変更しない。
+
+使い方（リポジトリのルートで実行）:
+    python benchmarks/model_registry.py [--repeat 20]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.synthetic import DEMAND_FORECAST_PAGE, get_page  # noqa: E402
+from utils import model_registry  # noqa: E402
+
+
+def measure(func, repeat=1):
+    """実行時間の中央値[ms]と最後の結果"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20, help="disk / memory の計測回数")
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    demand = get_page(DEMAND_FORECAST_PAGE)
+    df, _ = demand.load_demand_data()
+    df_filtered = demand.filter_store_data(df)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        registry = model_registry.ModelRegistry(cache_dir=tmp_dir)
+        print(f"{'item':<8} {'cold[ms]':>9} {'disk[ms]':>9} {'memory[ms]':>11} {'size[KB]':>9}")
+        for item in sorted(df_filtered['商品'].unique()):
+            df_item = demand.filter_item_data(df_filtered, item)
+            df_train, _ = demand.split_train_test(df_item, demand.get_default_split_date(df_item))
+            store = demand.get_store_name(df_item)
+            split_date = df_train['日付'].max()
+            key = model_registry.model_key(
+                store, item, split_date, model_registry.series_checksum(df_train['販売個数'])
+            )
+
+            def get(registry):
+                return model_registry.get_sarimax_model(
+                    store, item, split_date, df_train['販売個数'], registry=registry
+                )
+
+            cold, _ = measure(lambda: get(registry))
+
+            def get_from_new_registry():
+                return get(model_registry.ModelRegistry(cache_dir=tmp_dir))
+
+            disk, _ = measure(get_from_new_registry, args.repeat)
+            memory, _ = measure(lambda: get(registry), args.repeat)
+            size = os.path.getsize(os.path.join(tmp_dir, f"{key}{model_registry.MODEL_EXTENSION}")) / 1024
+            print(f"{item:<8} {cold:>9.1f} {disk:>9.2f} {memory:>11.3f} {size:>9.0f}")
+        print(registry.stats())
+
+
+if __name__ == "__main__":
+    main()
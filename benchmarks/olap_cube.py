@@ -0,0 +1,84 @@
+"""クロス集計（ドリルダウン）の応答時間のベンチマーク
+
+同梱のスーパーマーケットデータを scale 倍にしたデータに対して、ドリルダウンでよく使う
+絞り込み・集計軸の組み合わせを
+1. 毎回 pandas で行データを絞り込んで groupby する場合
+2. olap_cube.SalesCube（事前集計）から求める場合
+で比較する。キューブの構築時間と、append_ratio の割合の行を追加したときの update() の時間、
+各クエリの結果が pandas と一致するかも表示する。
+
+使い方（リポジトリのルートで実行）:
+    python benchmarks/olap_cube.py [--scale 3000] [--append-ratio 0.01] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.synthetic import scale_supermarket  # noqa: E402
+from utils import olap_cube  # noqa: E402
+
+# (名前, 絞り込み, 集計軸, 日付の単位)
+QUERIES = [
+    ("全体", {}, [], None),
+    ("顧客タイプ別", {}, ["顧客タイプ"], None),
+    ("女性 × 支払方法別", {"性別": ["Female"]}, ["支払方法"], None),
+    ("全次元 × 月別", {}, ["顧客タイプ", "性別", "支払方法"], "M"),
+    ("会員 × 性別 × 日別", {"顧客タイプ": ["Member"]}, ["性別"], "D"),
+]
+
+
+def pandas_query(df, filters, group_by, date_frequency):
+    """従来の計算（行データを絞り込んで groupby）"""
+    mask = np.ones(len(df), dtype=bool)
+    for column, values in filters.items():
+        mask &= df[column].isin(values).to_numpy()
+    subset = df[mask]
+    keys = [subset[column] for column in group_by]
+    if date_frequency is not None:
+        dates = subset[olap_cube.DATE_COLUMN].dt.to_period(date_frequency).dt.start_time
+        keys.append(dates.rename(olap_cube.DATE_DIMENSION))
+    if not keys:
+        return subset[olap_cube.MEASURES].sum().to_frame().T
+    return subset.groupby(keys, observed=True)[olap_cube.MEASURES].sum()
+
+
+def best_of(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=3000, help="データの複製倍率")
+    parser.add_argument("--append-ratio", type=float, default=0.01, help="追加される行の割合")
+    parser.add_argument("--repeat", type=int, default=5, help="各クエリの実行回数（最短時間を表示）")
+    args = parser.parse_args()
+
+    df = scale_supermarket(args.scale)
+    split = len(df) - max(1, int(len(df) * args.append_ratio))
+    cube, build_seconds = best_of(lambda: olap_cube.SalesCube.from_frame(df), 1)
+    base = olap_cube.SalesCube.from_frame(df.iloc[:split])
+    _, update_seconds = best_of(lambda: base.update(df.iloc[split:]), 1)
+    print(f"行数: {len(df):,}  キューブ: {cube.rows.shape}  構築: {build_seconds:.3f}s  追加分の update: {update_seconds:.4f}s")
+
+    print(f"{'クエリ':<20} {'pandas[ms]':>11} {'cube[ms]':>9} {'一致':>5}")
+    for name, filters, group_by, date_frequency in QUERIES:
+        expected, pandas_seconds = best_of(lambda: pandas_query(df, filters, group_by, date_frequency), args.repeat)
+        result, cube_seconds = best_of(lambda: cube.query(filters, group_by, date_frequency), args.repeat)
+        sums = result[[f"{measure}_合計" for measure in olap_cube.MEASURES]].to_numpy()
+        matches = sums.shape == expected.shape and np.allclose(sums, expected.to_numpy(dtype=np.float64), rtol=1e-6)
+        print(f"{name:<20} {pandas_seconds * 1000:>11.1f} {cube_seconds * 1000:>9.1f} {str(matches):>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""SARIMAX の次数の自動選択（AIC による枝刈り）のベンチマーク
+
+同梱の需要予測データの全商品について、デフォルトの分割点（80%地点）までの学習データで
+- exhaustive: すべての候補を最後まで学習して AIC が最小の次数を選ぶ
+- pruned: order_search.search_order（少ない反復回数で全候補を評価し、上位の候補だけを最後まで学習）
+の時間と選んだ次数・AIC を表示する。あわせて、保存済みの次数を読み込む（探索を省く）時間も表示する。
+次数の保存先は一時ディレクトリにするため、data/cache/orders は変更しない。
+
+使い方（リポジトリのルートで実行）:
+    python benchmarks/order_search.py [--workers 4] [--screen-maxiter 5] [--keep-ratio 0.25] [--no-exhaustive]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.synthetic import DEMAND_FORECAST_PAGE, get_page  # noqa: E402
+from utils import order_search  # noqa: E402
+
+
+def exhaustive_search(y_train, candidates, workers):
+    """すべての候補を最後まで学習して AIC が最小の次数を選ぶ"""
+    scores = order_search._map(
+        order_search.score_candidate,
+        [(y_train, order, seasonal_order, None, None) for order, seasonal_order in candidates],
+        workers,
+    )
+    aic, best = min((aic, index) for index, (aic, _) in enumerate(scores))
+    return candidates[best], aic
+
+
+def format_order(order, seasonal_order):
+    return f"{tuple(order)}x{tuple(seasonal_order)}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=None, help="ワーカープロセス数（既定は CPU コア数）")
+    parser.add_argument("--screen-maxiter", type=int, default=order_search.SCREEN_MAXITER, help="粗い評価の反復回数")
+    parser.add_argument("--keep-ratio", type=float, default=order_search.KEEP_RATIO, help="最後まで学習する候補の割合")
+    parser.add_argument("--no-exhaustive", action="store_true", help="全候補の探索を省く")
+    args = parser.parse_args()
+    workers = args.workers or os.cpu_count() or 1
+
+    demand = get_page(DEMAND_FORECAST_PAGE)
+    df, _ = demand.load_demand_data()
+    df_filtered = demand.filter_store_data(df)
+    candidates = order_search.candidate_orders()
+    print(f"candidates={len(candidates)} workers={workers}")
+    print(f"{'item':<6} {'exhaustive[s]':>14} {'pruned[s]':>10} {'cached[ms]':>11}  {'order (exhaustive)':<24}"
+          f" {'order (pruned)':<24} {'AIC diff':>9}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        order_search.ORDER_CACHE_DIR = tmp_dir
+        for item in sorted(df_filtered['商品'].unique()):
+            df_item = demand.filter_item_data(df_filtered, item)
+            df_train, _ = demand.split_train_test(df_item, demand.get_default_split_date(df_item))
+            y_train = df_train['販売個数'].to_numpy(dtype=float)
+
+            exhaustive_seconds, exhaustive_order, aic_diff = float("nan"), "-", float("nan")
+            if not args.no_exhaustive:
+                start = time.perf_counter()
+                best, best_aic = exhaustive_search(y_train, candidates, workers)
+                exhaustive_seconds = time.perf_counter() - start
+                exhaustive_order = format_order(*best)
+
+            result = order_search.search_order(
+                y_train, candidates, screen_maxiter=args.screen_maxiter, keep_ratio=args.keep_ratio, workers=workers
+            )
+            if not args.no_exhaustive:
+                aic_diff = result['aic'] - best_aic
+
+            key = order_search.order_cache_key(demand.get_store_name(df_item), item, candidates)
+            order_search.save_order(key, result)
+            # 別のプロセスから読み込む場合と同じく、プロセス内の保持を消してから計測する
+            order_search._orders.clear()
+            start = time.perf_counter()
+            order_search.get_order(demand.get_store_name(df_item), item, y_train, candidates)
+            cached_ms = (time.perf_counter() - start) * 1000
+
+            print(f"{item:<6} {exhaustive_seconds:>14.2f} {result['seconds']:>10.2f} {cached_ms:>11.2f}"
+                  f"  {exhaustive_order:<24} {format_order(result['order'], result['seasonal_order']):<24}"
+                  f" {aic_diff:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
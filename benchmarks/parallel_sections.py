@@ -0,0 +1,78 @@
+"""データ分析ページのセクションの並列作成のベンチマーク
+
+display_fixed_analysis の4つのセクション（合計金額の分布・性別分布・単価と合計金額の散布図・相関ヒートマップ）の
+図と統計量を、
+1. 順に作成する場合（parallel_sections.SECTION_WORKERS = 1）
+2. スレッドプールで並列に作成する場合
+で比較し、セクションごとの実行時間（instrumentation で記録）と合計の時間を表示する。
+グラフのキャッシュ（figure_cache）は毎回空にして、図の作成を計測する（統計量は事前に計算しておく）。
+
+使い方（リポジトリのルートで実行）:
+    python benchmarks/parallel_sections.py [--scales 1,100,3000] [--repeat 3] [--workers 4]
+"""
+import argparse
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+os.environ["APP_DIAGNOSTICS"] = "1"
+
+from benchmarks.synthetic import ANALYTICS_PAGE, get_page, scale_supermarket  # noqa: E402
+from utils import dataset_stats, figure_cache, instrumentation, parallel_sections  # noqa: E402
+
+SECTION_PREFIX = "display_fixed_analysis."
+
+
+def measure(analytics, df, workers, repeat):
+    """最短の合計時間と、そのときのセクションごとの実行時間"""
+    parallel_sections.SECTION_WORKERS = workers
+    best_seconds, best_sections = float("inf"), {}
+    for _ in range(repeat):
+        figure_cache.get_figure_cache().clear()
+        instrumentation.reset()
+        start = time.perf_counter()
+        analytics.build_analysis_sections(df, '合計金額', '性別', '単価')
+        elapsed = time.perf_counter() - start
+        if elapsed < best_seconds:
+            best_seconds = elapsed
+            best_sections = {
+                name[len(SECTION_PREFIX):]: stats['last_seconds']
+                for name, stats in instrumentation.get_timings().items()
+                if name.startswith(SECTION_PREFIX)
+            }
+    return best_seconds, best_sections
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="1,100,3000", help="データの拡大倍率（カンマ区切り）")
+    parser.add_argument("--repeat", type=int, default=3, help="実行回数（最短時間を表示）")
+    parser.add_argument("--workers", type=int, default=4, help="並列に作成する場合のスレッド数")
+    args = parser.parse_args()
+
+    analytics = get_page(ANALYTICS_PAGE)
+    default_workers = parallel_sections.SECTION_WORKERS
+    workers = args.workers
+    print(f"並列数: {workers}（CPU: {os.cpu_count()}）")
+    for scale in [int(scale) for scale in args.scales.split(",")]:
+        df = scale_supermarket(scale)
+        dataset_stats.get_statistics(df)
+        figure_cache.dataset_checksum(df)
+        # 初回の読み込み（plotly など）を計測に含めない
+        measure(analytics, df, 1, 1)
+
+        sequential_seconds, sequential_sections = measure(analytics, df, 1, args.repeat)
+        parallel_seconds, parallel_sections_seconds = measure(analytics, df, workers, args.repeat)
+        print(f"\nrows: {len(df):,}")
+        print(f"{'section':<24} {'sequential[ms]':>15} {'parallel[ms]':>13}")
+        for name, seconds in sequential_sections.items():
+            print(f"{name:<24} {seconds * 1000:>15.1f} {parallel_sections_seconds.get(name, float('nan')) * 1000:>13.1f}")
+        print(f"{'合計（ページの待ち時間）':<20} {sequential_seconds * 1000:>15.1f} {parallel_seconds * 1000:>13.1f}")
+    parallel_sections.SECTION_WORKERS = default_workers
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""分位点スケッチ（KLL）の誤差・メモリ・計算時間のベンチマーク
+
+合計金額の分布に近い対数正規分布の値について、
+1. 全値をソートして求めた正確な分位点（np.quantile）
+2. quantile_sketch.QuantileSketch（一度に作成した場合と、chunk_rows 行ずつ作成して結合した場合）
+を比較する。誤差は順位の誤差（推定値以下の値の割合と目標の確率の差の最大値）で、
+--tolerance を超えると終了コード 1 を返す。exact_max_values 以下の件数では誤差が 0 になる。
+
+使い方（リポジトリのルートで実行）:
+    python benchmarks/quantile_sketch.py [--rows 1000,100000,1000000,10000000] [--chunk-rows 200000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from utils import quantile_sketch  # noqa: E402
+
+PROBABILITIES = np.array([0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99])
+
+
+def sample_values(rows):
+    rng = np.random.default_rng(0)
+    return rng.lognormal(mean=5.5, sigma=0.8, size=rows)
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def rank_error(sorted_values, estimates):
+    """推定値の順位（その値以下の割合）と目標の確率の差の最大値"""
+    lower = np.searchsorted(sorted_values, estimates, side="left") / len(sorted_values)
+    upper = np.searchsorted(sorted_values, estimates, side="right") / len(sorted_values)
+    # 同じ値が並ぶ場合は、その値の順位の範囲内なら誤差 0 とみなす
+    return np.max(np.maximum(0, np.maximum(lower - PROBABILITIES, PROBABILITIES - upper)))
+
+
+def sketch_in_chunks(values, chunk_rows):
+    sketch = None
+    for start in range(0, len(values), chunk_rows):
+        chunk = quantile_sketch.QuantileSketch.from_values(values[start:start + chunk_rows])
+        sketch = chunk if sketch is None else sketch.merge(chunk)
+    return sketch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="1000,100000,1000000,10000000", help="データ件数（カンマ区切り）")
+    parser.add_argument("--chunk-rows", type=int, default=200_000, help="結合する場合の1チャンクの件数")
+    parser.add_argument("--tolerance", type=float, default=0.005, help="許容する順位の誤差")
+    args = parser.parse_args()
+
+    failed = False
+    print(
+        f"{'rows':>12} {'sort[s]':>9} {'sketch[s]':>10} {'merged[s]':>10} {'retained':>9}"
+        f" {'rank err':>9} {'merged err':>11}"
+    )
+    for rows in [int(rows) for rows in args.rows.split(",")]:
+        values = sample_values(rows)
+        sorted_values, sort_seconds = timed(lambda: np.sort(values))
+        np.quantile(sorted_values, PROBABILITIES)
+
+        sketch, sketch_seconds = timed(lambda: quantile_sketch.QuantileSketch.from_values(values))
+        merged, merged_seconds = timed(lambda: sketch_in_chunks(values, args.chunk_rows))
+        error = rank_error(sorted_values, sketch.quantiles(PROBABILITIES))
+        merged_error = rank_error(sorted_values, merged.quantiles(PROBABILITIES))
+        exceeded = max(error, merged_error) > args.tolerance
+        failed |= exceeded
+        print(
+            f"{rows:>12,} {sort_seconds:>9.4f} {sketch_seconds:>10.4f} {merged_seconds:>10.4f}"
+            f" {max(sketch.retained, merged.retained):>9,} {error:>9.2e} {merged_error:>11.2e}"
+            + ("  許容誤差超過" if exceeded else "")
+        )
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""取引のセグメント分け（ミニバッチ k-means）の学習時間のベンチマーク
+
+同梱のスーパーマーケットデータを scale 倍にしたデータについて、segmentation.segment_chunks
+（チャンクごとのミニバッチ学習 + 集計）の時間と、tracemalloc で計測したピーク確保量
+（元の DataFrame 自体は除く）を行数ごとに表示する。ピーク確保量はチャンクの大きさで決まり、
+行数によらずほぼ一定になる。あわせて、保存した学習結果を読み込む（キャッシュを使う）時間も表示する。
+
+使い方（リポジトリのルートで実行）:
+    python benchmarks/segmentation.py [--scales 1,100,1000,10000] [--clusters 4] [--chunk-rows 200000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.synthetic import scale_supermarket  # noqa: E402
+from utils import dataset_stats, segmentation  # noqa: E402
+
+
+def measure(func):
+    """実行時間と、別に実行して tracemalloc で計測したピーク確保量（計測のオーバーヘッドを時間に含めない）"""
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="1,100,1000,10000", help="データの拡大倍率（カンマ区切り）")
+    parser.add_argument("--clusters", type=int, default=segmentation.DEFAULT_CLUSTERS, help="セグメント数")
+    parser.add_argument("--chunk-rows", type=int, default=segmentation.DEFAULT_CHUNK_ROWS, help="1チャンクの行数")
+    args = parser.parse_args()
+
+    # sklearn の読み込みを計測に含めない
+    segmentation.cluster.MiniBatchKMeans
+
+    print(f"{'rows':>12} {'fit[s]':>8} {'rows/s':>12} {'peak[MB]':>9} {'load[ms]':>9}")
+    for scale in [int(scale) for scale in args.scales.split(",")]:
+        df = scale_supermarket(scale)
+        statistics = dataset_stats.get_statistics(df)
+        categories = segmentation.frame_categories(df)
+
+        def fit():
+            return segmentation.segment_chunks(
+                lambda: segmentation.iter_frame_chunks(df, args.chunk_rows), statistics, categories, args.clusters
+            )
+
+        result, fit_seconds, peak = measure(fit)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_path = os.path.join(tmp_dir, f"segments{segmentation.SEGMENT_CACHE_EXTENSION}")
+            result.save(cache_path)
+            start = time.perf_counter()
+            segmentation.Segmentation.load(cache_path)
+            load_seconds = time.perf_counter() - start
+
+        print(
+            f"{len(df):>12,} {fit_seconds:>8.2f} {len(df) / fit_seconds:>12,.0f}"
+            f" {peak:>9.1f} {load_seconds * 1000:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
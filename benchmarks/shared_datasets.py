@@ -0,0 +1,116 @@
+"""セッションあたりのデータセットのメモリ使用量のベンチマーク
+
+st.cache_data（呼び出しごとに pickle から復元したコピーを返す）と
+shared_store.shared_dataset（プロセスで一つのオブジェクトを共有）で、
+同時接続セッション数を増やしたときのプロセスの常駐メモリ（RSS）を比較する。
+
+方式ごとに独立したプロセスで、AppTest のセッションを1つずつ開く。各セッションはスーパーマーケットデータを
+scale 倍に複製したデータセットを読み込み、session_state に保持する（ページの実行中にセッションが
+データセットを参照している状態）。開いたセッションはすべて保持したまま、各セッションを開いた後の
+RSS を記録し、2つ目以降のセッション1つあたりの増加量を求める。
+
+使い方（リポジトリのルートで実行）:
+    python benchmarks/shared_datasets.py [--sessions 20] [--scale 100]
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.path.join(REPO_ROOT, "data", "input", "supermarket_analysis.csv")
+MODES = ["cache_data", "shared_dataset"]
+
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault("CACHE_WARMUP", "0")
+
+SESSION_SCRIPT = """
+import pandas as pd
+import streamlit as st
+from utils import shared_store
+
+
+def load_scaled_data():
+    df = pd.read_csv({data_path!r}, encoding="utf-8-sig")
+    return pd.concat([df] * {scale}, ignore_index=True)
+
+
+if {mode!r} == "cache_data":
+    load = st.cache_data(show_spinner=False)(load_scaled_data)
+else:
+    load = shared_store.shared_dataset(load_scaled_data)
+
+st.session_state["df"] = load()
+st.write(len(st.session_state["df"]))
+"""
+
+
+def _current_rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+def run_sessions_in_process(mode, sessions, scale):
+    """sessions 個のセッションを開き、各セッションを開いた後の RSS[MB] と実行時間を返す"""
+    from streamlit.testing.v1 import AppTest
+
+    script = SESSION_SCRIPT.format(data_path=DATA_PATH, scale=scale, mode=mode)
+    held = []
+    rss = [_current_rss_mb()]
+    seconds = []
+    for _ in range(sessions):
+        start = time.perf_counter()
+        at = AppTest.from_string(script, default_timeout=300).run()
+        seconds.append(time.perf_counter() - start)
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        held.append(at)
+        gc.collect()
+        rss.append(_current_rss_mb())
+    return {"mode": mode, "rss_mb": rss, "seconds": seconds}
+
+
+def run_sessions(mode, sessions, scale):
+    """方式ごとに独立したプロセスで計測（他の方式のキャッシュやメモリの影響を受けないようにする）"""
+    result = subprocess.run(
+        [sys.executable, __file__, "--worker", mode, "--sessions", str(sessions), "--scale", str(scale)],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20, help="同時セッション数")
+    parser.add_argument("--scale", type=int, default=100, help="データの複製倍率")
+    parser.add_argument("--worker", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_sessions_in_process(args.worker, args.sessions, args.scale)))
+        return
+
+    import pandas as pd
+
+    df = pd.concat([pd.read_csv(DATA_PATH, encoding="utf-8-sig")] * args.scale, ignore_index=True)
+    print(f"データ: {len(df):,}行, {df.memory_usage(deep=True).sum() / 1024 / 1024:.1f}MB, セッション数: {args.sessions}")
+    del df
+
+    print(f"{'方式':<16} {'1セッションRSS':>14} {'全セッションRSS':>15} {'MB/追加セッション':>17} {'2つ目以降の実行':>15}")
+    for mode in MODES:
+        result = run_sessions(mode, args.sessions, args.scale)
+        rss = result["rss_mb"]
+        per_session = (rss[-1] - rss[1]) / max(args.sessions - 1, 1)
+        later_seconds = sum(result["seconds"][1:]) / max(args.sessions - 1, 1)
+        print(f"{mode:<16} {rss[1]:>12.1f}MB {rss[-1]:>13.1f}MB {per_session:>17.2f} {later_seconds:>14.3f}s")
+
+
+if __name__ == "__main__":
+    main()
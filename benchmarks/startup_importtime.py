@@ -0,0 +1,133 @@
+"""起動時間（インポート時間）のベンチマーク
+
+`python -X importtime` で main.py と各ページモジュールを新しいプロセスで読み込み、
+トップレベルパッケージごとの累積インポート時間を集計する。
+benchmarks/baselines/startup_importtime.json の予算（budget_ms）を超えた場合は
+終了コード 1 を返すため、コールドスタートの劣化を CI で検知できる。
+
+使い方（リポジトリのルートで実行）:
+    python benchmarks/startup_importtime.py
+    python benchmarks/startup_importtime.py --update-baseline
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(REPO_ROOT, "benchmarks", "baselines", "startup_importtime.json")
+
+# 計測対象（名前, 実行コード）
+TARGETS = [
+    ("main", "import main"),
+    ("analytics_page", "from utils import page_registry; page_registry.get_page_module('pages/1_analytics.py', 'analytics_page')"),
+    ("demand_forecast_page", "from utils import page_registry; page_registry.get_page_module('pages/2_demand_forecast.py', 'demand_forecast_page')"),
+    ("recommendation_page", "from utils import page_registry; page_registry.get_page_module('pages/3_recommendation.py', 'recommendation_page')"),
+    ("ai_chatbot_page", "from utils import page_registry; page_registry.get_page_module('pages/4_ai_chatbot.py', 'ai_chatbot_page')"),
+]
+
+# 予算は計測値にこの余裕率を掛けて設定する
+BUDGET_HEADROOM = 1.5
+
+
+def parse_importtime(stderr):
+    """-X importtime の出力をトップレベルパッケージごとの累積時間（ミリ秒）に集計"""
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        # 先頭の空白が1つだけの行がトップレベルのインポート（ネストしたものは字下げされる）
+        if name.startswith(" ") and not name.startswith("  "):
+            package = name.strip().split(".")[0]
+            packages[package] = packages.get(package, 0.0) + int(cumulative_us) / 1000
+    return packages
+
+
+def measure_target(code, repeat):
+    """対象コードを新しいプロセスで実行してインポート時間を計測"""
+    totals = []
+    packages = {}
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        run_packages = parse_importtime(result.stderr)
+        totals.append(sum(run_packages.values()))
+        for package, ms in run_packages.items():
+            packages.setdefault(package, []).append(ms)
+
+    return {
+        "total_ms": statistics.median(totals),
+        "packages_ms": {package: statistics.median(values) for package, values in packages.items()},
+    }
+
+
+def load_baseline():
+    """ベースライン（予算）を読み込み"""
+    if not os.path.exists(BASELINE_PATH):
+        return {}
+    with open(BASELINE_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="各対象の計測回数（中央値を採用）")
+    parser.add_argument("--top", type=int, default=8, help="表示する上位パッケージ数")
+    parser.add_argument("--update-baseline", action="store_true", help="計測結果でベースラインを更新")
+    args = parser.parse_args()
+
+    baseline = load_baseline()
+    results = {}
+    over_budget = []
+
+    for name, code in TARGETS:
+        result = measure_target(code, args.repeat)
+        results[name] = result
+        budget = baseline.get(name, {}).get("budget_ms")
+
+        status = ""
+        if budget is not None:
+            status = "OK" if result["total_ms"] <= budget else "OVER BUDGET"
+            if result["total_ms"] > budget:
+                over_budget.append(name)
+        budget_text = f"{budget:.0f}ms" if budget is not None else "-"
+        print(f"{name:<24} {result['total_ms']:>9.1f}ms  (budget {budget_text}) {status}")
+
+        top_packages = sorted(result["packages_ms"].items(), key=lambda item: item[1], reverse=True)[:args.top]
+        for package, ms in top_packages:
+            print(f"    {package:<20} {ms:>9.1f}ms")
+
+    if args.update_baseline:
+        new_baseline = {
+            name: {
+                "measured_ms": round(result["total_ms"], 1),
+                "budget_ms": round(result["total_ms"] * BUDGET_HEADROOM, 1),
+                "packages_ms": {
+                    package: round(ms, 1)
+                    for package, ms in sorted(result["packages_ms"].items(), key=lambda item: item[1], reverse=True)[:args.top]
+                },
+            }
+            for name, result in results.items()
+        }
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(new_baseline, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"ベースラインを更新しました: {BASELINE_PATH}")
+        return 0
+
+    if over_budget:
+        print(f"起動時間の予算を超過しました: {', '.join(over_budget)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
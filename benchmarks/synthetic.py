@@ -0,0 +1,94 @@
+"""ベンチマーク用の合成データ
+
+同梱の CSV を scale 倍に拡大したデータを作る。値の分布が元データと大きく
+変わらないよう、数値列には小さなノイズを加えて重複行ばかりにならないようにする。
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from utils import page_registry  # noqa: E402
+
+ANALYTICS_PAGE = ("pages/1_analytics.py", "analytics_page")
+DEMAND_FORECAST_PAGE = ("pages/2_demand_forecast.py", "demand_forecast_page")
+RECOMMENDATION_PAGE = ("pages/3_recommendation.py", "recommendation_page")
+AI_CHATBOT_PAGE = ("pages/4_ai_chatbot.py", "ai_chatbot_page")
+
+
+def get_page(page):
+    """ページモジュールを取得（リポジトリのルートを基準に読み込む）"""
+    os.chdir(REPO_ROOT)
+    return page_registry.get_page_module(*page)
+
+
+def scale_supermarket(scale, seed=0):
+    """スーパーマーケットデータを scale 倍に拡大"""
+    analytics = get_page(ANALYTICS_PAGE)
+    df, _ = analytics.load_supermarket_data()
+    if scale == 1:
+        return df.copy()
+
+    rng = np.random.default_rng(seed)
+    scaled = pd.concat([df] * scale, ignore_index=True)
+    for column in ['単価', '合計金額']:
+        noise = rng.normal(1.0, 0.01, len(scaled))
+        scaled[column] = (scaled[column].to_numpy() * noise).astype(scaled[column].dtype)
+    return scaled
+
+
+def scale_demand_series(scale):
+    """1商品の販売個数の時系列を scale 倍の長さに延長（値を繰り返し、日付は連続）"""
+    demand = get_page(DEMAND_FORECAST_PAGE)
+    df, _ = demand.load_demand_data()
+    df_filtered = demand.filter_store_data(df)
+    item = sorted(df_filtered['商品'].unique())[0]
+    df_item = demand.filter_item_data(df_filtered, item)
+
+    values = np.tile(df_item['販売個数'].to_numpy(), scale)
+    dates = pd.date_range(df_item['日付'].min(), periods=len(values), freq='D')
+    return pd.DataFrame({
+        '日付': dates,
+        '店舗': df_item['店舗'].iloc[0],
+        '商品': item,
+        '販売個数': values,
+    }), item
+
+
+def scale_demand_stores(stores, seed=0):
+    """需要予測データの店舗を stores 店舗に増やす（販売個数に小さなノイズを加える）"""
+    demand = get_page(DEMAND_FORECAST_PAGE)
+    df, _ = demand.load_demand_data()
+    rng = np.random.default_rng(seed)
+    copies = []
+    for store in range(1, stores + 1):
+        copy = df.copy()
+        copy['店舗'] = store
+        if store > 1:
+            noise = rng.normal(1.0, 0.05, len(copy))
+            copy['販売個数'] = np.maximum(np.round(copy['販売個数'].to_numpy() * noise), 0).astype(copy['販売個数'].dtype)
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def scale_books(scale):
+    """書籍データを scale 倍に拡大（book_id とタイトルを付け替える）"""
+    recommendation = get_page(RECOMMENDATION_PAGE)
+    df, _ = recommendation.load_books_data()
+    if scale == 1:
+        return df.copy()
+
+    copies = []
+    max_id = int(df['book_id'].max())
+    for i in range(scale):
+        copy = df.copy()
+        copy['book_id'] = copy['book_id'].astype(np.int64) + i * (max_id + 1)
+        if i > 0:
+            copy['title'] = copy['title'].astype(object) + f" (vol. {i + 1})"
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
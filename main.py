@@ -1,7 +1,24 @@
 import streamlit as st
 import streamlit_constants as st_const
-import importlib.util
-import sys
+import os
+from utils import cache_warmup, instrumentation, page_registry
+
+# ページ定義（表示名, ファイルパス, モジュール名, 読み込み失敗時のメッセージ）
+PAGES = [
+    ("🏠 TOP", None, None, None),
+    ("📊 データ分析", "pages/1_analytics.py", "analytics_page", "データ分析ページの読み込みに失敗しました。"),
+    ("📈 需要予測", "pages/2_demand_forecast.py", "demand_forecast_page", "需要予測ページの読み込みに失敗しました。"),
+    ("📚 レコメンド", "pages/3_recommendation.py", "recommendation_page", "レコメンドページの読み込みに失敗しました。"),
+    ("🤖 AIチャットボット", "pages/4_ai_chatbot.py", "ai_chatbot_page", "AIチャットボットページの読み込みに失敗しました。"),
+]
+
+# ページ切り替え方式
+#   lazy: 選択中のページのみ読み込み・実行する（デフォルト）
+#   tabs: 従来通り全ページを st.tabs で毎回実行する
+PAGE_ROUTING_MODE = os.getenv("PAGE_ROUTING_MODE", "lazy")
+
+# キャッシュのウォームアップ（CACHE_WARMUP=0 で無効化）
+CACHE_WARMUP_ENABLED = os.getenv("CACHE_WARMUP", "1") != "0"
 
 def apply_page_style():
     """ページスタイルとロゴを設定"""
@@ -18,18 +35,50 @@ def apply_page_style():
 
 
 def load_page_module(page_path, module_name):
-    """ページモジュールを動的に読み込み"""
+    """ページモジュールを読み込み（プロセス内で一度だけ、更新時のみ再読み込み）"""
     try:
-        spec = importlib.util.spec_from_file_location(module_name, page_path)
-        module = importlib.util.module_from_spec(spec)
-        sys.modules[module_name] = module
-        spec.loader.exec_module(module)
-        return module
+        return page_registry.get_page_module(page_path, module_name)
     except Exception as e:
         st.error(f"ページ読み込みエラー ({page_path}): {str(e)}")
         return None
 
 
+def render_page(page):
+    """ページを読み込んで表示"""
+    _, page_path, module_name, error_message = page
+    if page_path is None:
+        show_top_page()
+        return
+
+    page_module = load_page_module(page_path, module_name)
+    if page_module and hasattr(page_module, 'main'):
+        with instrumentation.timer(f"{module_name}.main"):
+            page_module.main()
+    else:
+        st.error(error_message)
+
+
+def render_lazy_navigation():
+    """選択中のページのみを読み込んで表示"""
+    labels = [page[0] for page in PAGES]
+    selected_label = st.radio(
+        "ページ選択",
+        labels,
+        horizontal=True,
+        key="active_page",
+        label_visibility="collapsed"
+    )
+    render_page(PAGES[labels.index(selected_label)])
+
+
+def render_tab_navigation():
+    """全ページをタブで表示（各タブの内容は毎回実行される）"""
+    tabs = st.tabs([page[0] for page in PAGES])
+    for tab, page in zip(tabs, PAGES):
+        with tab:
+            render_page(page)
+
+
 def show_top_page():
     """TOPページの内容を表示"""
     # イントロダクション
@@ -148,54 +197,24 @@ def show_top_page():
 def main():
     """メイン関数"""
     apply_page_style()
+    instrumentation.configure_for_run()
+
+    # サーバープロセスで初回のみバックグラウンドでキャッシュを準備
+    # （serve.py から起動した場合は起動時点で開始済み）
+    if CACHE_WARMUP_ENABLED:
+        cache_warmup.start_readiness_server()
+        cache_warmup.start_warmup()
 
     st.markdown('<h1 class="main-header">🎓 Craft College デモアプリへようこそ</h1>', unsafe_allow_html=True)
     st.markdown('<p class="page-description">AI・データサイエンスの世界を体験してみましょう</p>', unsafe_allow_html=True)
     
-    # タブの設定
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([
-        "🏠 TOP", 
-        "📊 データ分析", 
-        "📈 需要予測", 
-        "📚 レコメンド", 
-        "🤖 AIチャットボット"
-    ])
-    
-    # 各タブの内容
-    with tab1:
-        show_top_page()
-    
-    with tab2:
-        # データ分析ページを動的に読み込み
-        analytics_module = load_page_module("pages/1_analytics.py", "analytics_page")
-        if analytics_module and hasattr(analytics_module, 'main'):
-            analytics_module.main()
-        else:
-            st.error("データ分析ページの読み込みに失敗しました。")
-    
-    with tab3:
-        # 需要予測ページを動的に読み込み
-        demand_forecast_module = load_page_module("pages/2_demand_forecast.py", "demand_forecast_page")
-        if demand_forecast_module and hasattr(demand_forecast_module, 'main'):
-            demand_forecast_module.main()
-        else:
-            st.error("需要予測ページの読み込みに失敗しました。")
-    
-    with tab4:
-        # レコメンドページを動的に読み込み
-        recommendation_module = load_page_module("pages/3_recommendation.py", "recommendation_page")
-        if recommendation_module and hasattr(recommendation_module, 'main'):
-            recommendation_module.main()
-        else:
-            st.error("レコメンドページの読み込みに失敗しました。")
-    
-    with tab5:
-        # AIチャットボットページを動的に読み込み
-        ai_chatbot_module = load_page_module("pages/4_ai_chatbot.py", "ai_chatbot_page")
-        if ai_chatbot_module and hasattr(ai_chatbot_module, 'main'):
-            ai_chatbot_module.main()
-        else:
-            st.error("AIチャットボットページの読み込みに失敗しました。")
+    if PAGE_ROUTING_MODE == "tabs":
+        render_tab_navigation()
+    else:
+        render_lazy_navigation()
+
+    # 診断パネル（APP_DIAGNOSTICS=1 または ?diagnostics=1 の場合のみ表示）
+    instrumentation.render_diagnostics_panel()
 
 
 if __name__ == "__main__":
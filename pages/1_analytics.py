@@ -1,36 +1,168 @@
 import streamlit as st
-import matplotlib.pyplot as plt
-import plotly.express as px
-import plotly.graph_objects as go
 import numpy as np
 import pandas as pd
+import os
+from utils import aggregation, binned_kde, chunked_ingest, dataset_cache, dataset_schema, dataset_stats, figure_cache, instrumentation, olap_cube, parallel_sections, segmentation, shared_store
+from utils.lazy_imports import lazy_import
 
-# 日本語フォント設定
-plt.rcParams['font.family'] = ['DejaVu Sans', 'Arial Unicode MS', 'Hiragino Sans', 'Yu Gothic', 'Meiryo', 'sans-serif']
-plt.rcParams['axes.unicode_minus'] = False
 
+# 重いライブラリは初回使用時に読み込む
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
 
-@st.cache_data
+# 散布図をこの件数以上で2次元ビンの密度表示に切り替える
+SCATTER_DENSITY_MIN_ROWS = 50_000
+SCATTER_DENSITY_BINS = 100
+
+
+def read_supermarket_csv(data_path):
+    """スーパーマーケットデータのCSVを読み込み（BOM付きUTF-8）"""
+    return pd.read_csv(data_path, encoding='utf-8-sig')
+
+
+@shared_store.shared_dataset
 def load_supermarket_data():
-    """スーパーマーケットデータを読み込み"""
+    """スーパーマーケットデータを読み込み（列指向キャッシュ経由）"""
     try:
         data_path = "data/input/supermarket_analysis.csv"
-        df = pd.read_csv(data_path)
+        df = dataset_cache.load_dataset(data_path, read_supermarket_csv, dataset_schema.SUPERMARKET_SCHEMA)
         return df, None
     except Exception as e:
         st.error(f"データ読み込みエラー: {str(e)}")
         return None, str(e)
 
 
+@shared_store.shared_dataset(max_entries=4)
+def open_uploaded_data(cache_path):
+    """取り込み済みのアップロードデータをメモリマップで読み込み（プロセス内で共有）"""
+    return chunked_ingest.read_ingested(cache_path, dataset_schema.SUPERMARKET_SCHEMA['categorical'])
+
+
+def show_ingest_progress(progress_bar, preview, total_column):
+    """取り込みの進捗と、途中までのデータの分布を表示するコールバックを作成"""
+    def on_progress(fraction, rows, histograms):
+        progress_bar.progress(fraction, text=f"取り込み中... {rows:,}行 ({fraction:.0%})")
+        histogram = histograms.get(total_column)
+        if histogram is not None:
+            counts, edges = histogram.histogram(bins=30)
+            if len(counts):
+                fig = px.bar(
+                    x=aggregation.bin_centers(edges),
+                    y=counts,
+                    title=f'{total_column}の分布（取り込み途中: {rows:,}行）',
+                    color_discrete_sequence=['#1f77b4']
+                )
+                fig.update_traces(width=np.diff(edges))
+                fig.update_layout(xaxis_title=total_column, yaxis_title='頻度', height=300)
+                preview.plotly_chart(fig, use_container_width=True)
+    return on_progress
+
+
+@instrumentation.timed
+def ingest_uploaded_file(uploaded_file):
+    """アップロードされた CSV をチャンクごとに取り込み（取り込み済みなら省く）、取り込んだデータの情報を返す
+
+    Returns:
+        dict: name（ファイル名）, cache_path（取り込んだ Arrow ファイル）, checksum（ファイルの内容のチェックサム）
+    """
+    checksum = chunked_ingest.upload_checksum(uploaded_file)
+    cache_path = chunked_ingest.get_upload_cache_path(checksum)
+    statistics = None
+    if not os.path.exists(cache_path):
+        progress_bar = st.progress(0.0, text="取り込み中...")
+        preview = st.empty()
+        result = chunked_ingest.ingest_csv(
+            uploaded_file,
+            cache_path,
+            dataset_schema.SUPERMARKET_SCHEMA,
+            histogram_columns=['合計金額'],
+            on_progress=show_ingest_progress(progress_bar, preview, '合計金額'),
+        )
+        progress_bar.empty()
+        preview.empty()
+        statistics = result['statistics']
+
+    df = open_uploaded_data(cache_path)
+    if statistics is not None:
+        # 取り込み中に集計した統計量を使い、全体を再走査しない
+        dataset_stats.register_statistics(df, statistics)
+    return {'name': uploaded_file.name, 'cache_path': cache_path, 'checksum': checksum}
+
+
+def load_ingested_data(upload):
+    """取り込み済みのアップロードデータを読み込み"""
+    try:
+        df = open_uploaded_data(upload['cache_path'])
+        # グラフのキャッシュのキーには、内容をハッシュし直さずファイルのチェックサムを使う
+        figure_cache.register_checksum(df, upload['checksum'])
+        return df, None
+    except Exception as e:
+        st.error(f"アップロードされたデータの読み込みエラー: {str(e)}")
+        return None, str(e)
+
+
+def release_uploaded_file(uploaded_file):
+    """取り込み済みのファイルのバイト列を Streamlit のアップロード管理から削除（削除できない環境では何もしない）"""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    remove_file = getattr(getattr(ctx, 'uploaded_file_mgr', None), 'remove_file', None)
+    if remove_file is not None:
+        remove_file(session_id=ctx.session_id, file_id=uploaded_file.file_id)
+
+
+def select_data_source():
+    """アップロードされた CSV（なければサンプルデータ）を読み込み
+
+    取り込みが終わったらアップロードされたファイルのバイト列を破棄し、ファイルアップローダーを作り直す
+    （以降は取り込んだ Arrow ファイルをメモリマップで使い、元のバイト列は保持しない）。
+    """
+    generation = st.session_state.setdefault('upload_generation', 0)
+    uploaded_file = st.file_uploader(
+        "分析する売上データ（CSV）",
+        type="csv",
+        help="アップロードしない場合はサンプルのスーパーマーケット売上データを使用します",
+        key=f"uploaded_csv_{generation}",
+    )
+    if uploaded_file is not None:
+        try:
+            st.session_state['upload'] = ingest_uploaded_file(uploaded_file)
+        except Exception as e:
+            st.error(f"アップロードされたデータの読み込みエラー: {str(e)}")
+            return None, str(e)
+        release_uploaded_file(uploaded_file)
+        st.session_state['upload_generation'] = generation + 1
+        st.rerun()
+
+    upload = st.session_state.get('upload')
+    if upload is None:
+        return load_supermarket_data()
+    if not os.path.exists(upload['cache_path']):
+        # 他のセッションのアップロードで古い取り込み結果が削除された場合
+        del st.session_state['upload']
+        st.warning(f"{upload['name']} の取り込み結果が削除されたため、再度アップロードしてください。")
+        return load_supermarket_data()
+
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        st.caption(f"分析中のデータ: {upload['name']}")
+    with col2:
+        if st.button("サンプルデータに戻す"):
+            del st.session_state['upload']
+            st.rerun()
+    return load_ingested_data(upload)
+
+
 def create_histogram(df, column):
-    """ヒストグラムを作成"""
-    fig = px.histogram(
-        df, 
-        x=column, 
+    """ヒストグラムを作成（度数はサーバー側で集計）"""
+    counts, edges = aggregation.histogram_counts(df[column], bins=30)
+    fig = px.bar(
+        x=aggregation.bin_centers(edges),
+        y=counts,
         title=f'{column}のヒストグラム',
-        nbins=30,
         color_discrete_sequence=['#1f77b4']
     )
+    fig.update_traces(width=np.diff(edges))
     fig.update_layout(
         xaxis_title=column,
         yaxis_title='頻度',
@@ -39,12 +171,13 @@ def create_histogram(df, column):
     return fig
 
 
+@instrumentation.timed
 def create_bar_chart(df, column):
-    """棒グラフを作成"""
-    if df[column].dtype == 'object':
-        value_counts = df[column].value_counts()
+    """棒グラフを作成（件数はサーバー側で集計）"""
+    if not pd.api.types.is_numeric_dtype(df[column]):
+        value_counts = aggregation.category_counts(df[column])
         fig = px.bar(
-            x=value_counts.index,
+            x=value_counts.index.astype(str),
             y=value_counts.values,
             title=f'{column}の分布',
             color_discrete_sequence=['#1f77b4']
@@ -56,11 +189,10 @@ def create_bar_chart(df, column):
         )
     else:
         # 数値データの場合はビン分割
-        bins = pd.cut(df[column], bins=10)
-        value_counts = bins.value_counts().sort_index()
+        counts, edges = aggregation.histogram_counts(df[column], bins=10)
         fig = px.bar(
-            x=[str(interval) for interval in value_counts.index],
-            y=value_counts.values,
+            x=aggregation.bin_labels(edges),
+            y=counts,
             title=f'{column}の分布（ビン分割）',
             color_discrete_sequence=['#1f77b4']
         )
@@ -112,14 +244,21 @@ def create_correlation_heatmap(df):
     return fig
 
 
+@instrumentation.timed
 def create_rich_histogram(df, column):
     """カーネル密度を含むリッチなヒストグラムを作成"""
+    # ヒストグラムの度数とカーネル密度を1回の走査で計算（ビン分割＋FFT）
+    data = df[column].dropna()
+    result = binned_kde.histogram_with_kde(data.to_numpy(dtype=np.float64), bins=30, grid_points=200)
+    edges = result['edges']
+
     fig = go.Figure()
     
-    # ヒストグラム
-    fig.add_trace(go.Histogram(
-        x=df[column].dropna(),
-        nbinsx=30,
+    # ヒストグラム（度数はサーバー側で集計済み）
+    fig.add_trace(go.Bar(
+        x=aggregation.bin_centers(edges),
+        y=result['counts'],
+        width=np.diff(edges),
         name='度数分布',
         opacity=0.7,
         marker_color='lightblue',
@@ -127,12 +266,9 @@ def create_rich_histogram(df, column):
     ))
     
     # カーネル密度推定
-    from scipy.stats import gaussian_kde
-    data = df[column].dropna()
-    if len(data) > 1:
-        kde = gaussian_kde(data)
-        x_range = np.linspace(data.min(), data.max(), 200)
-        kde_values = kde(x_range)
+    if result['density'] is not None:
+        x_range = result['x']
+        kde_values = result['density']
         
         # 密度をヒストグラムのスケールに合わせる
         hist_max = len(data) / 30  # 大体のヒストグラムの最大値
@@ -159,39 +295,63 @@ def create_rich_histogram(df, column):
     return fig
 
 
-def create_scatter_with_regression(df, x_col, y_col):
-    """回帰直線付きの散布図を作成"""
-    # 欠損値を除去
+@instrumentation.timed
+def create_scatter_with_regression(df, x_col, y_col, density_min_rows=None):
+    """回帰直線付きの散布図を作成（大規模データでは2次元ビンの密度表示に切り替える）"""
+    # 欠損値・±inf を除去
     clean_df = df[[x_col, y_col]].dropna()
+    clean_df = clean_df[np.isfinite(clean_df.to_numpy(dtype=np.float64)).all(axis=1)]
     
     if len(clean_df) < 2:
         return None
     
-    fig = px.scatter(
-        clean_df,
-        x=x_col,
-        y=y_col,
-        title=f'{x_col} vs {y_col}の関係（回帰直線付き）',
-        opacity=0.6,
-        color_discrete_sequence=['#1f77b4']
-    )
+    if density_min_rows is None:
+        density_min_rows = SCATTER_DENSITY_MIN_ROWS
+    x = clean_df[x_col].to_numpy(dtype=np.float64)
+    y = clean_df[y_col].to_numpy(dtype=np.float64)
+    title = f'{x_col} vs {y_col}の関係（回帰直線付き）'
     
-    # 回帰直線を追加
-    from sklearn.linear_model import LinearRegression
-    X = clean_df[x_col].values.reshape(-1, 1)
-    y = clean_df[y_col].values
-    
-    reg = LinearRegression().fit(X, y)
-    x_range = np.linspace(clean_df[x_col].min(), clean_df[x_col].max(), 100)
-    y_pred = reg.predict(x_range.reshape(-1, 1))
+    if len(clean_df) < density_min_rows:
+        fig = px.scatter(
+            clean_df,
+            x=x_col,
+            y=y_col,
+            title=title,
+            opacity=0.6,
+            color_discrete_sequence=['#1f77b4']
+        )
+    else:
+        # 全点を送らず、2次元ビンの件数をヒートマップで表示
+        counts, x_edges, y_edges = aggregation.histogram2d_counts(x, y, bins=SCATTER_DENSITY_BINS)
+        fig = go.Figure(go.Heatmap(
+            x=aggregation.bin_centers(x_edges),
+            y=aggregation.bin_centers(y_edges),
+            z=np.where(counts > 0, counts, np.nan),
+            colorscale='Blues',
+            colorbar=dict(title='件数'),
+            hovertemplate=f'{x_col}: %{{x:.2f}}<br>{y_col}: %{{y:.2f}}<br>件数: %{{z}}<extra></extra>',
+            name='件数'
+        ))
+        fig.update_layout(
+            title=f'{x_col} vs {y_col}の関係（{len(clean_df):,}件の密度表示、回帰直線付き）',
+            xaxis_title=x_col,
+            yaxis_title=y_col
+        )
     
-    fig.add_trace(go.Scatter(
-        x=x_range,
-        y=y_pred,
-        mode='lines',
-        name=f'回帰直線 (R²={reg.score(X, y):.3f})',
-        line=dict(color='red', width=3, dash='dash')
-    ))
+    # 回帰直線を追加（十分統計量から1回の走査で計算）
+    fit = aggregation.linear_fit(aggregation.regression_sums(x, y))
+    if fit is not None:
+        slope, intercept, r_squared = fit
+        x_range = np.linspace(x.min(), x.max(), 100)
+        y_pred = slope * x_range + intercept
+        
+        fig.add_trace(go.Scatter(
+            x=x_range,
+            y=y_pred,
+            mode='lines',
+            name=f'回帰直線 (R²={r_squared:.3f})',
+            line=dict(color='red', width=3, dash='dash')
+        ))
     
     fig.update_layout(
         height=500,
@@ -202,26 +362,21 @@ def create_scatter_with_regression(df, x_col, y_col):
     return fig
 
 
+@instrumentation.timed
 def create_beautiful_correlation_heatmap(df):
     """美しい相関ヒートマップを作成（Plotly使用）"""
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
-    if len(numeric_cols) < 2:
+    # 数値列の統計量（データセットごとに一度だけ計算し、基本統計量などと共有）
+    stats = dataset_stats.get_statistics(df)
+    if len(stats.columns) < 2:
         return None
     
-    # 欠損値を除去してから相関行列を計算
-    clean_df = df[numeric_cols].dropna()
-    if len(clean_df) < 2:
+    # 全列がそろった行で相関行列を計算
+    corr_matrix = stats.correlation()
+    if corr_matrix is None:
         return None
     
-    corr_matrix = clean_df.corr()
-    
     # 相関係数の値をテキストとして表示するための配列を作成
-    text_values = []
-    for i in range(len(corr_matrix)):
-        row_text = []
-        for j in range(len(corr_matrix.columns)):
-            row_text.append(f'{corr_matrix.iloc[i, j]:.3f}')
-        text_values.append(row_text)
+    text_values = np.char.mod('%.3f', corr_matrix.values)
     
     # Plotlyでヒートマップを作成
     fig = go.Figure(data=go.Heatmap(
@@ -254,42 +409,76 @@ def create_beautiful_correlation_heatmap(df):
     return fig
 
 
+def build_analysis_sections(df, total_col, gender_col, price_col):
+    """各セクションの表示内容（図・統計量）を並列に作成（Streamlit の表示は行わない）"""
+    sections = {}
+    if total_col:
+        sections['total_distribution'] = lambda: (
+            figure_cache.cached_figure(create_rich_histogram, df, total_col),
+            dataset_stats.get_statistics(df).describe().loc[total_col],
+        )
+    if gender_col:
+        sections['gender_distribution'] = lambda: (
+            figure_cache.cached_figure(create_bar_chart, df, gender_col),
+            aggregation.category_counts(df[gender_col]),
+        )
+    if total_col and price_col:
+        def price_total_scatter():
+            fig = figure_cache.cached_figure(create_scatter_with_regression, df, price_col, total_col)
+            if fig is None:
+                return None, None
+            correlation = dataset_stats.get_statistics(df).pair_correlation(price_col, total_col)
+            if correlation is None:
+                # 他の数値列に欠損値がある場合は、2列がそろった行だけで計算する
+                correlation = df[price_col].corr(df[total_col])
+            return fig, correlation
+
+        sections['price_total_scatter'] = price_total_scatter
+    sections['correlation_heatmap'] = lambda: figure_cache.cached_figure(create_beautiful_correlation_heatmap, df)
+    return parallel_sections.run_sections(sections, prefix='display_fixed_analysis')
+
+
+@instrumentation.timed
 def display_fixed_analysis(df):
     """固定的な分析結果を表示"""
     st.subheader("📈 データ分析")
     
-    # 1. 合計金額のヒストグラム（カーネル密度付き）
     total_columns = [col for col in df.columns if 'total' in col.lower() or '合計' in col]
-    if total_columns:
+    gender_columns = [col for col in df.columns if 'gender' in col.lower() or '性別' in col]
+    price_columns = [col for col in df.columns if 'price' in col.lower() or '単価' in col or '価格' in col]
+    total_col = total_columns[0] if total_columns else None
+    gender_col = gender_columns[0] if gender_columns else None
+    price_col = price_columns[0] if price_columns else None
+    
+    # 各セクションの図・統計量は並列に作成し、表示は順に行う
+    sections = build_analysis_sections(df, total_col, gender_col, price_col)
+    
+    # 1. 合計金額のヒストグラム（カーネル密度付き）
+    if total_col:
         st.markdown("### 1. 💰 合計金額の分布")
-        total_col = total_columns[0]
-        fig = create_rich_histogram(df, total_col)
+        fig, col_stats = sections['total_distribution']
         st.plotly_chart(fig, use_container_width=True)
         
         # 統計サマリー
-        col_data = df[total_col].dropna()
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("平均", f"{col_data.mean():.2f}")
+            st.metric("平均", f"{col_stats['mean']:.2f}")
         with col2:
-            st.metric("中央値", f"{col_data.median():.2f}")
+            st.metric("中央値", f"{col_stats['50%']:.2f}")
         with col3:
-            st.metric("最大", f"{col_data.max():.2f}")
+            st.metric("最大", f"{col_stats['max']:.2f}")
         with col4:
-            st.metric("最小", f"{col_data.min():.2f}")
+            st.metric("最小", f"{col_stats['min']:.2f}")
         
         st.markdown("---")
     
     # 2. 性別の棒グラフ
-    gender_columns = [col for col in df.columns if 'gender' in col.lower() or '性別' in col]
-    if gender_columns:
+    if gender_col:
         st.markdown("### 2. 👥 性別分布")
-        gender_col = gender_columns[0]
-        fig = create_bar_chart(df, gender_col)
+        fig, value_counts = sections['gender_distribution']
         st.plotly_chart(fig, use_container_width=True)
         
         # カテゴリ分布
-        value_counts = df[gender_col].value_counts()
         col1, col2 = st.columns(2)
         with col1:
             st.metric("カテゴリ数", len(value_counts))
@@ -299,18 +488,13 @@ def display_fixed_analysis(df):
         st.markdown("---")
     
     # 3. 散布図（単価 vs 合計金額、回帰直線付き）
-    price_columns = [col for col in df.columns if 'price' in col.lower() or '単価' in col or '価格' in col]
-    if total_columns and price_columns:
+    if total_col and price_col:
         st.markdown("### 3. 💹 単価と合計金額の関係")
-        price_col = price_columns[0]
-        total_col = total_columns[0]
-        
-        fig = create_scatter_with_regression(df, price_col, total_col)
+        fig, corr = sections['price_total_scatter']
         if fig:
             st.plotly_chart(fig, use_container_width=True)
             
             # 相関係数
-            corr = df[price_col].corr(df[total_col])
             st.metric("相関係数", f"{corr:.3f}")
         else:
             st.warning("散布図を作成できませんでした。")
@@ -319,20 +503,107 @@ def display_fixed_analysis(df):
     
     # 4. 相関ヒートマップ
     st.markdown("### 4. 📊 相関ヒートマップ")
-    fig = create_beautiful_correlation_heatmap(df)
+    fig = sections['correlation_heatmap']
     if fig:
         st.plotly_chart(fig, use_container_width=True)
     else:
         st.info("相関ヒートマップを作成するには2つ以上の数値列が必要です。")
 
+    # 5. クロス集計（顧客タイプ・性別・支払方法・日付でのドリルダウン）
+    if olap_cube.supports(df):
+        st.markdown("---")
+        st.markdown("### 5. 🧊 クロス集計（ドリルダウン）")
+        render_drilldown_section(df)
+
+    # 6. 取引のセグメント分け（ミニバッチ k-means）
+    if segmentation.supports(df):
+        st.markdown("---")
+        st.markdown("### 6. 🧩 取引のセグメント")
+        render_segmentation_section(df)
+
+
+def create_drilldown_chart(result, measure_column, date_frequency):
+    """クロス集計の結果をグラフ化（日付軸があれば折れ線、なければ棒グラフ）"""
+    frame = result[[measure_column]].reset_index()
+    group_columns = [col for col in result.index.names if col not in (None, olap_cube.DATE_DIMENSION)]
+    color = None
+    if group_columns:
+        color = '・'.join(group_columns)
+        frame[color] = frame[group_columns].astype(str).agg('・'.join, axis=1)
+    if date_frequency is not None:
+        return px.line(frame, x=olap_cube.DATE_DIMENSION, y=measure_column, color=color, markers=True)
+    if color is None:
+        return None
+    return px.bar(frame, x=color, y=measure_column, color=color)
+
+
+@st.fragment
+@instrumentation.timed
+def render_drilldown_section(df):
+    """クロス集計のセクション（事前集計したキューブから求める、操作時はこの部分のみ再実行される）"""
+    cube = olap_cube.get_cube(df)
+
+    filter_columns = st.columns(len(cube.dimensions))
+    filters = {}
+    for column, dimension in zip(filter_columns, cube.dimensions):
+        with column:
+            selected = st.multiselect(
+                f"{dimension}で絞り込み", cube.members[dimension], key=f"drilldown_filter_{dimension}"
+            )
+        if selected:
+            filters[dimension] = selected
+
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        group_by = st.multiselect("集計軸", cube.dimensions, default=cube.dimensions[:1], key="drilldown_group_by")
+    with col2:
+        date_label = st.selectbox("日付の単位", ["なし"] + list(olap_cube.DATE_FREQUENCIES), key="drilldown_date")
+    with col3:
+        measure = st.selectbox("指標", cube.measures, key="drilldown_measure")
+
+    date_frequency = olap_cube.DATE_FREQUENCIES.get(date_label)
+    result = cube.query(filters, group_by, date_frequency)
+    if result.empty:
+        st.info("条件に一致するデータがありません。")
+        return
+
+    fig = create_drilldown_chart(result, f'{measure}_合計', date_frequency)
+    if fig is not None:
+        st.plotly_chart(fig, use_container_width=True)
+    st.dataframe(result, use_container_width=True)
+
+
+@st.fragment
+@instrumentation.timed
+def render_segmentation_section(df):
+    """取引のセグメント分けのセクション（学習結果はキャッシュから再利用、操作時はこの部分のみ再実行される）"""
+    n_clusters = st.slider(
+        "セグメント数", min_value=2, max_value=8, value=segmentation.DEFAULT_CLUSTERS, key="segment_count"
+    )
+    with st.spinner("セグメントを学習中..."):
+        result = segmentation.get_segmentation(df, figure_cache.dataset_checksum(df), n_clusters)
+    profile = result.profile()
+
+    fig = px.scatter(
+        profile.reset_index(),
+        x='単価_平均',
+        y='数量_平均',
+        size='件数',
+        color='セグメント',
+        hover_data=['合計金額_平均', '評価_平均', '顧客タイプ_最多', '支払方法_最多'],
+        title='セグメントごとの平均単価と平均数量（円の大きさは件数）'
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    st.dataframe(profile, use_container_width=True)
+
 
 def main():
     """メイン関数"""
     st.markdown('<h1 class="main-header">📊 データ分析</h1>', unsafe_allow_html=True)
     st.markdown('<p class="page-description">スーパーマーケットの売上データを分析してみましょう</p>', unsafe_allow_html=True)
     
-    # データ読み込み
-    df, warning_message = load_supermarket_data()
+    # データ読み込み（CSV がアップロードされた場合はそちらを分析）
+    df, warning_message = select_data_source()
     
     if df is None:
         st.error("データを読み込めませんでした。")
@@ -343,7 +614,7 @@ def main():
     
     # データ型情報を取得
     numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
-    categorical_columns = df.select_dtypes(include=['object']).columns.tolist()
+    categorical_columns = df.select_dtypes(include=['object', 'category']).columns.tolist()
     
     # データ概要
     col1, col2, col3, col4 = st.columns(4)
@@ -363,10 +634,13 @@ def main():
     # 基本統計量
     st.subheader("📊 基本統計量")
     if numeric_columns:
-        stats_df = df[numeric_columns].describe().T
+        statistics = dataset_stats.get_statistics(df)
+        stats_df = statistics.describe()
         # 列名を日本語に変更
         stats_df.columns = ['件数', '平均値', '標準偏差', '最小値', '25%点', '中央値', '75%点', '最大値']
         st.dataframe(stats_df, use_container_width=True)
+        if not statistics.quantiles_exact:
+            st.caption("※ データ件数が多いため、25%点・中央値・75%点は近似値です（順位の誤差は概ね0.1%以内）。")
     else:
         st.info("数値列が存在しません。")
     
@@ -1,58 +1,86 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from sklearn.metrics import mean_absolute_error, mean_squared_error
-from statsmodels.tsa.statespace.sarimax import SARIMAX
+from utils import demand_data, forecasting, instrumentation, model_registry, order_search, shared_store
+from utils.lazy_imports import lazy_import
 
 import warnings
 warnings.filterwarnings('ignore')
 
+# 重いライブラリは初回使用時に読み込む
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
 
-@st.cache_data
+
+@shared_store.shared_dataset
 def load_demand_data():
-    """需要予測データを読み込み"""
+    """需要予測データを読み込み（列指向キャッシュ経由）"""
     try:
-        data_path = "data/input/store_item_demand_forecast.csv"
-        # Shift-JISエンコーディングで読み込み
-        df = pd.read_csv(data_path, encoding='shift-jis')
-        # 日付列の処理
-        if '日付' in df.columns:
-            df['日付'] = pd.to_datetime(df['日付'])
-        
-        # 商品名を日本語名に変更
-        product_mapping = {
-            '1': 'りんご',
-            '2': 'みかん', 
-            '3': 'バナナ',
-            '4': 'ぶどう',
-            '5': 'いちご'
-        }
-        
-        # 商品列が数字の場合は日本語名に変換
-        if '商品' in df.columns:
-            df['商品'] = df['商品'].astype(str).map(product_mapping).fillna(df['商品'])
-        
+        df = demand_data.load_demand_data()
         return df, None
     except Exception as e:
         st.error(f"データ読み込みエラー: {str(e)}")
         return None, str(e)
 
 
-@st.cache_resource
-def train_sarimax_model(df_train, store, item):
-    """SARIMAX モデルを学習"""
+def filter_store_data(df):
+    """1店舗分のデータに絞り込み、日付順に並べる（1店舗のみを想定）"""
+    if '店舗' in df.columns:
+        store_name = df['店舗'].iloc[0]
+        df_filtered = df[df['店舗'] == store_name].copy()
+    else:
+        df_filtered = df.copy()
+    
+    return df_filtered.sort_values('日付').reset_index(drop=True)
+
+
+def filter_item_data(df_filtered, item):
+    """商品でデータを絞り込み"""
+    return df_filtered[df_filtered['商品'] == item].copy()
+
+
+def get_store_name(df_item):
+    """店舗名を取得"""
+    return df_item['店舗'].iloc[0] if '店舗' in df_item.columns else '店舗1'
+
+
+def get_default_split_date(df_item):
+    """デフォルトの分割点（全期間の80%地点）を取得"""
+    min_date = df_item['日付'].min()
+    max_date = df_item['日付'].max()
+    total_days = (max_date - min_date).days
+    default_split_days = int(total_days * 0.8)
+    return min_date + pd.Timedelta(days=default_split_days)
+
+
+def split_train_test(df_item, split_datetime):
+    """分割点で学習データとテストデータに分割"""
+    df_train = df_item[df_item['日付'] <= split_datetime].copy()
+    df_test = df_item[df_item['日付'] > split_datetime].copy()
+    return df_train, df_test
+
+
+@instrumentation.timed
+def train_sarimax_model(df_train, store, item, auto_order=False):
+    """SARIMAX モデルを学習（学習済みのモデルはレジストリに保存し、プロセス・再起動をまたいで再利用する）
+
+    auto_order=True の場合は次数を自動で選択する（選んだ次数は保存され、2回目以降は探索しない）。
+    """
     try:
-        # SARIMAX モデル作成・学習
-        model = SARIMAX(df_train['販売個数'], order=(1, 1, 1), seasonal_order=(1, 1, 1, 7))
-        fitted_model = model.fit(disp=False)
+        # SARIMAX モデル作成・学習（設定は一括予測と共通）
+        order, seasonal_order = forecasting.SARIMAX_ORDER, forecasting.SARIMAX_SEASONAL_ORDER
+        if auto_order:
+            selected = order_search.get_order(store, item, df_train['販売個数'])
+            order, seasonal_order = selected['order'], selected['seasonal_order']
+        fitted_model = model_registry.get_sarimax_model(
+            store, item, df_train['日付'].max(), df_train['販売個数'], order, seasonal_order
+        )
         
         return fitted_model, None
     except Exception as e:
         return None, f"SARIMAX モデル学習エラー: {str(e)}"
 
 
+@instrumentation.timed
 def create_forecast_plot(df_train, df_test, forecast_df, store, item):
     """予測結果のプロットを作成"""
     fig = go.Figure()
@@ -104,19 +132,10 @@ def create_forecast_plot(df_train, df_test, forecast_df, store, item):
     return fig
 
 
+@instrumentation.timed
 def calculate_metrics(y_true, y_pred):
     """予測精度の指標を計算"""
-    mae = mean_absolute_error(y_true, y_pred)
-    mse = mean_squared_error(y_true, y_pred)
-    rmse = np.sqrt(mse)
-    mape = np.mean(np.abs((y_true - y_pred) / y_true)) * 100
-    
-    return {
-        'MAE': mae,
-        'MSE': mse,
-        'RMSE': rmse,
-        'MAPE': mape
-    }
+    return forecasting.forecast_metrics(y_true, y_pred)
 
 
 def display_data_overview(df_filtered):
@@ -177,9 +196,7 @@ def get_forecast_settings(df_item):
     max_date = df_item['日付'].max()
     
     # デフォルトの分割点（全期間の80%地点）
-    total_days = (max_date - min_date).days
-    default_split_days = int(total_days * 0.8)
-    default_split_date = min_date + pd.Timedelta(days=default_split_days)
+    default_split_date = get_default_split_date(df_item)
     
     # 分割点の設定
     split_date = st.date_input(
@@ -192,6 +209,13 @@ def get_forecast_settings(df_item):
     
     # 分割点をdatetimeに変換
     split_datetime = pd.to_datetime(split_date)
+
+    # 次数の自動選択
+    auto_order = st.checkbox(
+        "次数を自動で選択",
+        value=False,
+        help="(p,d,q)(P,D,Q,7) の候補から AIC が最小の次数を選びます（初回のみ探索に数秒かかります）"
+    )
     
     # 期間の表示
     col1, col2 = st.columns(2)
@@ -200,15 +224,15 @@ def get_forecast_settings(df_item):
     with col2:
         st.info(f"**予測期間:** {(split_datetime + pd.Timedelta(days=1)).strftime('%Y-%m-%d')} 〜 {max_date.strftime('%Y-%m-%d')}")
     
-    return split_datetime
+    return split_datetime, auto_order
 
 
-def execute_forecast(df_item, split_datetime, selected_item):
+@instrumentation.timed
+def execute_forecast(df_item, split_datetime, selected_item, auto_order=False):
     """予測を実行し、結果を表示"""
     with st.spinner("予測モデルを学習中..."):
         # データ分割
-        df_train = df_item[df_item['日付'] <= split_datetime].copy()
-        df_test = df_item[df_item['日付'] > split_datetime].copy()
+        df_train, df_test = split_train_test(df_item, split_datetime)
         
         if len(df_train) < 20 or len(df_test) < 5:
             st.error("学習または予測期間のデータが不足しています。")
@@ -216,9 +240,12 @@ def execute_forecast(df_item, split_datetime, selected_item):
         
         try:
             # SARIMAX モデル
-            model, error = train_sarimax_model(df_train, df_item['店舗'].iloc[0] if '店舗' in df_item.columns else '店舗1', selected_item)
+            model, error = train_sarimax_model(df_train, get_store_name(df_item), selected_item, auto_order)
             
             if model is not None:
+                if auto_order:
+                    st.caption(f"選択した次数: SARIMAX{model.model.order}×{model.model.seasonal_order}")
+
                 # 予測実行
                 forecast_result = model.forecast(steps=len(df_test))
                 
@@ -244,7 +271,7 @@ def display_forecast_results(df_train, df_test, forecast_df, metrics, selected_i
     st.subheader("📈 予測結果")
     
     # グラフ表示
-    fig = create_forecast_plot(df_train, df_test, forecast_df, df_item['店舗'].iloc[0] if '店舗' in df_item.columns else '店舗1', selected_item)
+    fig = create_forecast_plot(df_train, df_test, forecast_df, get_store_name(df_item), selected_item)
     st.plotly_chart(fig, use_container_width=True)
     
     # 精度指標表示
@@ -279,6 +306,18 @@ def display_forecast_results(df_train, df_test, forecast_df, metrics, selected_i
     )
 
 
+@st.fragment
+@instrumentation.timed
+def render_forecast_section(df_item, selected_item):
+    """予測設定・予測結果のセクション（操作時はこの部分のみ再実行される）"""
+    # 予測設定取得
+    split_datetime, auto_order = get_forecast_settings(df_item)
+
+    # 予測実行ボタン
+    if st.button("🚀 予測実行", type="primary"):
+        execute_forecast(df_item, split_datetime, selected_item, auto_order)
+
+
 def main():
     """メイン関数"""
     st.markdown('<h1 class="main-header">📈 需要予測</h1>', unsafe_allow_html=True)
@@ -295,13 +334,7 @@ def main():
         st.warning(warning_message)
     
     # データフィルタリング（1店舗のみを想定）
-    if '店舗' in df.columns:
-        store_name = df['店舗'].iloc[0]
-        df_filtered = df[df['店舗'] == store_name].copy()
-    else:
-        df_filtered = df.copy()
-    
-    df_filtered = df_filtered.sort_values('日付').reset_index(drop=True)
+    df_filtered = filter_store_data(df)
     
     # データ概要表示
     display_data_overview(df_filtered)
@@ -311,7 +344,7 @@ def main():
     selected_item = st.selectbox("商品を選択:", available_items)
     
     # 選択された商品でさらにフィルタリング
-    df_item = df_filtered[df_filtered['商品'] == selected_item].copy()
+    df_item = filter_item_data(df_filtered, selected_item)
     
     # 売上推移表示
     display_sales_trend(df_item, selected_item)
@@ -319,12 +352,8 @@ def main():
     # 統計情報表示
     display_statistics(df_item)
     
-    # 予測設定取得
-    split_datetime = get_forecast_settings(df_item)
-    
-    # 予測実行ボタン
-    if st.button("🚀 予測実行", type="primary"):
-        execute_forecast(df_item, split_datetime, selected_item)
+    # 予測設定・予測実行
+    render_forecast_section(df_item, selected_item)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -1,33 +1,41 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.feature_extraction.text import TfidfVectorizer
+from utils import dataset_cache, dataset_schema, instrumentation, shared_store
 
 import warnings
 warnings.filterwarnings('ignore')
 
 
-@st.cache_data
+def read_books_csv(data_path):
+    """書籍データのCSVを読み込み"""
+    # Shift-JISエンコーディングで読み込み
+    return pd.read_csv(data_path, encoding='shift-jis')
+
+
+@shared_store.shared_dataset
 def load_books_data():
-    """書籍データを読み込み"""
+    """書籍データを読み込み（列指向キャッシュ経由）"""
     try:
         data_path = "data/input/books_recommendation.csv"
-        # Shift-JISエンコーディングで読み込み
-        df = pd.read_csv(data_path, encoding='shift-jis')
+        df = dataset_cache.load_dataset(data_path, read_books_csv, dataset_schema.BOOKS_SCHEMA)
         return df, None
     except Exception as e:
         st.error(f"データ読み込みエラー: {str(e)}")
         return None, str(e)
 
 
-@st.cache_data
+@instrumentation.cache_data
+@instrumentation.timed
 def prepare_tfidf_matrix(df):
     """TF-IDF行列を事前計算してキャッシュ"""
     try:
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
         # コンテンツ特徴量を作成（著者とタイトルを結合）
         df_unique = df[['book_id', 'author', 'title', 'average_rating', 'ratings_count', 'image_url']].drop_duplicates()
-        content_features = df_unique['author'].fillna('') + ' ' + df_unique['title'].fillna('')
+        # author は category 型の場合があるため object 型に戻してから結合
+        content_features = df_unique['author'].astype(object).fillna('') + ' ' + df_unique['title'].astype(object).fillna('')
         
         # TF-IDF ベクトル化
         vectorizer = TfidfVectorizer(
@@ -58,6 +66,7 @@ def display_data_overview(df_unique):
             st.metric("平均評価", "N/A")
 
 
+@instrumentation.timed
 def create_book_selection_ui(df_unique):
     """書籍選択UIを作成し、選択された書籍IDを返す"""
     st.subheader("📚 レコメンド設定")
@@ -91,9 +100,12 @@ def create_book_selection_ui(df_unique):
     return selected_book_id, n_recommendations
 
 
+@instrumentation.timed
 def get_content_based_recommendations(df_unique, tfidf_matrix, selected_books, n_recommendations=10):
     """コンテンツベースレコメンデーション（高速化版）"""
     try:
+        from sklearn.metrics.pairwise import cosine_similarity
+
         if len(selected_books) == 0:
             return pd.DataFrame()
         
@@ -140,6 +152,7 @@ def get_content_based_recommendations(df_unique, tfidf_matrix, selected_books, n
         return pd.DataFrame()
 
 
+@instrumentation.timed
 def display_book_cards(recommendations, recommendation_type):
     """書籍カードを表示（Netflix風横スクロール）"""
     if len(recommendations) == 0:
@@ -309,6 +322,23 @@ def display_selected_book_card(book_info):
     """, unsafe_allow_html=True)
 
 
+@st.fragment
+@instrumentation.timed
+def render_recommendation_section(df_unique, tfidf_matrix):
+    """書籍選択・レコメンド結果のセクション（操作時はこの部分のみ再実行される）"""
+    # 書籍選択UI
+    selected_book_id, n_recommendations = create_book_selection_ui(df_unique)
+    
+    # 選択された書籍の表示
+    if selected_book_id:
+        st.subheader("📖 選択された書籍")
+        selected_book_info = df_unique[df_unique['book_id'] == selected_book_id].iloc[0]
+        display_selected_book_card(selected_book_info)
+    
+    # レコメンド実行
+    execute_recommendation(df_unique, tfidf_matrix, selected_book_id, n_recommendations)
+
+
 def main():
     """メイン関数"""
     # ページヘッダー
@@ -331,17 +361,8 @@ def main():
     # データ概要表示
     display_data_overview(df_unique)
     
-    # 書籍選択UI
-    selected_book_id, n_recommendations = create_book_selection_ui(df_unique)
-    
-    # 選択された書籍の表示
-    if selected_book_id:
-        st.subheader("📖 選択された書籍")
-        selected_book_info = df_unique[df_unique['book_id'] == selected_book_id].iloc[0]
-        display_selected_book_card(selected_book_info)
-    
-    # レコメンド実行
-    execute_recommendation(df_unique, tfidf_matrix, selected_book_id, n_recommendations)
+    # 書籍選択・レコメンド実行
+    render_recommendation_section(df_unique, tfidf_matrix)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -2,7 +2,8 @@ import streamlit as st
 from datetime import datetime
 import json
 import os
-from openai import OpenAI
+from streamlit.errors import StreamlitAPIException
+from utils import instrumentation
 
 # 環境変数ファイルの読み込み（ローカル開発用）
 try:
@@ -38,6 +39,8 @@ def initialize_openai_client():
         return None, "OPENAI_API_KEY が設定されていません。"
     
     try:
+        from openai import OpenAI
+
         client = OpenAI(api_key=api_key)
         return client, f"OpenAI API に接続しました（取得元: {source}）"
     except Exception as e:
@@ -61,6 +64,7 @@ Craft College は実践的なデータサイエンス教育を提供するスク
 受講生の学習をサポートし、キャリア形成を支援することが目標です。"""
 
 
+@instrumentation.timed
 def get_chat_response(client, messages):
     """ChatGPT からの応答を取得"""
     try:
@@ -202,6 +206,14 @@ def render_api_status(client, message):
         return True
 
 
+def rerun_chat_section():
+    """チャットのセクションのみ再実行（フラグメントの再実行中でなければアプリ全体）"""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+
 def render_chat_settings():
     """チャット設定セクションを表示"""
     st.header("🤖 チャット設定")
@@ -216,7 +228,7 @@ def render_chat_settings():
         if st.button("🗑️ 履歴クリア", help="チャット履歴をクリアします"):
             st.session_state.messages = [st.session_state.messages[0]]  # 初期メッセージのみ残す
             st.session_state.chat_history = []
-            st.rerun()
+            rerun_chat_section()
     
     # サンプル質問
     st.subheader("💡 質問例")
@@ -249,7 +261,7 @@ def handle_question_selection(selected_question):
                 return selected_question
         with col2:
             if st.button("❌ クリア"):
-                st.rerun()
+                rerun_chat_section()
         
         # 通常の入力欄も表示
         return st.chat_input("または、ここに直接入力してください...")
@@ -257,6 +269,7 @@ def handle_question_selection(selected_question):
         return st.chat_input("メッセージを入力してください...")
 
 
+@instrumentation.timed
 def process_user_input(user_input, client):
     """ユーザー入力を処理"""
     # ユーザーメッセージを表示・保存
@@ -291,7 +304,24 @@ def process_user_input(user_input, client):
             # デモ履歴も保存
             save_chat_history(user_input, demo_response)
     
-    st.rerun()
+    rerun_chat_section()
+
+
+@st.fragment
+@instrumentation.timed
+def render_chat_section(client):
+    """チャット設定・チャットエリアのセクション（操作時はこの部分のみ再実行される）"""
+    # チャット設定
+    selected_question = render_chat_settings()
+    
+    # チャットエリア
+    render_chat_area()
+    
+    # ユーザー入力処理
+    user_input = handle_question_selection(selected_question)
+    
+    if user_input:
+        process_user_input(user_input, client)
 
 
 def main():
@@ -308,17 +338,8 @@ def main():
     # API接続状況表示
     api_available = render_api_status(client, message)
     
-    # チャット設定
-    selected_question = render_chat_settings()
-    
-    # チャットエリア
-    render_chat_area()
-    
-    # ユーザー入力処理
-    user_input = handle_question_selection(selected_question)
-    
-    if user_input:
-        process_user_input(user_input, client)
+    # チャット設定・チャットエリア・ユーザー入力処理
+    render_chat_section(client)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,49 @@
+"""本番用の起動スクリプト
+
+`streamlit run main.py` と同じようにアプリを起動するが、サーバーの起動と同時に
+キャッシュのウォームアップを開始する（最初の訪問者を待たずにキャッシュを埋める）。
+
+    python serve.py [--server.port 8501] [--server.address 0.0.0.0]
+
+READINESS_PORT を設定すると http://<host>:<READINESS_PORT>/ready が
+ウォームアップ完了まで 503、完了後は 200 を返す。
+"""
+import os
+import sys
+
+from streamlit.web import bootstrap
+
+from utils import cache_warmup
+
+MAIN_SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+
+def parse_flag_options(argv):
+    """`--server.port 8501` / `--server.port=8501` 形式のオプションを解析"""
+    flag_options = {}
+    args = list(argv)
+    while args:
+        arg = args.pop(0)
+        if not arg.startswith("--"):
+            continue
+        if "=" in arg:
+            key, value = arg[2:].split("=", 1)
+        else:
+            key, value = arg[2:], args.pop(0) if args else None
+        flag_options[key] = value
+    return flag_options
+
+
+def main():
+    os.chdir(os.path.dirname(MAIN_SCRIPT_PATH))
+    flag_options = parse_flag_options(sys.argv[1:])
+    bootstrap.load_config_options(flag_options=flag_options)
+
+    cache_warmup.start_readiness_server()
+    cache_warmup.start_warmup(wait_for_runtime=True)
+
+    bootstrap.run(MAIN_SCRIPT_PATH, False, [], flag_options)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import numpy as np
+
+from utils import aggregation
+
+
+def test_streaming_histogram_skips_nan_and_infinite_values():
+    histogram = aggregation.StreamingHistogram()
+
+    histogram.add([1.0, 2.0])
+    histogram.add([3.0, np.inf, -np.inf, np.nan])
+
+    counts, edges = histogram.histogram(bins=3)
+    assert counts.sum() == 3
+    assert edges[0] <= 1.0 and edges[-1] >= 3.0
+
+
+def test_streaming_histogram_ignores_chunk_of_only_infinite_values():
+    histogram = aggregation.StreamingHistogram()
+
+    histogram.add([np.inf, np.nan])
+    histogram.add([5.0, 6.0])
+
+    assert histogram.histogram(bins=2)[0].sum() == 2
+
+
+def test_histogram_counts_skips_infinite_values():
+    counts, edges = aggregation.histogram_counts(np.array([1.0, 2.0, np.inf, np.nan]), bins=2)
+
+    assert counts.tolist() == [1, 1]
+    assert edges.tolist() == [1.0, 1.5, 2.0]
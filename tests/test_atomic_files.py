@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+from utils import atomic_files
+
+
+def test_atomic_write_replaces_file_and_removes_tmp_on_failure(tmp_path):
+    path = tmp_path / "cache" / "data.txt"
+
+    atomic_files.atomic_write(str(path), lambda tmp: open(tmp, "w").write("new"))
+    assert path.read_text() == "new"
+
+    def fail(tmp):
+        with open(tmp, "w") as f:
+            f.write("partial")
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        atomic_files.atomic_write(str(path), fail)
+    assert path.read_text() == "new"
+    assert os.listdir(path.parent) == ["data.txt"]
+
+
+def test_prune_siblings_keeps_newest_files_and_the_kept_path(tmp_path):
+    paths = []
+    for i in range(5):
+        path = tmp_path / f"segments-{i}.npz"
+        path.write_bytes(b"")
+        os.utime(path, (i, i))
+        paths.append(str(path))
+    tmp_file = tmp_path / "segments-9.npz.123.456.tmp.npz"
+    tmp_file.write_bytes(b"")
+    other = tmp_path / "other.npz"
+    other.write_bytes(b"")
+
+    # keep は最も古いファイルでも残し、それ以外は新しい順に残す
+    atomic_files.prune_siblings(str(tmp_path / "segments-*.npz"), paths[0], max_files=3)
+
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        ["segments-0.npz", "segments-3.npz", "segments-4.npz", tmp_file.name, other.name]
+    )
@@ -0,0 +1,54 @@
+import io
+
+import numpy as np
+import pytest
+
+from utils import chunked_ingest
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(chunked_ingest, "UPLOAD_CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def ingest(upload_dir, text, **kwargs):
+    cache_path = str(upload_dir / "upload.arrow")
+    result = chunked_ingest.ingest_csv(io.BytesIO(text.encode("utf-8")), cache_path, **kwargs)
+    return result, chunked_ingest.read_ingested(cache_path)
+
+
+def test_integer_column_widened_when_decimals_appear_in_later_chunk(upload_dir):
+    text = "a,b\n" + "".join(f"x{i},{i}\n" for i in range(10)) + "y,10.5\n"
+
+    result, df = ingest(upload_dir, text, chunk_rows=5)
+
+    assert result['rows'] == 11
+    assert df['b'].dtype == np.float64
+    assert df['b'].tolist() == [float(i) for i in range(10)] + [10.5]
+    assert list(upload_dir.iterdir()) == [upload_dir / "upload.arrow"]
+
+
+def test_float32_schema_column_is_float32_even_if_first_chunk_is_integer(upload_dir):
+    text = "c\n" + "".join(f"{i}\n" for i in range(5)) + "3.5\n"
+
+    _, df = ingest(upload_dir, text, schema={'float32': ['c']}, chunk_rows=5)
+
+    assert df['c'].dtype == np.float32
+    assert df['c'].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0, 3.5]
+
+
+def test_incompatible_type_change_is_rejected(upload_dir):
+    with pytest.raises(ValueError, match="型が途中で変わっています"):
+        ingest(upload_dir, "a\n1\n2\nx\n", chunk_rows=2)
+
+
+def test_infinite_values_are_stored_but_not_counted_in_histograms(upload_dir):
+    text = "合計金額\n1\n2\n3\ninf\n-inf\n4\n"
+
+    result, df = ingest(upload_dir, text, histogram_columns=['合計金額'], chunk_rows=3)
+
+    assert df['合計金額'].tolist() == [1.0, 2.0, 3.0, np.inf, -np.inf, 4.0]
+    counts, edges = result['histograms']['合計金額'].histogram(bins=4)
+    assert counts.sum() == 4
+    assert np.isfinite(edges).all()
@@ -0,0 +1,15 @@
+from utils import dataset_cache
+
+
+def read_csv(path):
+    return path
+
+
+def test_cache_key_changes_when_schema_conversion_changes(monkeypatch):
+    schema = {'integer': ['数量']}
+    key = dataset_cache._reader_fingerprint(read_csv, schema)
+
+    monkeypatch.setattr(dataset_cache, "_schema_source", lambda: "def apply_schema(df, schema): ...")
+
+    assert dataset_cache._reader_fingerprint(read_csv, schema) != key
+    assert dataset_cache._reader_fingerprint(read_csv, None) == dataset_cache._reader_fingerprint(read_csv, None)
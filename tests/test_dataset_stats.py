@@ -0,0 +1,39 @@
+import concurrent.futures
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils import dataset_stats
+
+
+def test_concurrent_calls_share_one_result_per_dataframe():
+    rng = np.random.default_rng(0)
+    frames = [pd.DataFrame({'単価': rng.normal(size=1000), '数量': rng.normal(size=1000)}) for _ in range(3)]
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(dataset_stats.get_statistics, frames * 4))
+
+    for index, df in enumerate(frames):
+        assert all(result is results[index] for result in results[index::len(frames)])
+        assert dataset_stats.get_statistics(df) is results[index]
+    assert len({id(result) for result in results}) == len(frames)
+
+
+def test_different_dataframes_are_computed_concurrently(monkeypatch):
+    frames = [pd.DataFrame({'単価': np.arange(100.0) + offset}) for offset in range(2)]
+    both_started = threading.Barrier(len(frames), timeout=5)
+    from_frame = dataset_stats.DatasetStatistics.from_frame
+
+    def waiting_from_frame(df, columns=None):
+        # 別の DataFrame の計算が同時に始まるまで待つ（ロックで順番に計算していると BrokenBarrierError）
+        both_started.wait()
+        return from_frame(df, columns)
+
+    monkeypatch.setattr(dataset_stats.DatasetStatistics, 'from_frame', waiting_from_frame)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(frames)) as executor:
+        results = list(executor.map(dataset_stats.get_statistics, frames))
+
+    assert all(dataset_stats.get_statistics(df) is result for df, result in zip(frames, results))
+    assert results[0] is not results[1]
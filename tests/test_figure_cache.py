@@ -0,0 +1,61 @@
+import importlib.util
+import json
+
+from streamlit.testing.v1 import AppTest
+
+from utils import figure_cache
+
+
+def load_function(tmp_path, name, source):
+    path = tmp_path / f"{name}.py"
+    path.write_text(source, encoding="utf-8")
+    spec = importlib.util.spec_from_file_location("figure_page", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.create_chart
+
+
+def test_figure_key_changes_when_function_source_is_edited(tmp_path):
+    original = load_function(tmp_path, "before", "def create_chart(df, column):\n    return None\n")
+    same = load_function(tmp_path, "same", "def create_chart(df, column):\n    return None\n")
+    edited = load_function(tmp_path, "after", "def create_chart(df, column):\n    return df[column]\n")
+
+    key = figure_cache.figure_key("checksum", original, ("価格",))
+
+    assert figure_cache.figure_key("checksum", same, ("価格",)) == key
+    assert figure_cache.figure_key("checksum", edited, ("価格",)) != key
+    assert figure_cache.figure_key("checksum", original, ("合計",)) != key
+
+
+CHART_SCRIPT = """
+import json
+
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from utils import figure_cache
+
+
+def create_chart(df, column):
+    return go.Figure(go.Bar(x=df[column], y=df[column]))
+
+
+df = pd.DataFrame({"価格": [1.0, 2.0, 3.0]})
+cache = figure_cache.FigureCache()
+key = figure_cache.figure_key(figure_cache.dataset_checksum(df), create_chart, ("価格",))
+# キャッシュにある図の JSON（作成関数が返す図とは異なる目印のタイトルを付ける）
+cache.put(key, json.dumps({"data": [{"type": "bar", "y": [1, 2, 3]}], "layout": {"title": {"text": "cached-marker"}}}))
+st.plotly_chart(figure_cache.cached_figure(create_chart, df, "価格", cache=cache))
+"""
+
+
+def test_cached_figure_is_rendered_from_stored_json_by_plotly_chart():
+    at = AppTest.from_string(CHART_SCRIPT).run()
+
+    assert not at.exception
+    # st.plotly_chart が保持している JSON（to_dict の結果）をそのまま使っていれば目印が残る
+    # （図を再構築・再変換すると空の図になり、目印が消える）
+    spec = json.loads(at.get("plotly_chart")[0].proto.spec)
+    assert spec["layout"]["title"]["text"] == "cached-marker"
+    assert spec["data"][0]["y"] == [1, 2, 3]
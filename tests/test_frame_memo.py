@@ -0,0 +1,93 @@
+import gc
+import threading
+import time
+
+import pandas as pd
+
+from utils import frame_memo
+
+
+def make_frame(rows=3):
+    return pd.DataFrame({'単価': range(rows), '数量': range(rows)})
+
+
+def test_memo_returns_stored_value_for_the_same_frame_only():
+    memo = frame_memo.FrameMemo()
+    df, other = make_frame(), make_frame()
+
+    memo.put(df, "stats")
+
+    assert memo.get(df) == "stats"
+    assert memo.get(other) is None
+    assert memo.get_or_compute(df, lambda _: "recomputed") == "stats"
+
+
+def test_memo_ignores_value_after_structure_changes():
+    memo = frame_memo.FrameMemo()
+    df = make_frame()
+    memo.put(df, "stats")
+
+    df['合計'] = df['単価'] * df['数量']
+
+    assert memo.changed(df)
+    assert memo.get(df) is None
+    assert memo.get_or_compute(df, lambda _: "recomputed") == "recomputed"
+    assert not memo.changed(df)
+
+
+def test_memo_drops_entry_when_frame_is_collected():
+    memo = frame_memo.FrameMemo()
+    df = make_frame()
+    memo.put(df, "stats")
+    assert len(memo) == 1
+
+    del df
+    gc.collect()
+
+    assert len(memo) == 0
+    # 同じ id が別の DataFrame に再利用されても、以前の結果は返さない
+    assert memo.get(make_frame()) is None
+
+
+def test_get_or_compute_runs_once_per_frame_under_concurrency():
+    memo = frame_memo.FrameMemo()
+    df = make_frame()
+    calls = []
+
+    def compute(frame):
+        calls.append(frame)
+        time.sleep(0.05)
+        return len(calls)
+
+    threads = [threading.Thread(target=memo.get_or_compute, args=(df, compute)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert memo.get(df) == 1
+    assert len(memo._flights) == 0
+
+
+def test_single_flight_does_not_block_other_keys():
+    flights = frame_memo.SingleFlight()
+    barrier = threading.Barrier(2, timeout=5)
+    errors = []
+
+    def hold(key):
+        with flights.lock(key):
+            try:
+                # 別のキーのロックを同時に保持できなければここで時間切れになる
+                barrier.wait()
+            except threading.BrokenBarrierError as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=hold, args=(key,)) for key in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert len(flights) == 0
@@ -0,0 +1,107 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from utils import quantile_sketch
+from utils.quantile_sketch import QuantileSketch
+
+PROBABILITIES = np.linspace(0.01, 0.99, 99)
+# 順位の誤差は全体の数 / k 程度（乱数による揺らぎの分の余裕を見て 3 / k まで許容する）
+RANK_ERROR_FACTOR = 3
+
+
+def sample_values(rows, seed=0):
+    return np.random.default_rng(seed).lognormal(mean=5.5, sigma=0.8, size=rows)
+
+
+def rank_error(sorted_values, estimates):
+    """推定値の順位（その値以下の割合）と目標の確率の差の最大値（同じ値の範囲内なら 0）"""
+    lower = np.searchsorted(sorted_values, estimates, side="left") / len(sorted_values)
+    upper = np.searchsorted(sorted_values, estimates, side="right") / len(sorted_values)
+    return np.max(np.maximum(0, np.maximum(lower - PROBABILITIES, PROBABILITIES - upper)))
+
+
+def merge_all(sketches):
+    merged = sketches[0]
+    for sketch in sketches[1:]:
+        merged = merged.merge(sketch)
+    return merged
+
+
+def test_exact_mode_matches_numpy_quantile():
+    values = sample_values(quantile_sketch.EXACT_MAX_VALUES)
+    values[::1000] = np.nan
+
+    sketch = QuantileSketch.from_values(values)
+
+    assert sketch.exact
+    np.testing.assert_array_equal(sketch.quantiles(PROBABILITIES), np.nanquantile(values, PROBABILITIES))
+
+
+def test_merged_exact_sketches_match_numpy_quantile():
+    values = sample_values(quantile_sketch.EXACT_MAX_VALUES)
+    merged = merge_all([QuantileSketch.from_values(chunk) for chunk in np.array_split(values, 4)])
+
+    assert merged.exact
+    np.testing.assert_array_equal(merged.quantiles(PROBABILITIES), np.quantile(values, PROBABILITIES))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_kll_mode_stays_within_rank_error_bound(seed):
+    values = sample_values(300_000, seed)
+    sketch = QuantileSketch(exact_max_values=1_000, rng=np.random.default_rng(seed)).update(values)
+
+    assert not sketch.exact
+    assert sketch.retained < len(values) / 100
+    bound = RANK_ERROR_FACTOR / sketch.k
+    assert rank_error(np.sort(values), sketch.quantiles(PROBABILITIES)) <= bound
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_merged_kll_sketch_stays_within_rank_error_bound(seed):
+    values = sample_values(300_000, seed)
+    sketches = [
+        QuantileSketch(exact_max_values=1_000, rng=np.random.default_rng(seed + i)).update(chunk)
+        for i, chunk in enumerate(np.array_split(values, 7))
+    ]
+    merged = merge_all(sketches)
+
+    assert not merged.exact
+    assert merged.count == len(values)
+    bound = RANK_ERROR_FACTOR / merged.k
+    assert rank_error(np.sort(values), merged.quantiles(PROBABILITIES)) <= bound
+
+
+def test_exact_sketches_switch_to_kll_when_merged_beyond_limit():
+    values = sample_values(quantile_sketch.EXACT_MAX_VALUES + 10_000)
+    merged = merge_all([QuantileSketch.from_values(chunk) for chunk in np.array_split(values, 2)])
+
+    assert not merged.exact
+    assert rank_error(np.sort(values), merged.quantiles(PROBABILITIES)) <= RANK_ERROR_FACTOR / merged.k
+
+
+def test_large_input_is_compressed_in_bounded_blocks(monkeypatch):
+    rows = 2_000_000
+    values = sample_values(rows)
+    peak_buffer = 0
+    compress = QuantileSketch._compress
+
+    def recording_compress(self):
+        nonlocal peak_buffer
+        peak_buffer = max(peak_buffer, self.retained)
+        compress(self)
+
+    monkeypatch.setattr(QuantileSketch, "_compress", recording_compress)
+    sketch = QuantileSketch(k=256, exact_max_values=1_000)
+
+    tracemalloc.start()
+    sketch.update(values)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # 圧縮前に保持する値は O(k log n) に収まり、入力全体のコピー・ソートは行わない
+    assert peak_buffer <= sketch.k * (quantile_sketch.UPDATE_BLOCK_FACTOR + np.log2(rows))
+    assert peak_bytes < values.nbytes / 20
+    assert sketch.count == rows
+    assert rank_error(np.sort(values), sketch.quantiles(PROBABILITIES)) <= RANK_ERROR_FACTOR / sketch.k
@@ -0,0 +1,71 @@
+import logging
+import warnings
+
+import pandas as pd
+import pytest
+
+from utils import shared_store
+
+
+@pytest.fixture
+def load_calls():
+    return []
+
+
+@pytest.fixture
+def load_sales(load_calls):
+    @shared_store.shared_dataset
+    def load_sales():
+        load_calls.append(1)
+        return pd.DataFrame({'単価': [10.0, 20.0, 30.0], '数量': [1, 2, 3]}), None
+
+    yield load_sales
+    load_sales.clear()
+
+
+def test_sessions_share_one_read_only_frame(load_sales, load_calls):
+    df, _ = load_sales()
+
+    assert load_sales()[0] is df
+    assert len(load_calls) == 1
+    with pytest.raises(ValueError):
+        df.loc[0, '単価'] = 0.0
+    assert not shared_store.is_modified(df)
+
+
+@pytest.mark.parametrize("mutate", [
+    lambda df: df.__setitem__('単価', 1.0),
+    lambda df: df.__setitem__('合計', df['単価'] * df['数量']),
+    lambda df: df.drop(columns='数量', inplace=True),
+])
+def test_mutated_frame_is_reloaded_for_other_sessions(load_sales, load_calls, mutate, caplog):
+    df, _ = load_sales()
+    mutate(df)
+    assert shared_store.is_modified(df)
+
+    with caplog.at_level(logging.WARNING, logger=shared_store.__name__):
+        reloaded, error = load_sales()
+
+    assert error is None
+    assert reloaded is not df
+    assert reloaded['単価'].tolist() == [10.0, 20.0, 30.0]
+    assert list(reloaded.columns) == ['単価', '数量']
+    assert not shared_store.is_modified(reloaded)
+    assert load_sales()[0] is reloaded
+    assert len(load_calls) == 2
+    assert "読み込み直します" in caplog.text
+
+
+def test_chained_assignment_does_not_reach_shared_frame(load_sales):
+    df, _ = load_sales()
+
+    # Copy-on-Write では警告だけで無視され、それ以外では書き込み不可の例外になる
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        try:
+            df['単価'].iloc[0] = 0.0
+        except ValueError:
+            pass
+
+    assert df['単価'].iloc[0] == 10.0
+    assert not shared_store.is_modified(df)
@@ -0,0 +1 @@
+"""デモアプリ共通のユーティリティ"""
@@ -0,0 +1,157 @@
+"""グラフ用のサーバー側集計
+
+Plotly の px.histogram / go.Histogram に生データを渡すと全行がページの JSON に
+シリアライズされ、ブラウザ側で集計される。ここで NumPy を使って度数を集計してから
+棒グラフとして渡すことで、ブラウザに送るデータ量を行数ではなくビン数・カテゴリ数に比例させる。
+"""
+import numpy as np
+import pandas as pd
+
+
+def histogram_counts(values, bins=30):
+    """等幅ビンの度数と境界を返す（欠損値と ±inf は除外、最後のビンは最大値を含む）"""
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return np.zeros(bins, dtype=np.int64), np.linspace(0, 1, bins + 1)
+    counts, edges = np.histogram(values, bins=bins)
+    return counts, edges
+
+
+def bin_centers(edges):
+    """ビンの中心（棒グラフの x 座標）"""
+    return (edges[:-1] + edges[1:]) / 2
+
+
+def bin_labels(edges, precision=3):
+    """ビンの区間を表すラベル（例: "(10.1, 20.5]"、最初のビンは最小値を含む）"""
+    rounded = [f"{edge:.{precision}f}".rstrip('0').rstrip('.') for edge in edges]
+    labels = [f"({left}, {right}]" for left, right in zip(rounded[:-1], rounded[1:])]
+    if labels:
+        labels[0] = "[" + labels[0][1:]
+    return labels
+
+
+def category_counts(series):
+    """カテゴリごとの件数を件数の多い順に返す（category 型はコードを直接数える）"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        counts = np.bincount(codes[codes >= 0], minlength=len(series.cat.categories))
+        value_counts = pd.Series(counts, index=series.cat.categories)
+        return value_counts.sort_values(ascending=False, kind='stable')
+    return series.value_counts()
+
+
+def histogram2d_counts(x, y, bins=100):
+    """2次元の等幅ビンの度数を返す（np.histogram2d より速い bincount による実装）
+
+    Returns:
+        tuple: (counts[y のビン, x のビン], x の境界, y の境界)
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    x_edges = np.linspace(x.min(), x.max(), bins + 1)
+    y_edges = np.linspace(y.min(), y.max(), bins + 1)
+    x_index = _bin_index(x, x_edges[0], x_edges[-1], bins)
+    y_index = _bin_index(y, y_edges[0], y_edges[-1], bins)
+    counts = np.bincount(y_index * bins + x_index, minlength=bins * bins).reshape(bins, bins)
+    return counts, x_edges, y_edges
+
+
+def _bin_index(values, low, high, bins):
+    """等幅ビンの番号（最後のビンは最大値を含む）"""
+    span = high - low
+    if span == 0:
+        return np.zeros(len(values), dtype=np.intp)
+    return np.minimum(((values - low) * (bins / span)).astype(np.intp), bins - 1)
+
+
+def regression_sums(x, y):
+    """単回帰の十分統計量（n, Σx, Σy, Σxy, Σx², Σy²）を求める
+
+    桁落ちを避けるため x[0], y[0] を原点にずらした値で集計する（shift に記録）。
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    shift = (float(x[0]), float(y[0])) if len(x) else (0.0, 0.0)
+    dx = x - shift[0]
+    dy = y - shift[1]
+    return {
+        'n': len(x),
+        'shift': shift,
+        'sum_x': float(dx.sum()),
+        'sum_y': float(dy.sum()),
+        'sum_xy': float(np.dot(dx, dy)),
+        'sum_xx': float(np.dot(dx, dx)),
+        'sum_yy': float(np.dot(dy, dy)),
+    }
+
+
+def linear_fit(sums):
+    """十分統計量から回帰直線の (傾き, 切片, 決定係数R²) を求める（求められない場合は None）"""
+    n = sums['n']
+    if n < 2:
+        return None
+    sxx = sums['sum_xx'] - sums['sum_x'] ** 2 / n
+    syy = sums['sum_yy'] - sums['sum_y'] ** 2 / n
+    sxy = sums['sum_xy'] - sums['sum_x'] * sums['sum_y'] / n
+    if sxx <= 0:
+        return None
+    slope = sxy / sxx
+    shift_x, shift_y = sums['shift']
+    intercept = (sums['sum_y'] - slope * sums['sum_x']) / n + shift_y - slope * shift_x
+    r_squared = sxy ** 2 / (sxx * syy) if syy > 0 else 1.0
+    return slope, intercept, r_squared
+
+
+class StreamingHistogram:
+    """値を少しずつ追加できるヒストグラム（範囲は事前に不要）
+
+    細かい等幅ビン（fine_bins 個）で数え、範囲外の値が来たら隣り合うビンを2つずつまとめて
+    ビン幅を2倍にし、範囲を広げる。表示時は histogram() で指定したビン数にまとめる。
+    """
+
+    def __init__(self, fine_bins=1024):
+        self.fine_bins = fine_bins
+        self.low = None
+        self.width = None
+        self.counts = np.zeros(fine_bins, dtype=np.int64)
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        # 欠損値と ±inf は数えない（inf を含めると範囲を広げ続けてビン幅があふれる）
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return
+        low, high = float(values.min()), float(values.max())
+        if self.low is None:
+            self.low = low
+            self.width = (high - low) / self.fine_bins or 1.0
+        while low < self.low or high > self.low + self.width * self.fine_bins:
+            self._expand(extend_down=low < self.low)
+        index = np.minimum(((values - self.low) / self.width).astype(np.intp), self.fine_bins - 1)
+        self.counts += np.bincount(index, minlength=self.fine_bins)
+
+    def _expand(self, extend_down):
+        """ビン幅を2倍にして範囲を下（または上）に広げる"""
+        half = self.fine_bins // 2
+        merged = self.counts.reshape(half, 2).sum(axis=1)
+        self.counts = np.zeros(self.fine_bins, dtype=np.int64)
+        if extend_down:
+            self.counts[half:] = merged
+            self.low -= self.width * self.fine_bins
+        else:
+            self.counts[:half] = merged
+        self.width *= 2
+
+    def histogram(self, bins=30):
+        """値のある範囲を約 bins 個のビンにまとめた (度数, 境界) を返す"""
+        nonzero = np.flatnonzero(self.counts)
+        if len(nonzero) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(1)
+        first, last = nonzero[0], nonzero[-1] + 1
+        group = max(1, int(np.ceil((last - first) / bins)))
+        starts = np.arange(first, last, group)
+        counts = np.add.reduceat(self.counts[first:last], starts - first)
+        edges = self.low + self.width * np.append(starts, min(starts[-1] + group, self.fine_bins))
+        return counts, edges
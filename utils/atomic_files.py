@@ -0,0 +1,52 @@
+"""キャッシュファイルの書き込みと古いファイルの削除
+
+データセット・アップロード・モデル・次数・セグメントのキャッシュと一括予測の出力は、いずれも
+複数のスレッド・プロセスから同時に読み書きされ得るため、
+- atomic_write: 一時ファイルに書いてから置き換え、読み込み側が書きかけのファイルを見ないようにする
+- prune_siblings: 同じ種類の古いファイルを、新しい順に決まった数だけ残して削除する
+を共通で使う。
+"""
+import glob
+import os
+import threading
+
+TMP_MARKER = ".tmp"
+
+
+def atomic_write(path, writer, suffix=""):
+    """writer(一時ファイルのパス) で書き込み、書き終えたら path に置き換える
+
+    一時ファイルは path と同じディレクトリに作り、書き込みに失敗した場合は削除する。
+    suffix は一時ファイルの末尾に付ける拡張子（np.savez のように拡張子を補う書き込み関数用）。
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}{TMP_MARKER}{suffix}"
+    try:
+        writer(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def prune_siblings(pattern, keep, max_files=1):
+    """pattern（glob）に一致するファイルを、keep を含めて新しい順に max_files 個まで残して削除
+
+    書き込み中の一時ファイル（atomic_write が作るもの）と、削除できなかったファイルは無視する。
+    """
+    paths = []
+    for path in glob.glob(pattern):
+        if path == keep or TMP_MARKER in os.path.basename(path):
+            continue
+        try:
+            paths.append((os.path.getmtime(path), path))
+        except OSError:
+            continue
+    paths.sort(reverse=True)
+    for _, path in paths[max(max_files - 1, 0):]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,137 @@
+"""需要予測モデルのローリング・オリジン（時系列交差検証）によるバックテスト
+
+需要予測ページの精度指標は1つの分割点での評価で、モデルの安定性はわからない。
+ここでは系列ごとに予測の起点（オリジン）を step 日ずつずらしながら
+「起点までで学習 → 起点の翌日から horizon 日を予測」を繰り返し、予測の何日先かごとの
+MAE・RMSE・MAPE を配列で返す。
+
+- 学習期間は起点までの全期間（expanding、window=None）か直近 window 日（sliding）
+- 隣り合う起点では前の起点で学習したパラメータを使う。refit_every 起点ごとに前のパラメータから
+  ウォームスタートで学習し直し、その間の起点は学習済みのパラメータのまま学習期間を置き換えてフィルタし直す
+- 系列の起点を連続したブロックに分け、ブロックをプロセスプールの各ワーカーで並列に評価する
+  （ブロック内ではパラメータを引き継ぐため、ブロックの数はワーカー数程度にする）
+"""
+import math
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from utils import forecasting, process_pool
+
+DEFAULT_HORIZON = 28
+DEFAULT_STEP = 7
+DEFAULT_INITIAL = 180
+DEFAULT_REFIT_EVERY = 4
+
+
+def rolling_origins(n_obs, initial=DEFAULT_INITIAL, horizon=DEFAULT_HORIZON, step=DEFAULT_STEP):
+    """予測の起点（学習期間の末尾の次の位置）の配列"""
+    return np.arange(initial, n_obs - horizon + 1, step)
+
+
+def _split_blocks(origins, blocks):
+    """起点を連続した blocks 個のブロックに分割"""
+    blocks = max(1, min(blocks, len(origins)))
+    return [block for block in np.array_split(origins, blocks) if len(block)]
+
+
+def backtest_block(values, origins, horizon=DEFAULT_HORIZON, window=None, refit_every=DEFAULT_REFIT_EVERY,
+                   warm_start=True, order=forecasting.SARIMAX_ORDER,
+                   seasonal_order=forecasting.SARIMAX_SEASONAL_ORDER):
+    """連続した起点を順に評価し、予測値の配列 (起点数, horizon) を返す（ワーカープロセスで実行される）
+
+    学習に失敗した起点の予測値は NaN になる。
+    """
+    predicted = np.full((len(origins), horizon), np.nan)
+    results = None
+    params = None
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        for i, origin in enumerate(origins):
+            start = 0 if window is None else max(origin - window, 0)
+            y_train = values[start:origin]
+            try:
+                if results is None or i % refit_every == 0:
+                    results = forecasting.fit_sarimax(
+                        y_train, order, seasonal_order, start_params=params if warm_start else None
+                    )
+                    params = results.params
+                else:
+                    results = results.apply(pd.Series(y_train), refit=False)
+                predicted[i] = np.asarray(results.forecast(steps=horizon), dtype=np.float64)
+            except Exception:
+                results = None
+    return predicted
+
+
+def horizon_metrics(actual, predicted):
+    """予測の何日先かごとの MAE・RMSE・MAPE[%]（actual, predicted は (起点数, horizon) の配列）
+
+    学習に失敗した起点（NaN）は除き、実績が 0 の点は MAPE から除く。
+    """
+    errors = actual - predicted
+    with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        ape = np.where(actual != 0, np.abs(errors / actual), np.nan)
+        return {
+            'horizon': np.arange(1, actual.shape[1] + 1),
+            'MAE': np.nanmean(np.abs(errors), axis=0),
+            'RMSE': np.sqrt(np.nanmean(errors ** 2, axis=0)),
+            'MAPE': np.nanmean(ape, axis=0) * 100,
+        }
+
+
+def run_backtest(series_list, horizon=DEFAULT_HORIZON, step=DEFAULT_STEP, initial=DEFAULT_INITIAL, window=None,
+                 refit_every=DEFAULT_REFIT_EVERY, warm_start=True, workers=None):
+    """系列（batch_forecast.iter_series の形式）ごとにバックテストを行う
+
+    Returns:
+        list[dict]: 系列ごとの store, item, origin_dates（起点の前日＝学習期間の末尾）,
+            actual / predicted（(起点数, horizon) の配列）, metrics（horizon_metrics）
+    """
+    series_list = list(series_list)
+    workers = workers or os.cpu_count() or 1
+    # 系列ごとの起点のブロック（全体でワーカー数程度になるように分ける）
+    blocks_per_series = max(1, math.ceil(workers / max(len(series_list), 1)))
+    tasks = []
+    for index, series in enumerate(series_list):
+        origins = rolling_origins(len(series['values']), initial, horizon, step)
+        for block in _split_blocks(origins, blocks_per_series):
+            tasks.append((index, block))
+
+    def task_args(index, block):
+        return (series_list[index]['values'], block, horizon, window, refit_every, warm_start)
+
+    if workers == 1:
+        predictions = [backtest_block(*task_args(index, block)) for index, block in tasks]
+    else:
+        with process_pool.process_pool(min(workers, len(tasks) or 1)) as executor:
+            futures = [executor.submit(backtest_block, *task_args(index, block)) for index, block in tasks]
+            predictions = [future.result() for future in futures]
+
+    results = []
+    for index, series in enumerate(series_list):
+        values = series['values']
+        blocks = [(block, predicted) for (task_index, block), predicted in zip(tasks, predictions)
+                  if task_index == index]
+        origins = np.concatenate([block for block, _ in blocks]) if blocks else np.array([], dtype=int)
+        predicted = np.vstack([predicted for _, predicted in blocks]) if blocks else np.empty((0, horizon))
+        actual = values[origins[:, None] + np.arange(horizon)] if len(origins) else np.empty((0, horizon))
+        results.append({
+            'store': series['store'],
+            'item': series['item'],
+            'origin_dates': series['dates'][origins - 1] if len(origins) else series['dates'][:0],
+            'actual': actual,
+            'predicted': predicted,
+            'metrics': horizon_metrics(actual, predicted),
+        })
+    return results
+
+
+def summarize(results):
+    """全系列をまとめた予測の何日先かごとの指標（DataFrame）"""
+    actual = np.vstack([result['actual'] for result in results])
+    predicted = np.vstack([result['predicted'] for result in results])
+    return pd.DataFrame(horizon_metrics(actual, predicted)).set_index('horizon')
@@ -0,0 +1,220 @@
+"""全店舗 × 全商品の一括需要予測（プロセスプール）
+
+需要予測ページは1店舗・1商品ずつ SARIMAX を学習するが、夜間の一括予測では
+全店舗 × 全商品の系列を予測する。系列ごとの学習は独立しているため、
+系列をプロセスプールの各ワーカーに振り分けて並列に学習する（CPU コア数にほぼ比例して速くなる）。
+
+系列ごとに
+1. 末尾 holdout 日を除いた期間で SARIMAX（forecasting と同じ設定）を学習し、
+2. 末尾 holdout 日の予測値で精度指標（MAE, RMSE, MAPE）を計算し、
+3. 学習したパラメータのまま末尾 holdout 日の実績を追加して（再学習しない）、その先 horizon 日を予測する。
+
+- 系列ごとの時間制限（timeout 秒）を超えた学習は打ち切り、その系列を 'timeout' として記録する
+  （ワーカー内のタイマーで中断するため、SIGALRM のない Windows では時間制限は無効）
+- 1系列の失敗（例外・時間切れ）は他の系列に影響しない。ワーカープロセス自体が異常終了した場合は
+  プールを作り直して未完了の系列を続行する
+- 結果は列指向の Arrow IPC ファイル（予測値 forecasts.arrow と精度・状態 metrics.arrow）に書き出す
+"""
+import concurrent.futures
+import logging
+import os
+import signal
+import threading
+import time
+import warnings
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from utils import atomic_files, forecasting, process_pool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HORIZON = 28
+DEFAULT_HOLDOUT = 28
+DEFAULT_TIMEOUT = 120
+MIN_TRAIN_DAYS = 30
+MAX_POOL_RESTARTS = 2
+
+FORECASTS_FILE = "forecasts.arrow"
+METRICS_FILE = "metrics.arrow"
+
+
+class SeriesTimeoutError(Exception):
+    """系列の学習が時間制限を超えた場合の例外"""
+
+
+def iter_series(df):
+    """店舗 × 商品ごとの系列（日付順の日付と販売個数の配列）を返す"""
+    df = df.sort_values(forecasting.DATE_COLUMN)
+    groups = df.groupby([forecasting.STORE_COLUMN, forecasting.ITEM_COLUMN], observed=True, sort=True)
+    for (store, item), group in groups:
+        yield {
+            'store': store,
+            'item': item,
+            'dates': group[forecasting.DATE_COLUMN].to_numpy(),
+            'values': group[forecasting.TARGET_COLUMN].to_numpy(dtype=np.float64),
+        }
+
+
+def _raise_timeout(signum, frame):
+    raise SeriesTimeoutError()
+
+
+def _time_limit(timeout):
+    """ワーカー内で timeout 秒後に SeriesTimeoutError を送出するタイマーを設定（解除する関数を返す）"""
+    if not timeout or not hasattr(signal, "SIGALRM") or threading.current_thread() is not threading.main_thread():
+        return lambda: None
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+
+    def cancel():
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+    return cancel
+
+
+def forecast_series(series, horizon=DEFAULT_HORIZON, holdout=DEFAULT_HOLDOUT, timeout=DEFAULT_TIMEOUT):
+    """1系列を学習・評価・予測する（ワーカープロセスで実行される）
+
+    Returns:
+        dict: metrics（系列の状態・精度指標・学習時間）, forecast（予測の日付・予測値、失敗時は None）
+    """
+    start = time.perf_counter()
+    values = series['values']
+    dates = series['dates']
+    metrics = {
+        'store': series['store'],
+        'item': series['item'],
+        'status': 'ok',
+        'error': None,
+        'train_days': max(len(values) - holdout, 0),
+        'MAE': np.nan,
+        'RMSE': np.nan,
+        'MAPE': np.nan,
+        'seconds': np.nan,
+    }
+    forecast = None
+
+    cancel = _time_limit(timeout)
+    try:
+        if len(values) - holdout < MIN_TRAIN_DAYS:
+            raise ValueError(f"学習データが不足しています（{len(values) - holdout}日）")
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            fitted = forecasting.fit_sarimax(values[:-holdout] if holdout else values)
+            if holdout:
+                holdout_metrics = forecasting.forecast_metrics(values[-holdout:], fitted.forecast(steps=holdout))
+                metrics.update({name: holdout_metrics[name] for name in ('MAE', 'RMSE', 'MAPE')})
+                fitted = fitted.append(values[-holdout:], refit=False)
+            predicted = np.asarray(fitted.forecast(steps=horizon), dtype=np.float64)
+        forecast_dates = pd.date_range(pd.Timestamp(dates[-1]) + pd.Timedelta(days=1), periods=horizon, freq='D')
+        forecast = {'dates': forecast_dates.to_numpy(), 'values': predicted}
+    except SeriesTimeoutError:
+        metrics.update(status='timeout', error=f"{timeout}秒以内に学習が終わりませんでした")
+    except Exception as e:
+        metrics.update(status='failed', error=str(e))
+    finally:
+        cancel()
+    metrics['seconds'] = time.perf_counter() - start
+    return {'metrics': metrics, 'forecast': forecast}
+
+
+def _failed_result(series, error):
+    return {
+        'metrics': {
+            'store': series['store'], 'item': series['item'], 'status': 'failed', 'error': error,
+            'train_days': 0, 'MAE': np.nan, 'RMSE': np.nan, 'MAPE': np.nan, 'seconds': np.nan,
+        },
+        'forecast': None,
+    }
+
+
+def run_batch(series_list, workers=None, horizon=DEFAULT_HORIZON, holdout=DEFAULT_HOLDOUT,
+              timeout=DEFAULT_TIMEOUT, on_result=None):
+    """系列をプロセスプールで並列に予測し、系列ごとの結果を入力と同じ順で返す
+
+    workers=1 の場合はプロセスプールを使わずに順に実行する。on_result(done, total, result) は
+    各系列の終了時に呼ばれる。
+    """
+    series_list = list(series_list)
+    workers = workers or os.cpu_count() or 1
+    results = [None] * len(series_list)
+    done = 0
+
+    def finish(index, result):
+        nonlocal done
+        results[index] = result
+        done += 1
+        if on_result is not None:
+            on_result(done, len(series_list), result)
+
+    if workers == 1:
+        for index, series in enumerate(series_list):
+            finish(index, forecast_series(series, horizon, holdout, timeout))
+        return results
+
+    pending = list(range(len(series_list)))
+    for attempt in range(MAX_POOL_RESTARTS + 1):
+        if not pending:
+            break
+        try:
+            with process_pool.process_pool(min(workers, len(pending))) as executor:
+                futures = {
+                    executor.submit(forecast_series, series_list[index], horizon, holdout, timeout): index
+                    for index in pending
+                }
+                for future in concurrent.futures.as_completed(futures):
+                    finish(futures[future], future.result())
+        except BrokenProcessPool:
+            # ワーカーの異常終了（メモリ不足など）。完了していない系列だけをやり直す
+            logger.warning("ワーカープロセスが異常終了したため、未完了の系列をやり直します（%d回目）", attempt + 1)
+        pending = [index for index in pending if results[index] is None]
+
+    for index in pending:
+        finish(index, _failed_result(series_list[index], "ワーカープロセスが異常終了しました"))
+    return results
+
+
+def results_to_tables(results):
+    """系列ごとの結果を、予測値と精度・状態の列指向の表（pyarrow.Table）に変換"""
+    metrics = pd.DataFrame([result['metrics'] for result in results])
+    forecasts = [
+        pd.DataFrame({
+            forecasting.STORE_COLUMN: result['metrics']['store'],
+            forecasting.ITEM_COLUMN: result['metrics']['item'],
+            forecasting.DATE_COLUMN: result['forecast']['dates'],
+            '予測値': result['forecast']['values'],
+        })
+        for result in results if result['forecast'] is not None
+    ]
+    forecast_df = pd.concat(forecasts, ignore_index=True) if forecasts else pd.DataFrame(
+        columns=[forecasting.STORE_COLUMN, forecasting.ITEM_COLUMN, forecasting.DATE_COLUMN, '予測値']
+    )
+    metrics = metrics.rename(columns={'store': forecasting.STORE_COLUMN, 'item': forecasting.ITEM_COLUMN})
+    return (
+        pa.Table.from_pandas(forecast_df, preserve_index=False),
+        pa.Table.from_pandas(metrics, preserve_index=False),
+    )
+
+
+def _write_table(table, path):
+    """一時ファイルに書いてから置き換える"""
+    atomic_files.atomic_write(path, lambda tmp_path: feather.write_feather(table, tmp_path, compression="uncompressed"))
+
+
+def write_results(results, output_dir):
+    """予測値と精度・状態を output_dir に Arrow IPC ファイルとして書き出し、パスを返す"""
+    os.makedirs(output_dir, exist_ok=True)
+    forecasts, metrics = results_to_tables(results)
+    paths = {
+        'forecasts': os.path.join(output_dir, FORECASTS_FILE),
+        'metrics': os.path.join(output_dir, METRICS_FILE),
+    }
+    _write_table(forecasts, paths['forecasts'])
+    _write_table(metrics, paths['metrics'])
+    return paths
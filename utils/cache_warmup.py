@@ -0,0 +1,199 @@
+"""サーバー起動時のキャッシュウォームアップ
+
+最初の訪問者が TF-IDF 行列の作成や SARIMAX の学習を待たされないように、
+バックグラウンドスレッドで各ページのキャッシュを事前に埋める。
+進捗は get_status() で取得でき、READINESS_PORT を設定すると
+ロードバランサー向けのヘルスチェック用エンドポイント（/ready）も起動する。
+"""
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils import page_registry
+
+logger = logging.getLogger(__name__)
+
+# ウォームアップ対象のページ（main.py の PAGES と同じモジュール名で読み込む）
+ANALYTICS_PAGE = ("pages/1_analytics.py", "analytics_page")
+DEMAND_FORECAST_PAGE = ("pages/2_demand_forecast.py", "demand_forecast_page")
+RECOMMENDATION_PAGE = ("pages/3_recommendation.py", "recommendation_page")
+
+_lock = threading.Lock()
+_thread = None
+_status = {
+    'state': 'not_started',  # not_started / running / ready / failed
+    'started_at': None,
+    'finished_at': None,
+    'steps': {},
+}
+
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _run_step(name, func):
+    """ウォームアップの1ステップを実行し、結果を記録"""
+    with _lock:
+        _status['steps'][name] = {'state': 'running', 'seconds': None, 'error': None}
+    start = time.perf_counter()
+    try:
+        func()
+        state, error = 'done', None
+    except Exception as e:
+        state, error = 'failed', str(e)
+        logger.exception("ウォームアップに失敗しました: %s", name)
+    elapsed = time.perf_counter() - start
+    with _lock:
+        _status['steps'][name] = {'state': state, 'seconds': round(elapsed, 3), 'error': error}
+    return state == 'done'
+
+
+def _warm_analytics():
+    analytics = page_registry.get_page_module(*ANALYTICS_PAGE)
+    analytics.load_supermarket_data()
+
+
+def _warm_recommendation():
+    recommendation = page_registry.get_page_module(*RECOMMENDATION_PAGE)
+    df, _ = recommendation.load_books_data()
+    recommendation.prepare_tfidf_matrix(df)
+
+
+def _warm_demand_forecast():
+    """全商品についてデフォルトの分割点（80%地点）で SARIMAX を学習"""
+    demand = page_registry.get_page_module(*DEMAND_FORECAST_PAGE)
+    df, error = demand.load_demand_data()
+    if df is None:
+        raise RuntimeError(error)
+
+    df_filtered = demand.filter_store_data(df)
+    succeeded = True
+    for item in sorted(df_filtered['商品'].unique()):
+        def warm_item(item=item):
+            df_item = demand.filter_item_data(df_filtered, item)
+            split_datetime = demand.get_default_split_date(df_item)
+            df_train, _ = demand.split_train_test(df_item, split_datetime)
+            _, error = demand.train_sarimax_model(df_train, demand.get_store_name(df_item), item)
+            if error:
+                raise RuntimeError(error)
+        succeeded &= _run_step(f"train_sarimax_model[{item}]", warm_item)
+    if not succeeded:
+        raise RuntimeError("一部の商品でモデル学習に失敗しました。")
+
+
+def _wait_for_runtime(timeout=60):
+    """Streamlit のランタイム起動を待つ
+
+    ランタイム起動前に st.cache_data を呼ぶと一時的なメモリキャッシュに保存され、
+    起動後のセッションからは参照されないため。
+    """
+    from streamlit import runtime
+
+    deadline = time.monotonic() + timeout
+    while not runtime.exists():
+        if time.monotonic() > deadline:
+            raise TimeoutError("Streamlit のランタイムが起動しませんでした。")
+        time.sleep(0.1)
+
+
+def _run_warmup(wait_for_runtime):
+    """すべてのウォームアップを順番に実行"""
+    if wait_for_runtime and not _run_step("wait_for_runtime", _wait_for_runtime):
+        with _lock:
+            _status['state'] = 'failed'
+            _status['finished_at'] = _now()
+        return
+
+    steps = [
+        ("load_supermarket_data", _warm_analytics),
+        ("prepare_tfidf_matrix", _warm_recommendation),
+        ("load_demand_data / train_sarimax_model", _warm_demand_forecast),
+    ]
+    succeeded = True
+    for name, func in steps:
+        succeeded &= _run_step(name, func)
+
+    with _lock:
+        _status['state'] = 'ready' if succeeded else 'failed'
+        _status['finished_at'] = _now()
+    logger.info("キャッシュのウォームアップが完了しました: %s", _status['state'])
+
+
+def start_warmup(wait_for_runtime=False):
+    """ウォームアップをバックグラウンドで開始（プロセス内で一度だけ）
+
+    サーバー起動前に呼ぶ場合は wait_for_runtime=True を指定する。
+    """
+    global _thread
+    with _lock:
+        if _thread is not None:
+            return False
+        _status['state'] = 'running'
+        _status['started_at'] = _now()
+        _thread = threading.Thread(
+            target=_run_warmup, args=(wait_for_runtime,), name="cache-warmup", daemon=True
+        )
+        _thread.start()
+    return True
+
+
+def wait(timeout=None):
+    """ウォームアップの完了を待つ"""
+    thread = _thread
+    if thread is not None:
+        thread.join(timeout)
+    return is_ready()
+
+
+def get_status():
+    """ウォームアップの状況を取得"""
+    with _lock:
+        return json.loads(json.dumps(_status))
+
+
+def is_ready():
+    """すべてのキャッシュが準備済みかどうか"""
+    with _lock:
+        return _status['state'] == 'ready'
+
+
+class _ReadinessHandler(BaseHTTPRequestHandler):
+    """GET /ready: 準備完了なら 200、それ以外は 503 を返す"""
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/ready", "/readyz"):
+            self.send_error(404)
+            return
+        body = json.dumps(get_status(), ensure_ascii=False).encode("utf-8")
+        self.send_response(200 if is_ready() else 503)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_readiness_server = None
+
+
+def start_readiness_server(port=None, host="0.0.0.0"):
+    """ヘルスチェック用の HTTP サーバーを起動（READINESS_PORT 未設定なら何もしない）"""
+    global _readiness_server
+    port = port or os.getenv("READINESS_PORT")
+    if not port:
+        return None
+    with _lock:
+        if _readiness_server is None:
+            _readiness_server = ThreadingHTTPServer((host, int(port)), _ReadinessHandler)
+            threading.Thread(
+                target=_readiness_server.serve_forever, name="readiness-server", daemon=True
+            ).start()
+            logger.info("ヘルスチェック用エンドポイントを起動しました: http://%s:%s/ready", host, port)
+    return _readiness_server
@@ -0,0 +1,205 @@
+"""アップロードされた CSV のチャンク単位の取り込み
+
+大きな CSV を一度に pd.read_csv すると、元のバイト列に加えて全行の DataFrame
+（文字列列は Python オブジェクト）を同時にメモリに持つことになる。ここでは
+    チャンクの読み込み → 型変換 → (統計量・ヒストグラムの更新, Arrow ファイルへの追記)
+をジェネレーターでつなぎ、一度にメモリに載るのは1チャンク分だけにする。
+取り込んだ結果は列指向キャッシュ（Arrow IPC）として保存し、表示にはそれをメモリマップで読み込む。
+"""
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from utils import aggregation, atomic_files, dataset_cache, dataset_stats
+from utils.lazy_imports import lazy_import
+
+pc = lazy_import("pyarrow.compute")
+
+UPLOAD_CACHE_DIR = os.path.join(dataset_cache.CACHE_DIR, "uploads")
+UPLOAD_CACHE_MAX_FILES = 5
+DEFAULT_CHUNK_ROWS = 200_000
+ENCODING_SAMPLE_BYTES = 64 * 1024
+
+
+def upload_checksum(file_obj):
+    """アップロードされたファイルの内容のチェックサム（コピーせずにバッファを参照する）"""
+    return hashlib.blake2b(file_obj.getbuffer(), digest_size=16).hexdigest()
+
+
+def get_upload_cache_path(checksum):
+    """アップロードされたファイルの列指向キャッシュのパス"""
+    return os.path.join(UPLOAD_CACHE_DIR, f"upload-{checksum}{dataset_cache.CACHE_EXTENSION}")
+
+
+def detect_encoding(file_obj):
+    """先頭部分から文字コードを判定（UTF-8 として読めなければ CP932）"""
+    position = file_obj.tell()
+    sample = file_obj.read(ENCODING_SAMPLE_BYTES)
+    file_obj.seek(position)
+    try:
+        sample.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # 読み込んだ範囲の末尾で文字が途切れただけなら UTF-8 とみなす
+        if e.start < len(sample) - 3:
+            return "cp932"
+    return "utf-8-sig"
+
+
+def iter_csv_chunks(file_obj, chunk_rows=DEFAULT_CHUNK_ROWS, encoding=None):
+    """CSV を chunk_rows 行ずつの DataFrame として順に返す"""
+    encoding = encoding or detect_encoding(file_obj)
+    with pd.read_csv(file_obj, encoding=encoding, chunksize=chunk_rows) as reader:
+        yield from reader
+
+
+def convert_chunks(chunks, schema=None):
+    """各チャンクの型を変換（日付・float32）
+
+    float32 の列は、チャンクによって整数として読み込まれる場合も float32 にそろえる。
+    category 型と整数の縮小はチャンクごとに結果が変わり得るため、ここでは行わない
+    （category 型は取り込み後に Arrow の辞書型として変換する）。
+    """
+    schema = schema or {}
+    for chunk in chunks:
+        for column, date_format in schema.get('datetime', {}).items():
+            if column in chunk.columns:
+                chunk[column] = pd.to_datetime(chunk[column], format=date_format)
+        for column in schema.get('float32', []):
+            if column in chunk.columns and (
+                pd.api.types.is_float_dtype(chunk[column]) or pd.api.types.is_integer_dtype(chunk[column])
+            ):
+                chunk[column] = chunk[column].astype(np.float32)
+        yield chunk
+
+
+def _widen_type(current, new):
+    """2つのチャンクの列の型をまとめた型（まとめられない場合は None）"""
+    if current.equals(new):
+        return current
+    if pa.types.is_null(current):
+        return new
+    if pa.types.is_null(new):
+        return current
+    numeric = (pa.types.is_integer, pa.types.is_floating)
+    if any(check(current) for check in numeric) and any(check(new) for check in numeric):
+        if pa.types.is_integer(current) and pa.types.is_integer(new):
+            return pa.int64()
+        # 途中のチャンクから小数が現れた整数列などは float64 に広げる
+        return pa.float64()
+    return None
+
+
+def _widen_schema(current, new):
+    """これまでのスキーマと新しいチャンクのスキーマをまとめたスキーマ"""
+    if current.names != new.names:
+        raise ValueError("CSV の列が途中で変わっています")
+    fields = []
+    for current_field, new_field in zip(current, new):
+        widened = _widen_type(current_field.type, new_field.type)
+        if widened is None:
+            raise ValueError(
+                f"CSV の列の型が途中で変わっています: {current_field.name} ({current_field.type} → {new_field.type})"
+            )
+        fields.append(current_field.with_type(widened))
+    return pa.schema(fields, metadata=current.metadata)
+
+
+def _rewrite_with_schema(tmp_path, schema):
+    """書き出し済みの Arrow ファイルを新しいスキーマで書き直し、追記を続けるライターを返す
+
+    1バッチずつ読み込んで変換するため、一度にメモリに載るのは1チャンク分だけ。
+    """
+    old_path = f"{tmp_path}.old"
+    os.replace(tmp_path, old_path)
+    writer = pa.ipc.new_file(tmp_path, schema)
+    try:
+        with pa.memory_map(old_path, "r") as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                writer.write_table(pa.Table.from_batches([reader.get_batch(i)]).cast(schema))
+    except BaseException:
+        writer.close()
+        raise
+    finally:
+        os.remove(old_path)
+    return writer
+
+
+def _remove_old_uploads(keep_path):
+    """古いアップロードのキャッシュを削除（新しい順に UPLOAD_CACHE_MAX_FILES 個まで残す）"""
+    pattern = os.path.join(UPLOAD_CACHE_DIR, f"upload-*{dataset_cache.CACHE_EXTENSION}")
+    atomic_files.prune_siblings(pattern, keep_path, UPLOAD_CACHE_MAX_FILES)
+
+
+def ingest_csv(file_obj, cache_path, schema=None, histogram_columns=(), chunk_rows=DEFAULT_CHUNK_ROWS,
+               on_progress=None):
+    """CSV をチャンクごとに取り込み、統計量とヒストグラムを更新しながら Arrow ファイルに書き出す
+
+    on_progress(fraction, rows, histograms) は各チャンクの処理後に呼ばれる。
+
+    Returns:
+        dict: rows（行数）, statistics（数値列の DatasetStatistics）, histograms（列名 -> StreamingHistogram）
+    """
+    file_obj.seek(0, os.SEEK_END)
+    total_bytes = file_obj.tell() or 1
+    file_obj.seek(0)
+
+    histograms = {column: aggregation.StreamingHistogram() for column in histogram_columns}
+    statistics = None
+    rows = 0
+
+    def write(tmp_path):
+        nonlocal statistics, rows
+        writer = None
+        arrow_schema = None
+        try:
+            for chunk in convert_chunks(iter_csv_chunks(file_obj, chunk_rows), schema):
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    arrow_schema = table.schema
+                    writer = pa.ipc.new_file(tmp_path, arrow_schema)
+                elif not table.schema.equals(arrow_schema):
+                    widened = _widen_schema(arrow_schema, table.schema)
+                    if not widened.equals(arrow_schema):
+                        writer.close()
+                        writer = None
+                        writer = _rewrite_with_schema(tmp_path, widened)
+                        arrow_schema = widened
+                    table = table.cast(arrow_schema)
+                writer.write_table(table)
+
+                chunk_statistics = dataset_stats.DatasetStatistics.from_frame(
+                    chunk, statistics.columns if statistics is not None else None
+                )
+                statistics = chunk_statistics if statistics is None else statistics.merge(chunk_statistics)
+                for column, histogram in histograms.items():
+                    if column in chunk.columns:
+                        histogram.add(chunk[column].to_numpy(dtype=np.float64, na_value=np.nan))
+                rows += len(chunk)
+
+                if on_progress is not None:
+                    on_progress(min(file_obj.tell() / total_bytes, 1.0), rows, histograms)
+
+            if rows == 0:
+                raise ValueError("CSV にデータがありません。")
+        finally:
+            if writer is not None:
+                writer.close()
+
+    atomic_files.atomic_write(cache_path, write)
+    _remove_old_uploads(cache_path)
+    return {'rows': rows, 'statistics': statistics, 'histograms': histograms}
+
+
+def read_ingested(cache_path, categorical_columns=()):
+    """取り込んだ Arrow ファイルをメモリマップで読み込み、DataFrame を返す"""
+    with pa.memory_map(cache_path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    for column in categorical_columns:
+        index = table.schema.get_field_index(column)
+        if index >= 0 and pa.types.is_string(table.schema.field(index).type):
+            table = table.set_column(index, column, pc.dictionary_encode(table.column(index)))
+    return table.to_pandas(split_blocks=True)
@@ -0,0 +1,149 @@
+"""データセットの列指向キャッシュ
+
+data/input 以下の CSV を一度だけ読み込み（文字コード変換・型変換を含む）、
+結果を Arrow IPC（Feather v2, 非圧縮）形式で data/cache に保存する。
+キャッシュのキーは「CSV の内容のチェックサム」と「読み込み関数のソースコード・
+スキーマ・型変換の処理（dataset_schema のソースコード）」で、いずれかが変わると自動的に作り直される。2回目以降はメモリマップで読み込むため、
+Shift-JIS のデコードや日付のパースを毎回行わずに済む。
+"""
+import functools
+import glob
+import hashlib
+import inspect
+import json
+import logging
+import os
+import threading
+
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from utils import atomic_files, dataset_schema
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.getenv("DATASET_CACHE_DIR", "data/cache")
+CACHE_EXTENSION = ".arrow"
+CHUNK_SIZE = 8 * 1024 * 1024
+MEMORY_REPORT_KEY = b"memory_report"
+
+_lock = threading.Lock()
+_checksums = {}  # (path, size, mtime_ns) -> checksum
+
+
+def file_checksum(path):
+    """ファイル内容のチェックサムを計算（サイズと更新時刻が同じ間はプロセス内で再利用）"""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _lock:
+        if key in _checksums:
+            return _checksums[key]
+
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    checksum = digest.hexdigest()
+
+    with _lock:
+        _checksums[key] = checksum
+    return checksum
+
+
+@functools.lru_cache(maxsize=None)
+def _schema_source():
+    """型変換の処理（apply_schema と整数の縮小・category 型の判定などの規則）のソースコード"""
+    try:
+        return inspect.getsource(dataset_schema)
+    except (OSError, TypeError):
+        return ""
+
+
+def _reader_fingerprint(reader, schema):
+    """読み込み関数のソースコード・スキーマ・型変換の処理のハッシュ（処理内容が変わったらキャッシュを作り直す）"""
+    try:
+        source = inspect.getsource(reader)
+    except (OSError, TypeError):
+        source = reader.__qualname__
+    source += json.dumps(schema, ensure_ascii=False, sort_keys=True)
+    if schema is not None:
+        source += _schema_source()
+    return hashlib.blake2b(source.encode("utf-8"), digest_size=4).hexdigest()
+
+
+def _cache_prefix(path, reader):
+    return f"{_dataset_name(path)}-{reader.__name__}-"
+
+
+def _dataset_name(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def get_cache_path(path, reader, schema=None):
+    """キャッシュファイルのパスを取得"""
+    name = f"{_cache_prefix(path, reader)}{_reader_fingerprint(reader, schema)}-{file_checksum(path)}{CACHE_EXTENSION}"
+    return os.path.join(CACHE_DIR, name)
+
+
+def read_cache(cache_path):
+    """キャッシュをメモリマップで読み込み、(DataFrame, メモリ削減レポート) を返す"""
+    with pa.memory_map(cache_path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    metadata = table.schema.metadata or {}
+    report = json.loads(metadata[MEMORY_REPORT_KEY]) if MEMORY_REPORT_KEY in metadata else None
+    return table.to_pandas(split_blocks=True), report
+
+
+def write_cache(df, cache_path, report=None):
+    """キャッシュを書き込み（一時ファイルに書いてから置き換える）"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if report is not None:
+        metadata = dict(table.schema.metadata or {})
+        metadata[MEMORY_REPORT_KEY] = json.dumps(report, ensure_ascii=False).encode("utf-8")
+        table = table.replace_schema_metadata(metadata)
+    atomic_files.atomic_write(
+        cache_path, lambda tmp_path: feather.write_feather(table, tmp_path, compression="uncompressed")
+    )
+
+
+def _remove_stale_caches(path, reader, keep_path):
+    """同じデータセットの古いキャッシュを削除"""
+    pattern = os.path.join(CACHE_DIR, f"{glob.escape(_cache_prefix(path, reader))}*{CACHE_EXTENSION}")
+    atomic_files.prune_siblings(pattern, keep_path)
+
+
+def _read_cache_and_record(path, cache_path):
+    df, report = read_cache(cache_path)
+    if report is not None:
+        dataset_schema.record_memory_report(_dataset_name(path), report)
+    return df
+
+
+def load_dataset(path, reader, schema=None):
+    """データセットを読み込み（キャッシュがあればメモリマップで、なければ reader(path) で）
+
+    schema を指定すると dataset_schema.apply_schema で型を変換してからキャッシュする。
+    """
+    cache_path = get_cache_path(path, reader, schema)
+
+    if os.path.exists(cache_path):
+        try:
+            return _read_cache_and_record(path, cache_path)
+        except (OSError, pa.ArrowException, ValueError) as e:
+            logger.warning("キャッシュを読み込めないため作り直します (%s): %s", cache_path, e)
+
+    df = reader(path)
+    report = None
+    if schema is not None:
+        df, report = dataset_schema.apply_schema(df, schema)
+        dataset_schema.record_memory_report(_dataset_name(path), report)
+
+    try:
+        write_cache(df, cache_path, report)
+        _remove_stale_caches(path, reader, cache_path)
+    except (OSError, pa.ArrowException) as e:
+        # キャッシュが書けなくても読み込み自体は成功させる
+        logger.warning("キャッシュを書き込めませんでした (%s): %s", cache_path, e)
+        return df
+
+    return _read_cache_and_record(path, cache_path)
@@ -0,0 +1,105 @@
+"""データセットのスキーマ（読み込み時の型変換）
+
+カテゴリ値の少ない文字列列は category 型に、数値列はより小さい型に変換して
+メモリ使用量を削減する。データセットごとの削減量は get_memory_reports() で取得できる。
+"""
+import logging
+import threading
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# ユニーク値の割合がこれ以下の列のみ category 型に変換する
+CATEGORICAL_MAX_UNIQUE_RATIO = 0.5
+
+# 整数列は最低でも int16 とする（int8 同士の演算によるオーバーフローを避けるため）
+INTEGER_DTYPES = [np.int16, np.int32, np.int64]
+
+SUPERMARKET_SCHEMA = {
+    'categorical': ['顧客タイプ', '性別', '支払方法'],
+    'datetime': {'取引日付': '%m/%d/%Y'},
+    'integer': ['数量'],
+    'float32': ['評価'],
+}
+
+DEMAND_SCHEMA = {
+    'categorical': ['店舗', '商品'],
+    'integer': ['販売個数'],
+}
+
+BOOKS_SCHEMA = {
+    'categorical': ['author'],
+    'integer': ['book_id', 'ratings_count'],
+    'float32': ['average_rating', 'publication_year'],
+}
+
+_lock = threading.Lock()
+_memory_reports = {}
+
+
+def _to_smallest_integer(series):
+    """値の範囲に収まる最小の整数型に変換（欠損値がある場合はそのまま）"""
+    if series.isna().any() or not pd.api.types.is_numeric_dtype(series):
+        return series
+    min_value, max_value = series.min(), series.max()
+    for dtype in INTEGER_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= min_value and max_value <= info.max:
+            return series.astype(dtype)
+    return series
+
+
+def apply_schema(df, schema):
+    """スキーマに従って型を変換し、(変換後の DataFrame, メモリ削減レポート) を返す"""
+    before_bytes = int(df.memory_usage(deep=True).sum())
+    df = df.copy()
+
+    for column, date_format in schema.get('datetime', {}).items():
+        if column in df.columns:
+            df[column] = pd.to_datetime(df[column], format=date_format)
+
+    for column in schema.get('categorical', []):
+        if column in df.columns and len(df) > 0:
+            if df[column].nunique(dropna=True) / len(df) <= CATEGORICAL_MAX_UNIQUE_RATIO:
+                df[column] = df[column].astype('category')
+
+    for column in schema.get('integer', []):
+        if column in df.columns:
+            df[column] = _to_smallest_integer(df[column])
+
+    for column in schema.get('float32', []):
+        if column in df.columns and pd.api.types.is_float_dtype(df[column]):
+            df[column] = df[column].astype(np.float32)
+
+    after_bytes = int(df.memory_usage(deep=True).sum())
+    report = {
+        'rows': len(df),
+        'before_bytes': before_bytes,
+        'after_bytes': after_bytes,
+        'reduction_ratio': round(1 - after_bytes / before_bytes, 4) if before_bytes else 0.0,
+        'dtypes': {str(column): str(dtype) for column, dtype in df.dtypes.items()},
+    }
+    return df, report
+
+
+def record_memory_report(dataset_name, report):
+    """データセットのメモリ削減レポートを記録"""
+    with _lock:
+        is_new = dataset_name not in _memory_reports
+        _memory_reports[dataset_name] = report
+    if is_new:
+        logger.info(
+            "%s: %.2fMB -> %.2fMB (%.1f%%削減)",
+            dataset_name,
+            report['before_bytes'] / 1024 / 1024,
+            report['after_bytes'] / 1024 / 1024,
+            report['reduction_ratio'] * 100,
+        )
+
+
+def get_memory_reports():
+    """データセットごとのメモリ削減レポートを取得"""
+    with _lock:
+        return {name: dict(report) for name, report in _memory_reports.items()}
@@ -0,0 +1,160 @@
+"""数値列の統計量（件数・平均・共分散・分位点）をまとめて計算するエンジン
+
+データ分析ページでは相関ヒートマップ（dropna().corr()）、基本統計量（describe()）、
+単価と合計金額の相関係数、合計金額の平均・中央値などを別々に計算していた。
+DatasetStatistics はこれらを1回の走査で求め、すべての表示で共有する。
+
+- 列ごとの件数・平均・偏差平方和・最小値・最大値・分位点（欠損値を除いた値で集計）
+  分位点は値が少ない間は正確に、多い場合は KLL スケッチ（quantile_sketch）で近似する
+- 全数値列がそろった行の平均と共変動行列（Σ(x-平均)(y-平均)、相関行列用）
+
+いずれも部分集計どうしを merge() で結合できる（平均・共変動は Chan らの並列アルゴリズム）。
+メモリは列数の2乗と分位点スケッチの大きさで決まり、行数には比例しない。
+データが追加された場合は追加分だけを集計して結合すればよく、全体を再走査する必要はない。
+get_statistics(df) は同じ DataFrame に対する結果をプロセス内で再利用する。
+"""
+import numpy as np
+import pandas as pd
+
+from utils import frame_memo, quantile_sketch
+
+DESCRIBE_COLUMNS = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+DESCRIBE_QUANTILES = [0.25, 0.5, 0.75]
+
+_statistics = frame_memo.FrameMemo()  # DataFrame -> DatasetStatistics
+
+
+def _column_moments(values):
+    """欠損値を除いた1列分の統計量"""
+    values = values[~np.isnan(values)]
+    count = len(values)
+    mean = values.mean() if count else 0.0
+    return {
+        'count': count,
+        'mean': mean,
+        'm2': float(np.dot(values - mean, values - mean)) if count else 0.0,
+        'min': values.min() if count else np.nan,
+        'max': values.max() if count else np.nan,
+        'quantiles': quantile_sketch.QuantileSketch.from_values(values),
+    }
+
+
+def _merge_column_moments(a, b):
+    count = a['count'] + b['count']
+    if a['count'] == 0 or b['count'] == 0:
+        mean, m2 = (a['mean'], a['m2']) if b['count'] == 0 else (b['mean'], b['m2'])
+    else:
+        delta = b['mean'] - a['mean']
+        mean = a['mean'] + delta * b['count'] / count
+        m2 = a['m2'] + b['m2'] + delta ** 2 * a['count'] * b['count'] / count
+    return {
+        'count': count,
+        'mean': mean,
+        'm2': m2,
+        'min': np.fmin(a['min'], b['min']),
+        'max': np.fmax(a['max'], b['max']),
+        'quantiles': a['quantiles'].merge(b['quantiles']),
+    }
+
+
+class DatasetStatistics:
+    """数値列の統計量（merge() で部分集計を結合できる）"""
+
+    def __init__(self, columns, column_moments, complete_count, complete_mean, comoment):
+        self.columns = list(columns)
+        self.column_moments = column_moments
+        self.complete_count = complete_count
+        self.complete_mean = complete_mean
+        self.comoment = comoment
+
+    @classmethod
+    def from_frame(cls, df, columns=None):
+        """DataFrame の数値列（columns を指定した場合はその列）から統計量を計算"""
+        if columns is None:
+            columns = df.select_dtypes(include=[np.number]).columns
+        columns = list(columns)
+        values = df[columns].to_numpy(dtype=np.float64) if columns else np.empty((len(df), 0))
+
+        column_moments = [_column_moments(values[:, i]) for i in range(len(columns))]
+
+        complete = values[~np.isnan(values).any(axis=1)]
+        complete_mean = complete.mean(axis=0) if len(complete) else np.zeros(len(columns))
+        centered = complete - complete_mean
+        comoment = centered.T @ centered
+        return cls(columns, column_moments, len(complete), complete_mean, comoment)
+
+    def merge(self, other):
+        """別の部分集計（同じ列構成）と結合した統計量を返す"""
+        if self.columns != other.columns:
+            raise ValueError("列構成が異なる統計量は結合できません")
+        column_moments = [_merge_column_moments(a, b) for a, b in zip(self.column_moments, other.column_moments)]
+
+        count = self.complete_count + other.complete_count
+        if self.complete_count == 0 or other.complete_count == 0:
+            source = self if other.complete_count == 0 else other
+            mean, comoment = source.complete_mean, source.comoment
+        else:
+            delta = other.complete_mean - self.complete_mean
+            mean = self.complete_mean + delta * other.complete_count / count
+            comoment = (
+                self.comoment + other.comoment
+                + np.outer(delta, delta) * self.complete_count * other.complete_count / count
+            )
+        return DatasetStatistics(self.columns, column_moments, count, mean, comoment)
+
+    def update(self, df):
+        """追加された行の統計量を結合した結果を返す（全体は再走査しない）"""
+        return self.merge(DatasetStatistics.from_frame(df, self.columns))
+
+    def correlation(self):
+        """全列がそろった行での相関行列（df.dropna().corr() と同じ）"""
+        if self.complete_count < 2:
+            return None
+        scale = np.sqrt(np.diag(self.comoment))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = self.comoment / np.outer(scale, scale)
+        np.fill_diagonal(corr, np.where(scale > 0, 1.0, np.nan))
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+    def pair_correlation(self, a, b):
+        """列 a と b の両方がそろった行での相関係数（Series.corr と同じ）
+
+        両列の件数が全列のそろった行数と同じ場合だけ相関行列から求め、
+        他の列の欠損値の影響を受ける場合は None を返す（呼び出し側で Series.corr を使う）。
+        """
+        i, j = self.columns.index(a), self.columns.index(b)
+        counts = (self.column_moments[i]['count'], self.column_moments[j]['count'])
+        if counts != (self.complete_count, self.complete_count):
+            return None
+        corr = self.correlation()
+        return None if corr is None else corr.iloc[i, j]
+
+    @property
+    def quantiles_exact(self):
+        """分位点がすべて正確な値か（値が多い列は近似値になる）"""
+        return all(moments['quantiles'].exact for moments in self.column_moments)
+
+    def describe(self):
+        """列ごとの基本統計量（df.describe().T と同じ形式）"""
+        rows = []
+        for moments in self.column_moments:
+            count = moments['count']
+            std = np.sqrt(moments['m2'] / (count - 1)) if count > 1 else np.nan
+            q25, q50, q75 = moments['quantiles'].quantiles(DESCRIBE_QUANTILES)
+            mean = moments['mean'] if count else np.nan
+            rows.append([float(count), mean, std, moments['min'], q25, q50, q75, moments['max']])
+        return pd.DataFrame(rows, index=self.columns, columns=DESCRIBE_COLUMNS, dtype=np.float64)
+
+
+def get_statistics(df):
+    """DataFrame の数値列の統計量を取得（同じ DataFrame に対してはプロセス内で再利用）
+
+    共有データセット（shared_store）のように値が変わらない DataFrame を想定している。
+    行数・列構成が変わっていた場合は計算し直す。
+    """
+    return _statistics.get_or_compute(df, DatasetStatistics.from_frame)
+
+
+def register_statistics(df, statistics):
+    """計算済みの統計量を DataFrame に対応付ける（チャンクごとに集計した場合など、再走査を避ける）"""
+    return _statistics.put(df, statistics)
@@ -0,0 +1,40 @@
+"""需要予測データの読み込み
+
+需要予測ページと一括予測（batch_forecast.py）で同じ読み込み関数・スキーマ・列指向キャッシュを使う。
+"""
+import os
+
+import pandas as pd
+
+from utils import dataset_cache, dataset_schema
+
+DEMAND_DATA_PATH = os.path.join("data", "input", "store_item_demand_forecast.csv")
+
+# 商品列が数字の場合の日本語名
+PRODUCT_NAMES = {
+    '1': 'りんご',
+    '2': 'みかん',
+    '3': 'バナナ',
+    '4': 'ぶどう',
+    '5': 'いちご'
+}
+
+
+def read_demand_csv(data_path):
+    """需要予測データのCSVを読み込み、日付と商品名を変換"""
+    # Shift-JISエンコーディングで読み込み
+    df = pd.read_csv(data_path, encoding='shift-jis')
+    # 日付列の処理
+    if '日付' in df.columns:
+        df['日付'] = pd.to_datetime(df['日付'])
+
+    # 商品列が数字の場合は日本語名に変換
+    if '商品' in df.columns:
+        df['商品'] = df['商品'].astype(str).map(PRODUCT_NAMES).fillna(df['商品'])
+
+    return df
+
+
+def load_demand_data(data_path=DEMAND_DATA_PATH):
+    """需要予測データを読み込み（列指向キャッシュ経由、型はスキーマに従って変換）"""
+    return dataset_cache.load_dataset(data_path, read_demand_csv, dataset_schema.DEMAND_SCHEMA)
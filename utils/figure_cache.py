@@ -0,0 +1,160 @@
+"""グラフ（Plotly の図）のキャッシュ
+
+データ分析ページのグラフは再実行のたびに集計・図の作成・検証（to_dict）・JSON 化を行っていた。
+ここでは図を (データセットのチェックサム, グラフ作成関数とそのソースコード, 引数) をキーとして JSON 化した状態で保持し、
+入力が変わらない再実行では集計も図の作成・検証もせずに、保持している図をそのまま表示に渡す。
+
+- データセットのチェックサムは DataFrame の内容のハッシュ（DataFrame ごとに一度だけ計算し、
+  アップロードされたファイルのように既知のチェックサムがある場合は register_checksum で対応付ける）
+- キーにはグラフ作成関数のソースコードのハッシュを含め、関数を編集したら以前の図を使わないようにする
+- キャッシュはプロセス内で共有し、JSON の合計サイズが max_bytes を超えたら最も古く使われた図から削除する（LRU）
+"""
+import collections
+import functools
+import hashlib
+import inspect
+import json
+import threading
+
+import pandas as pd
+
+from utils import frame_memo
+from utils.lazy_imports import lazy_import
+
+go = lazy_import("plotly.graph_objects")
+
+FIGURE_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+_checksums = frame_memo.FrameMemo()  # DataFrame -> チェックサム
+
+
+def _content_checksum(df):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(frame_memo.fingerprint(df)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def dataset_checksum(df):
+    """DataFrame の内容のチェックサム（同じ DataFrame に対してはプロセス内で再利用）
+
+    共有データセット（shared_store）のように値が変わらない DataFrame を想定している。
+    """
+    return _checksums.get_or_compute(df, _content_checksum)
+
+
+def register_checksum(df, checksum):
+    """既知のチェックサムを DataFrame に対応付ける（アップロードされたファイルなど、内容のハッシュを省く）"""
+    return _checksums.put(df, checksum)
+
+
+@functools.lru_cache(maxsize=None)
+def _serialized_figure_class():
+    """JSON 化済みの図を st.plotly_chart に渡すための図のクラス
+
+    st.plotly_chart は図の to_dict() の結果を JSON にするため、to_dict() で保持している
+    辞書をそのまま返す（図の再構築・検証を行わない）。plotly は初回使用時に読み込むため、
+    クラスも初回使用時に作成する。
+    """
+    class SerializedFigure(go.Figure):
+        def __init__(self, spec):
+            super().__init__()
+            self._spec = spec
+
+        def to_dict(self):
+            return self._spec
+
+        def to_plotly_json(self):
+            return self._spec
+
+    return SerializedFigure
+
+
+class FigureCache:
+    """JSON 化した図の LRU キャッシュ（合計サイズで上限を設ける）"""
+
+    def __init__(self, max_bytes=FIGURE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()  # key -> (spec, size)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, figure_json):
+        """JSON 化した図を保持（上限を超える大きさの図は保持しない）"""
+        size = len(figure_json)
+        if size > self.max_bytes:
+            return
+        spec = json.loads(figure_json)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous[1]
+            self._entries[key] = (spec, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_figure_cache = FigureCache()
+
+
+@functools.lru_cache(maxsize=256)
+def _source_hash(func):
+    """関数のソースコードのハッシュ（ソースを取得できない場合は空文字列）"""
+    try:
+        source = inspect.getsource(func)
+    except (OSError, TypeError):
+        return ""
+    return hashlib.blake2b(source.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def figure_key(checksum, func, args):
+    """キャッシュのキー（データセットのチェックサム・関数名・関数のソースコード・引数から計算）"""
+    source = json.dumps(
+        [checksum, f"{func.__module__}.{func.__qualname__}", _source_hash(func), list(args)], default=repr
+    )
+    return hashlib.blake2b(source.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def cached_figure(func, df, *args, cache=None):
+    """func(df, *args) で作成する図を、入力が同じならキャッシュから返す
+
+    キャッシュにない場合は図を作成して JSON 化したものを保持し、作成した図をそのまま返す
+    （func が None を返した場合は保持しない）。
+    """
+    cache = cache if cache is not None else _figure_cache
+    key = figure_key(dataset_checksum(df), func, args)
+    spec = cache.get(key)
+    if spec is not None:
+        return _serialized_figure_class()(spec)
+
+    fig = func(df, *args)
+    if fig is not None:
+        cache.put(key, fig.to_json(validate=False))
+    return fig
+
+
+def get_figure_cache():
+    """プロセス内で共有している図のキャッシュ"""
+    return _figure_cache
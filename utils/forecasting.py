@@ -0,0 +1,47 @@
+"""SARIMAX による需要予測の共通処理
+
+需要予測ページ（1商品ずつ）と一括予測（batch_forecast、全店舗 × 全商品）で
+同じモデル設定・精度指標を使うためにまとめている。
+"""
+import numpy as np
+import pandas as pd
+
+DATE_COLUMN = '日付'
+STORE_COLUMN = '店舗'
+ITEM_COLUMN = '商品'
+TARGET_COLUMN = '販売個数'
+
+# SARIMAX の次数（週単位の季節性）
+SARIMAX_ORDER = (1, 1, 1)
+SARIMAX_SEASONAL_ORDER = (1, 1, 1, 7)
+
+
+def fit_sarimax(y_train, order=SARIMAX_ORDER, seasonal_order=SARIMAX_SEASONAL_ORDER, start_params=None,
+                **fit_options):
+    """SARIMAX モデルを学習
+
+    商品で絞り込んだ後のインデックスは飛び飛びで予測に使えないため、0 からの連番に振り直す。
+    start_params に近い期間で学習したパラメータを渡すと、そこから最適化を始める（ウォームスタート）。
+    fit_options（maxiter, low_memory など）は SARIMAX.fit に渡す。
+    """
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+    y_train = pd.Series(np.asarray(y_train, dtype=float))
+    model = SARIMAX(y_train, order=order, seasonal_order=seasonal_order)
+    return model.fit(start_params=start_params, disp=False, **fit_options)
+
+
+def forecast_metrics(y_true, y_pred):
+    """予測精度の指標（MAE, MSE, RMSE, MAPE[%]）"""
+    y_true = np.asarray(y_true, dtype=float)
+    y_pred = np.asarray(y_pred, dtype=float)
+    errors = y_true - y_pred
+    mse = float(np.mean(errors ** 2))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mape = float(np.mean(np.abs(errors / y_true)) * 100)
+    return {
+        'MAE': float(np.mean(np.abs(errors))),
+        'MSE': mse,
+        'RMSE': float(np.sqrt(mse)),
+        'MAPE': mape,
+    }
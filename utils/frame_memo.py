@@ -0,0 +1,105 @@
+"""DataFrame ごとの計算結果のプロセス内メモ
+
+共有データセット（shared_store）の DataFrame は全セッションで同じオブジェクトのため、
+統計量・チェックサム・集計キューブなどは DataFrame ごとに一度だけ計算して再利用できる。
+FrameMemo は結果を id(df) をキーとして保持し、
+- 弱参照で同じオブジェクトかを確かめる（破棄された DataFrame の id が再利用されても取り違えない）
+- 行数・列構成・型（fingerprint）が変わっていたら保持している結果を使わない
+- DataFrame が破棄されたら結果も削除する
+SingleFlight は同じキーの計算が複数のスレッドから同時に呼ばれた場合に、計算を1回にする。
+"""
+import contextlib
+import threading
+import weakref
+
+
+def fingerprint(df):
+    """DataFrame の行数・列構成・型（値の変更は検知しない）"""
+    return (len(df), tuple(df.columns), tuple(str(dtype) for dtype in df.dtypes))
+
+
+class SingleFlight:
+    """キーごとのロック（同じキーの処理は1つずつ、別のキーの処理は同時に行う）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locks = {}  # key -> [ロック, 使用中のスレッド数]
+
+    @contextlib.contextmanager
+    def lock(self, key):
+        with self._lock:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[key]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._locks)
+
+
+class FrameMemo:
+    """DataFrame ごとの計算結果（値が変わらない DataFrame を想定）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # id(df) -> (weakref, fingerprint, 結果)
+        self._flights = SingleFlight()
+
+    def _entry(self, df):
+        with self._lock:
+            entry = self._entries.get(id(df))
+        if entry is not None and entry[0]() is df:
+            return entry
+        return None
+
+    def get(self, df):
+        """保持している結果（ない場合・DataFrame の構成が変わった場合は None）"""
+        entry = self._entry(df)
+        if entry is not None and entry[1] == fingerprint(df):
+            return entry[2]
+        return None
+
+    def changed(self, df):
+        """結果を保持した後に DataFrame の行数・列構成・型が変わったか"""
+        entry = self._entry(df)
+        return entry is not None and entry[1] != fingerprint(df)
+
+    def put(self, df, value):
+        """結果を DataFrame に対応付ける（DataFrame が破棄されたら削除する）"""
+        key = id(df)
+        with self._lock:
+            is_new = key not in self._entries
+            self._entries[key] = (weakref.ref(df), fingerprint(df), value)
+        if is_new:
+            weakref.finalize(df, self._discard, key)
+        return value
+
+    def _discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def get_or_compute(self, df, compute):
+        """保持している結果を返し、なければ compute(df) で計算して保持する
+
+        同じ DataFrame に対して複数のスレッドから同時に呼ばれても計算は1回にする
+        （ロックは DataFrame ごとで、別の DataFrame の計算は待たない）。
+        """
+        value = self.get(df)
+        if value is not None:
+            return value
+        with self._flights.lock(id(df)):
+            value = self.get(df)
+            if value is None:
+                value = self.put(df, compute(df))
+        return value
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,241 @@
+"""レイテンシ計測と診断パネル
+
+環境変数 APP_DIAGNOSTICS=1 またはクエリパラメータ ?diagnostics=1 で有効になる。
+有効な間は以下を記録し、画面下部の診断パネルに表示する。
+- 各ページの main() と @timed を付けた関数の実行時間
+- @cache_data / @cache_resource（st.cache_* の代わりに使う）のヒット・ミス数
+
+APP_DIAGNOSTICS_LOG にファイルパスを指定すると、計測イベントを JSON Lines で追記する
+（"-" の場合は標準出力）。
+"""
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+import streamlit as st
+
+ENV_VAR = "APP_DIAGNOSTICS"
+LOG_ENV_VAR = "APP_DIAGNOSTICS_LOG"
+QUERY_PARAM = "diagnostics"
+
+_local = threading.local()
+_lock = threading.Lock()
+_timings = {}  # name -> {'count', 'total_seconds', 'max_seconds', 'last_seconds'}
+_cache_stats = {}  # name -> {'kind', 'calls', 'misses'}
+
+
+def _env_enabled():
+    return os.getenv(ENV_VAR, "0") not in ("", "0", "false", "False")
+
+
+def configure_for_run():
+    """スクリプト実行の開始時に、この実行で計測を有効にするかを決める"""
+    enabled = _env_enabled()
+    if not enabled:
+        try:
+            enabled = st.query_params.get(QUERY_PARAM) == "1"
+        except Exception:
+            enabled = False
+    _local.enabled = enabled
+    return enabled
+
+
+def is_enabled():
+    """現在のスレッドで計測が有効かどうか"""
+    enabled = getattr(_local, "enabled", None)
+    return _env_enabled() if enabled is None else enabled
+
+
+def _export(event):
+    """計測イベントを JSON Lines で出力"""
+    path = os.getenv(LOG_ENV_VAR)
+    if not path:
+        return
+    event = {"timestamp": datetime.now().isoformat(timespec="milliseconds"), "pid": os.getpid(), **event}
+    line = json.dumps(event, ensure_ascii=False)
+    with _lock:
+        if path == "-":
+            print(line, file=sys.stdout, flush=True)
+        else:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+def record_timing(name, seconds):
+    """実行時間を記録"""
+    with _lock:
+        stats = _timings.setdefault(name, {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0, 'last_seconds': 0.0})
+        stats['count'] += 1
+        stats['total_seconds'] += seconds
+        stats['max_seconds'] = max(stats['max_seconds'], seconds)
+        stats['last_seconds'] = seconds
+    _export({"type": "timing", "name": name, "seconds": round(seconds, 6)})
+
+
+@contextlib.contextmanager
+def timer(name):
+    """with ブロックの実行時間を計測"""
+    if not is_enabled():
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(name, time.perf_counter() - start)
+
+
+def timed(func):
+    """関数の実行時間を計測するデコレーター"""
+    name = func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not is_enabled():
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record_timing(name, time.perf_counter() - start)
+
+    return wrapper
+
+
+def bind_context(func):
+    """呼び出し元スレッドの計測の有効・無効を引き継いで func を実行する関数を返す（スレッドプールで実行する場合）"""
+    enabled = is_enabled()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        previous = getattr(_local, "enabled", None)
+        _local.enabled = enabled
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _local.enabled = previous
+
+    return wrapper
+
+
+def _record_cache_event(name, kind, event):
+    if not is_enabled():
+        return
+    with _lock:
+        stats = _cache_stats.setdefault(name, {'kind': kind, 'calls': 0, 'misses': 0})
+        stats[event] += 1
+    if event == 'misses':
+        _export({"type": "cache_miss", "name": name, "kind": kind})
+
+
+def track_cache(cache_decorator, kind, **options):
+    """st.cache_data / st.cache_resource をヒット・ミス数を記録するようにラップ"""
+    def decorator(func):
+        name = func.__qualname__
+
+        @functools.wraps(func)
+        def compute(*args, **kwargs):
+            # キャッシュにない場合のみ実行される
+            _record_cache_event(name, kind, 'misses')
+            return func(*args, **kwargs)
+
+        cached = cache_decorator(**options)(compute)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            _record_cache_event(name, kind, 'calls')
+            return cached(*args, **kwargs)
+
+        wrapper.clear = cached.clear
+        return wrapper
+
+    return decorator
+
+
+def cache_data(func=None, **options):
+    """ヒット・ミス数を記録する st.cache_data"""
+    decorator = track_cache(st.cache_data, "cache_data", **options)
+    return decorator(func) if func is not None else decorator
+
+
+def cache_resource(func=None, **options):
+    """ヒット・ミス数を記録する st.cache_resource"""
+    decorator = track_cache(st.cache_resource, "cache_resource", **options)
+    return decorator(func) if func is not None else decorator
+
+
+def get_timings():
+    """関数ごとの実行時間の統計を取得"""
+    with _lock:
+        return {name: dict(stats) for name, stats in _timings.items()}
+
+
+def get_cache_stats():
+    """キャッシュ関数ごとのヒット・ミス数を取得"""
+    with _lock:
+        return {
+            name: {**stats, 'hits': stats['calls'] - stats['misses']}
+            for name, stats in _cache_stats.items()
+        }
+
+
+def reset():
+    """記録した統計を破棄"""
+    with _lock:
+        _timings.clear()
+        _cache_stats.clear()
+
+
+def render_diagnostics_panel():
+    """診断パネルを表示（計測が有効な場合のみ）"""
+    if not is_enabled():
+        return
+
+    import pandas as pd
+    from utils import cache_warmup, dataset_schema, model_registry, page_registry
+
+    with st.expander("🩺 診断情報", expanded=False):
+        st.markdown("#### ⏱️ 実行時間")
+        timings = get_timings()
+        if timings:
+            timing_df = pd.DataFrame.from_dict(timings, orient='index')
+            timing_df['mean_seconds'] = timing_df['total_seconds'] / timing_df['count']
+            timing_df = timing_df.sort_values('total_seconds', ascending=False)
+            st.dataframe(timing_df, use_container_width=True)
+        else:
+            st.info("まだ計測結果がありません。")
+
+        st.markdown("#### 🗃️ キャッシュ")
+        cache_stats = get_cache_stats()
+        if cache_stats:
+            st.dataframe(pd.DataFrame.from_dict(cache_stats, orient='index'), use_container_width=True)
+        else:
+            st.info("まだキャッシュ関数は呼び出されていません。")
+
+        st.markdown("#### 🧠 モデルレジストリ")
+        st.json(model_registry.get_registry().stats(), expanded=False)
+
+        st.markdown("#### 📄 ページ読み込み")
+        load_stats = page_registry.get_load_stats()
+        if load_stats:
+            st.dataframe(pd.DataFrame.from_dict(load_stats, orient='index'), use_container_width=True)
+
+        memory_reports = dataset_schema.get_memory_reports()
+        if memory_reports:
+            st.markdown("#### 💾 データセットのメモリ使用量")
+            memory_df = pd.DataFrame.from_dict(memory_reports, orient='index')
+            st.dataframe(memory_df[['rows', 'before_bytes', 'after_bytes', 'reduction_ratio']], use_container_width=True)
+
+        st.markdown("#### 🔥 キャッシュのウォームアップ")
+        st.json(cache_warmup.get_status(), expanded=False)
+
+        snapshot = "\n".join(
+            [json.dumps({"type": "timing", "name": name, **stats}, ensure_ascii=False) for name, stats in timings.items()]
+            + [json.dumps({"type": "cache", "name": name, **stats}, ensure_ascii=False) for name, stats in cache_stats.items()]
+        )
+        st.download_button("📥 JSON Lines でダウンロード", snapshot, file_name="diagnostics.jsonl", mime="application/json")
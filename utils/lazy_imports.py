@@ -0,0 +1,57 @@
+"""重いライブラリの遅延インポート
+
+    go = lazy_import("plotly.graph_objects")
+
+のように宣言しておくと、属性に初めてアクセスした時点で実際にインポートされる。
+TOPページだけを開いたユーザーが pandas / plotly / statsmodels / openai などの
+読み込みコストを払わずに済むようにするためのもの。
+"""
+import importlib
+import threading
+import types
+
+
+class LazyModule(types.ModuleType):
+    """初回の属性アクセスでインポートされるモジュールのプロキシ"""
+
+    def __init__(self, name, on_load=None):
+        super().__init__(name)
+        self.__dict__['_lazy_module'] = None
+        self.__dict__['_lazy_on_load'] = on_load
+        self.__dict__['_lazy_lock'] = threading.Lock()
+
+    def _load(self):
+        module = self.__dict__['_lazy_module']
+        if module is not None:
+            return module
+        with self.__dict__['_lazy_lock']:
+            module = self.__dict__['_lazy_module']
+            if module is None:
+                module = importlib.import_module(self.__name__)
+                on_load = self.__dict__['_lazy_on_load']
+                if on_load is not None:
+                    on_load(module)
+                self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__['_lazy_module'] is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name, on_load=None):
+    """モジュールを遅延インポート（on_load は初回インポート時に一度だけ呼ばれる）"""
+    return LazyModule(name, on_load=on_load)
+
+
+def is_loaded(module):
+    """遅延モジュールが既にインポート済みかどうか"""
+    if isinstance(module, LazyModule):
+        return module.__dict__['_lazy_module'] is not None
+    return True
@@ -0,0 +1,315 @@
+"""学習済み SARIMAX モデルのレジストリ（ディスクに保存し、プロセス・再起動をまたいで再利用する）
+
+需要予測ページの train_sarimax_model は st.cache_resource で学習済みモデルを保持していたため、
+呼び出しのたびに学習データの DataFrame 全体をハッシュし、モデルはプロセスの再起動で失われていた。
+ここではモデルを (店舗, 商品, 分割点, 次数, 学習データのチェックサム) をキーとして data/cache/models に保存する。
+
+- 学習データのチェックサムは販売個数の配列（数百〜数千個の float）のハッシュで、DataFrame 全体はハッシュしない
+- 保存するのは学習したパラメータでフィルタし直した省メモリの結果（平滑化の結果を持たないため
+  1モデル数百KB）で、予測・実績の追加（append）に使える。読み込みは数ミリ秒
+- 読み込んだモデルはプロセス内でも保持し（件数の上限つき LRU）、ディスクの合計サイズが max_bytes を
+  超えたら最も古く使われたファイルから削除する（使用時にファイルの更新時刻を更新する）
+- 読み込み・保存はファイル単位で行い、書き込みは一時ファイルからの置き換えのため、複数のプロセスで共有できる
+
+分割点を動かした場合は、同じ系列で分割点が最も近い保存済みのモデル（学習したモデル）を使う。
+- 分割点の差が max_drift_days 日以内で、学習データが一方の先頭部分になっている場合は、学習済みの
+  パラメータのまま実績を追加（append）または末尾を切り詰めて（apply）フィルタし直す（再学習しない、数十ミリ秒）
+- それ以外は学習し直すが、最も近いモデルのパラメータから最適化を始める（ウォームスタート）
+再学習せずに作ったモデルはプロセス内にだけ保持し、ディスクには学習したモデルだけを保存する
+（再学習しないモデルを起点にして差が積み重ならないようにするため）。
+"""
+import collections
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils import atomic_files, dataset_cache, forecasting, frame_memo
+
+logger = logging.getLogger(__name__)
+
+MODEL_REGISTRY_DIR = os.path.join(dataset_cache.CACHE_DIR, "models")
+MODEL_EXTENSION = ".pkl"
+MODEL_REGISTRY_MAX_BYTES = 256 * 1024 * 1024
+MEMORY_ENTRIES = 32
+MAX_DRIFT_DAYS = 28
+
+
+def series_checksum(values):
+    """学習データ（販売個数の配列）のチェックサム"""
+    values = np.ascontiguousarray(np.asarray(values, dtype=np.float64))
+    return hashlib.blake2b(values.tobytes(), digest_size=16).hexdigest()
+
+
+def series_key(store, item, order=forecasting.SARIMAX_ORDER, seasonal_order=forecasting.SARIMAX_SEASONAL_ORDER):
+    """系列・次数ごとのキー（statsmodels のバージョンが変わった場合も別のキーにする）"""
+    import statsmodels
+
+    source = json.dumps(
+        [str(store), str(item), list(order), list(seasonal_order), statsmodels.__version__], ensure_ascii=False
+    )
+    return hashlib.blake2b(source.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def model_key(store, item, split_date, checksum, order=forecasting.SARIMAX_ORDER,
+              seasonal_order=forecasting.SARIMAX_SEASONAL_ORDER):
+    """レジストリのキー（系列のキー・分割点・学習データのチェックサム）"""
+    split_date = pd.Timestamp(split_date).strftime("%Y%m%d")
+    return f"{series_key(store, item, order, seasonal_order)}-{split_date}-{checksum}"
+
+
+def _key_split_date(key):
+    return pd.Timestamp(key.split("-")[1])
+
+
+def incremental_results(results, y_train, max_drift_days=MAX_DRIFT_DAYS):
+    """学習済みのパラメータのまま、学習データを y_train に置き換えた結果を作る（作れない場合は None）
+
+    y_train が学習データの続き（実績の追加）か先頭部分（末尾の切り詰め）で、
+    日数の差が max_drift_days 以内の場合のみ作る。
+    """
+    y_fitted = np.asarray(results.model.data.orig_endog, dtype=np.float64).ravel()
+    n_fitted, n_train = len(y_fitted), len(y_train)
+    if abs(n_train - n_fitted) > max_drift_days:
+        return None
+    if n_train >= n_fitted and np.array_equal(y_train[:n_fitted], y_fitted):
+        if n_train == n_fitted:
+            return results
+        appended = pd.Series(y_train[n_fitted:], index=pd.RangeIndex(n_fitted, n_train))
+        return results.append(appended, refit=False)
+    if n_train < n_fitted and np.array_equal(y_fitted[:n_train], y_train):
+        return results.apply(pd.Series(y_train), refit=False)
+    return None
+
+
+def compact_results(fitted):
+    """保存用に、学習したパラメータでフィルタし直した省メモリの結果に変換（予測値は同じ）
+
+    学習に使ったモデルは最後の平滑化の結果を保持しているため、同じ設定のモデルを作り直してからフィルタする。
+    """
+    model = fitted.model.clone(fitted.model.data.orig_endog)
+    return model.filter(fitted.params, low_memory=True)
+
+
+class ModelRegistry:
+    """学習済みモデルをディスクとプロセス内に保持するレジストリ"""
+
+    def __init__(self, cache_dir=MODEL_REGISTRY_DIR, max_bytes=MODEL_REGISTRY_MAX_BYTES,
+                 memory_entries=MEMORY_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.incremental = 0
+        self.warm_starts = 0
+        self._memory = collections.OrderedDict()  # key -> 結果
+        self._lock = threading.Lock()
+        self._fitting = frame_memo.SingleFlight()  # 学習中のキー
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}{MODEL_EXTENSION}")
+
+    def _remember(self, key, results):
+        with self._lock:
+            self._memory[key] = results
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _load(self, key):
+        """ディスクから読み込み（ない・壊れている場合は None）"""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                results = pickle.load(f)
+            os.utime(path)
+            return results
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning("保存済みのモデルを読み込めないため削除します (%s): %s", path, e)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def get(self, key):
+        """保存済みのモデルを取得（ない場合は None）"""
+        with self._lock:
+            results = self._memory.get(key)
+            if results is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return results
+
+        results = self._load(key)
+        with self._lock:
+            if results is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self._remember(key, results)
+        return results
+
+    def put(self, key, results):
+        """モデルを保存（一時ファイルに書いてから置き換え、上限を超えたら古いファイルを削除）"""
+        self._remember(key, results)
+
+        def write(tmp_path):
+            with open(tmp_path, "wb") as f:
+                pickle.dump(results, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        path = self._path(key)
+        try:
+            atomic_files.atomic_write(path, write)
+        except OSError as e:
+            logger.warning("モデルを保存できませんでした (%s): %s", path, e)
+        self._evict()
+
+    def _entries(self):
+        """保存済みのファイル（古く使われた順の (パス, サイズ)）"""
+        entries = []
+        try:
+            names = os.listdir(self.cache_dir)
+        except FileNotFoundError:
+            return entries
+        for name in names:
+            if not name.endswith(MODEL_EXTENSION):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, path, stat.st_size))
+        return [(path, size) for _, path, size in sorted(entries)]
+
+    def _evict(self):
+        entries = self._entries()
+        total_bytes = sum(size for _, size in entries)
+        for path, size in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+
+    def nearest(self, prefix, split_date):
+        """キーが prefix で始まる保存済みのモデルのうち、分割点が split_date に最も近いもの（なければ None）"""
+        split_date = pd.Timestamp(split_date)
+        keys = [path_key for path_key in (
+            os.path.basename(path)[:-len(MODEL_EXTENSION)] for path, _ in self._entries()
+        ) if path_key.startswith(f"{prefix}-")]
+        for key in sorted(keys, key=lambda key: abs(_key_split_date(key) - split_date)):
+            with self._lock:
+                results = self._memory.get(key)
+            if results is None:
+                results = self._load(key)
+                if results is not None:
+                    self._remember(key, results)
+            if results is not None:
+                return results
+        return None
+
+    def remember(self, key, results):
+        """再学習せずに作ったモデルをプロセス内にだけ保持"""
+        with self._lock:
+            self.incremental += 1
+        self._remember(key, results)
+
+    def fit_once(self, key, fit, warm_start=False):
+        """fit() で学習して保存する（同じキーの学習が同時に呼ばれた場合は1回だけ学習する）"""
+        with self._lock:
+            if warm_start:
+                self.warm_starts += 1
+        with self._fitting.lock(key):
+            with self._lock:
+                results = self._memory.get(key)
+            if results is None:
+                results = compact_results(fit())
+                self.put(key, results)
+        return results
+
+    def get_or_fit(self, key, fit):
+        """保存済みのモデルを返し、なければ fit() で学習して保存する"""
+        results = self.get(key)
+        if results is not None:
+            return results
+        return self.fit_once(key, fit)
+
+    def stats(self):
+        """ヒット・ミス数と保存済みのモデルの件数・合計サイズ"""
+        entries = self._entries()
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            return {
+                'hits': hits,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'incremental': self.incremental,
+                'warm_starts': self.warm_starts,
+                'hit_rate': hits / (hits + self.misses) if hits + self.misses else None,
+                'memory_entries': len(self._memory),
+                'disk_entries': len(entries),
+                'disk_bytes': sum(size for _, size in entries),
+            }
+
+    def clear(self):
+        """プロセス内とディスクのモデルをすべて削除"""
+        with self._lock:
+            self._memory.clear()
+        for path, _ in self._entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+_registry = ModelRegistry()
+
+
+def get_registry():
+    """プロセス内で共有しているレジストリ"""
+    return _registry
+
+
+def get_sarimax_model(store, item, split_date, y_train, order=forecasting.SARIMAX_ORDER,
+                      seasonal_order=forecasting.SARIMAX_SEASONAL_ORDER, registry=None,
+                      max_drift_days=MAX_DRIFT_DAYS):
+    """学習済みの SARIMAX モデルをレジストリから取得
+
+    同じ分割点のモデルがなければ、分割点が最も近いモデルから再学習せずに作るか、
+    そのパラメータからウォームスタートで学習して保存する。max_drift_days=0 で常に学習し直す。
+    """
+    registry = registry if registry is not None else _registry
+    y_train = np.asarray(y_train, dtype=np.float64)
+    key = model_key(store, item, split_date, series_checksum(y_train), order, seasonal_order)
+    results = registry.get(key)
+    if results is not None:
+        return results
+
+    nearest = registry.nearest(series_key(store, item, order, seasonal_order), split_date)
+    if nearest is None:
+        return registry.fit_once(key, lambda: forecasting.fit_sarimax(y_train, order, seasonal_order))
+
+    if max_drift_days > 0:
+        results = incremental_results(nearest, y_train, max_drift_days)
+        if results is not None:
+            registry.remember(key, results)
+            return results
+
+    return registry.fit_once(
+        key, lambda: forecasting.fit_sarimax(y_train, order, seasonal_order, start_params=nearest.params),
+        warm_start=True,
+    )
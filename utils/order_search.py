@@ -0,0 +1,175 @@
+"""SARIMAX の次数の自動選択（プロセスプールでの並列探索と AIC による枝刈り）
+
+需要予測ページは全商品で order=(1,1,1), seasonal_order=(1,1,1,7) を使っている。
+ここでは (p,d,q)(P,D,Q,7) の候補から AIC が最小の次数を選ぶ。
+
+1. すべての候補を少ない反復回数（screen_maxiter）で学習して AIC を求め（粗い評価）、
+2. AIC が小さい上位 keep_ratio の候補だけを、粗い評価のパラメータから最後まで学習し直して比べる
+
+各段階の候補はプロセスプールの各ワーカーで並列に学習する。選んだ次数は系列（店舗, 商品）と
+候補の組み合わせごとに data/cache/orders に保存し、以降は探索せずに使う
+（次数は系列の性質で決まるものとして、分割点や学習データが変わっても探索し直さない）。
+"""
+import hashlib
+import itertools
+import json
+import logging
+import math
+import os
+import threading
+import time
+import warnings
+
+import numpy as np
+
+from utils import atomic_files, dataset_cache, forecasting, process_pool
+
+logger = logging.getLogger(__name__)
+
+ORDER_CACHE_DIR = os.path.join(dataset_cache.CACHE_DIR, "orders")
+SEASONAL_PERIOD = 7
+SCREEN_MAXITER = 5
+KEEP_RATIO = 0.25
+MIN_SURVIVORS = 3
+
+_lock = threading.Lock()
+_orders = {}  # キャッシュのキー -> 選んだ次数
+
+
+def candidate_orders(p=(0, 1, 2), d=(1,), q=(0, 1, 2), seasonal_p=(0, 1), seasonal_d=(1,), seasonal_q=(0, 1),
+                     period=SEASONAL_PERIOD):
+    """次数の候補（(order, seasonal_order) のリスト）"""
+    return [
+        ((p_, d_, q_), (sp, sd, sq, period))
+        for p_, d_, q_, sp, sd, sq in itertools.product(p, d, q, seasonal_p, seasonal_d, seasonal_q)
+    ]
+
+
+def score_candidate(y_train, order, seasonal_order, start_params=None, maxiter=None):
+    """候補を学習して (AIC, パラメータ) を返す（ワーカープロセスで実行される。学習できない場合は AIC が inf）"""
+    options = {'low_memory': True}
+    if maxiter is not None:
+        options['maxiter'] = maxiter
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            fitted = forecasting.fit_sarimax(y_train, order, seasonal_order, start_params=start_params, **options)
+        aic = float(fitted.aic)
+        return (aic if np.isfinite(aic) else math.inf), np.asarray(fitted.params)
+    except Exception:
+        return math.inf, None
+
+
+def _map(func, args_list, workers):
+    """args_list の各引数で func を実行（workers=1 の場合は順に実行）"""
+    if workers == 1 or len(args_list) <= 1:
+        return [func(*args) for args in args_list]
+    with process_pool.process_pool(min(workers, len(args_list))) as executor:
+        return list(executor.map(func, *zip(*args_list)))
+
+
+def search_order(y_train, candidates=None, screen_maxiter=SCREEN_MAXITER, keep_ratio=KEEP_RATIO, workers=None):
+    """AIC が最小の次数を探索
+
+    Returns:
+        dict: order, seasonal_order, aic, candidates（候補数）, refined（最後まで学習した候補数）, seconds
+    """
+    start = time.perf_counter()
+    y_train = np.asarray(y_train, dtype=np.float64)
+    candidates = candidates if candidates is not None else candidate_orders()
+    workers = workers or os.cpu_count() or 1
+
+    # 1. 少ない反復回数で全候補の AIC を求める
+    screened = _map(
+        score_candidate,
+        [(y_train, order, seasonal_order, None, screen_maxiter) for order, seasonal_order in candidates],
+        workers,
+    )
+    ranked = sorted(
+        (aic, index) for index, (aic, _) in enumerate(screened) if np.isfinite(aic)
+    )
+    if not ranked:
+        raise ValueError("学習できる次数の候補がありません")
+
+    # 2. 上位の候補だけを粗い評価のパラメータから最後まで学習する
+    survivors = [index for _, index in ranked[:max(MIN_SURVIVORS, math.ceil(len(candidates) * keep_ratio))]]
+    refined = _map(
+        score_candidate,
+        [(y_train, *candidates[index], screened[index][1], None) for index in survivors],
+        workers,
+    )
+    aic, best = min((aic, index) for index, (aic, _) in zip(survivors, refined))
+    if not np.isfinite(aic):
+        aic, best = ranked[0]
+    order, seasonal_order = candidates[best]
+    return {
+        'order': tuple(order),
+        'seasonal_order': tuple(seasonal_order),
+        'aic': aic,
+        'candidates': len(candidates),
+        'refined': len(survivors),
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def order_cache_key(store, item, candidates):
+    """選んだ次数のキャッシュのキー（系列と候補の組み合わせ）"""
+    source = json.dumps([str(store), str(item), [list(map(list, candidate)) for candidate in candidates]],
+                        ensure_ascii=False)
+    return hashlib.blake2b(source.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _cache_path(key):
+    return os.path.join(ORDER_CACHE_DIR, f"{key}.json")
+
+
+def load_order(key):
+    """保存済みの次数（ない場合は None）"""
+    with _lock:
+        if key in _orders:
+            return _orders[key]
+    try:
+        with open(_cache_path(key), encoding="utf-8") as f:
+            result = json.load(f)
+        result['order'] = tuple(result['order'])
+        result['seasonal_order'] = tuple(result['seasonal_order'])
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("保存済みの次数を読み込めません (%s): %s", _cache_path(key), e)
+        return None
+    with _lock:
+        _orders[key] = result
+    return result
+
+
+def save_order(key, result):
+    """選んだ次数を保存（一時ファイルに書いてから置き換える）"""
+    with _lock:
+        _orders[key] = result
+
+    def write(tmp_path):
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False)
+
+    path = _cache_path(key)
+    try:
+        atomic_files.atomic_write(path, write)
+    except OSError as e:
+        logger.warning("次数を保存できませんでした (%s): %s", path, e)
+
+
+def get_order(store, item, y_train, candidates=None, workers=None):
+    """系列の次数を取得（保存済みならそれを使い、なければ探索して保存する）
+
+    Returns:
+        dict: search_order の結果（保存済みの場合は cached=True）
+    """
+    candidates = candidates if candidates is not None else candidate_orders()
+    key = order_cache_key(store, item, candidates)
+    result = load_order(key)
+    if result is not None:
+        return {**result, 'cached': True}
+    result = search_order(y_train, candidates, workers=workers)
+    save_order(key, result)
+    return {**result, 'cached': False}
@@ -0,0 +1,77 @@
+"""ページモジュールのレジストリ
+
+各ページファイルはプロセスごとに一度だけ読み込み、ファイルの更新時刻（mtime）が
+変わった場合のみ再読み込みする。main.py は再実行のたびに評価し直されるため、
+状態はこのモジュール（sys.modules に常駐する）側で保持する。
+"""
+import importlib.util
+import logging
+import os
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_modules = {}     # module_name -> (module, mtime)
+_load_stats = {}  # module_name -> 読み込み統計
+
+
+def _exec_page_module(page_path, module_name):
+    """ページファイルをモジュールとして実行"""
+    spec = importlib.util.spec_from_file_location(module_name, page_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except Exception:
+        sys.modules.pop(module_name, None)
+        raise
+    return module
+
+
+def get_page_module(page_path, module_name):
+    """ページモジュールを取得（未読み込み・更新時のみ読み込み）"""
+    mtime = os.path.getmtime(page_path)
+    cached = _modules.get(module_name)
+    if cached is not None and cached[1] == mtime:
+        return cached[0]
+
+    with _lock:
+        # 他のスレッドが先に読み込んだ場合はそれを使う
+        cached = _modules.get(module_name)
+        if cached is not None and cached[1] == mtime:
+            return cached[0]
+
+        start = time.perf_counter()
+        module = _exec_page_module(page_path, module_name)
+        elapsed = time.perf_counter() - start
+
+        _modules[module_name] = (module, mtime)
+        stats = _load_stats.setdefault(module_name, {
+            'path': page_path,
+            'load_count': 0,
+            'last_load_seconds': None,
+            'total_load_seconds': 0.0,
+        })
+        stats['load_count'] += 1
+        stats['last_load_seconds'] = elapsed
+        stats['total_load_seconds'] += elapsed
+        logger.info("ページを読み込みました: %s (%.3f秒, %d回目)", page_path, elapsed, stats['load_count'])
+        return module
+
+
+def get_load_stats():
+    """ページごとの読み込み時間の統計を取得"""
+    with _lock:
+        return {name: dict(stats) for name, stats in _load_stats.items()}
+
+
+def clear():
+    """読み込み済みのページモジュールを破棄"""
+    with _lock:
+        for module_name in _modules:
+            sys.modules.pop(module_name, None)
+        _modules.clear()
+        _load_stats.clear()
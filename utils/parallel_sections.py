@@ -0,0 +1,57 @@
+"""ページのセクションの表示内容の並列作成
+
+データ分析ページのグラフ（分布・棒グラフ・散布図・ヒートマップ）は互いに独立しているが、
+順に作成するとページの表示時間は各セクションの合計になる。ここではセクションごとの
+表示内容（図・統計量）をスレッドプールで同時に作成し、表示は呼び出し側で元の順に行う。
+集計は NumPy の処理が中心で GIL を解放するため、表示時間は最も遅いセクション程度に近づく。
+
+- スレッドプールはプロセス内で共有し、全セッション合計の同時実行数を SECTION_WORKERS に抑える
+- 各セクションの実行時間は instrumentation に '<prefix>.<セクション名>' として記録する
+- セクションの関数では Streamlit の表示（st.*）を呼ばないこと（スクリプトのスレッド外で実行される）
+- セクションの関数の中から run_sections を呼ばないこと（プールの枯渇で待ち続ける可能性がある）
+"""
+import concurrent.futures
+import os
+import threading
+
+from utils import instrumentation
+
+SECTION_WORKERS = min(4, os.cpu_count() or 1)
+
+_lock = threading.Lock()
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=SECTION_WORKERS, thread_name_prefix="page-section"
+            )
+        return _executor
+
+
+def _timed_section(name, func):
+    def run():
+        with instrumentation.timer(name):
+            return func()
+
+    return instrumentation.bind_context(run)
+
+
+def run_sections(sections, prefix="sections"):
+    """sections（セクション名 -> 引数なしの関数）を並列に実行し、セクション名 -> 結果 を同じ順で返す
+
+    いずれかのセクションで例外が発生した場合は、全セクションの終了を待ってから送出する。
+    """
+    if len(sections) <= 1 or SECTION_WORKERS <= 1:
+        return {name: _timed_section(f"{prefix}.{name}", func)() for name, func in sections.items()}
+
+    executor = _get_executor()
+    futures = {
+        name: executor.submit(_timed_section(f"{prefix}.{name}", func))
+        for name, func in sections.items()
+    }
+    concurrent.futures.wait(futures.values())
+    return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,23 @@
+"""SARIMAX の学習に使うプロセスプール
+
+一括予測・バックテスト・次数の探索は Streamlit のサーバー（複数のスレッドが動いている）からも
+呼ばれるため、fork でワーカーを作ると他のスレッドが保持していたロックが子プロセスにコピーされ、
+子プロセスが止まることがある。ここでは forkserver（使えない環境では spawn）でワーカーを作る。
+
+forkserver ではサーバープロセスで statsmodels の SARIMAX を一度だけ読み込んでおき、
+ワーカーはそこから fork するため、ワーカーごとの読み込み時間はかからない。
+"""
+import concurrent.futures
+import multiprocessing
+
+PROCESS_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+FORKSERVER_PRELOAD = ["utils.forecasting", "statsmodels.tsa.statespace.sarimax"]
+
+_context = multiprocessing.get_context(PROCESS_START_METHOD)
+if PROCESS_START_METHOD == "forkserver":
+    _context.set_forkserver_preload(FORKSERVER_PRELOAD)
+
+
+def process_pool(max_workers):
+    """ワーカーを forkserver（または spawn）で作るプロセスプール"""
+    return concurrent.futures.ProcessPoolExecutor(max_workers=max_workers, mp_context=_context)
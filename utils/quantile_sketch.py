@@ -0,0 +1,130 @@
+"""結合可能な分位点スケッチ（KLL）
+
+全値をソートして保持すると、メモリと計算量が行数に比例する。KLL スケッチは値を
+「重み 2^h の値の並び（レベル h）」として持ち、レベルが容量を超えたらソートして
+1つおき（開始位置はランダム）に上のレベルへ送る（圧縮）。保持する値の数は
+およそ 3k 個に抑えられ、分位点の順位の誤差は全体の数 / k 程度になる。
+スケッチどうしはレベルごとに連結して圧縮し直すだけで結合できる。
+
+値の数が exact_max_values 以下の間は全値をソート済みで保持し、分位点は正確に求める
+（pandas の describe() と同じ線形補間）。それを超える値は k の数倍の大きさのブロックに分けて追加し、
+ブロックごとに圧縮するため、大きな配列を渡しても全体をコピー・ソートしない
+（一度に保持する値は、圧縮後に保持する値と1ブロック分だけ）。
+"""
+import numpy as np
+
+DEFAULT_K = 1024
+EXACT_MAX_VALUES = 100_000
+MIN_LEVEL_CAPACITY = 8
+# 正確に保持できる数を超えた値は k * UPDATE_BLOCK_FACTOR 個ずつ追加して圧縮する
+UPDATE_BLOCK_FACTOR = 8
+LEVEL_CAPACITY_RATIO = 2 / 3
+
+
+class QuantileSketch:
+    """分位点の集計（少数の値は正確に、多数の値は KLL スケッチで近似する）"""
+
+    def __init__(self, k=DEFAULT_K, exact_max_values=EXACT_MAX_VALUES, rng=None):
+        self.k = k
+        self.exact_max_values = exact_max_values
+        self.count = 0
+        self.exact = True
+        self.levels = [np.empty(0)]  # levels[h] の各値の重みは 2**h（正確な間は levels[0] にソート済みで全値）
+        self._rng = rng if rng is not None else np.random.default_rng(0)
+
+    @classmethod
+    def from_values(cls, values, k=DEFAULT_K, exact_max_values=EXACT_MAX_VALUES):
+        """欠損値を除いた値からスケッチを作成"""
+        sketch = cls(k, exact_max_values)
+        sketch.update(values)
+        return sketch
+
+    def update(self, values):
+        """値を追加する（このスケッチ自体を更新して返す）"""
+        values = np.asarray(values)
+        if self.exact and self.count + len(values) <= self.exact_max_values:
+            self._add_block(values)
+            return self
+        block = self.k * UPDATE_BLOCK_FACTOR
+        for start in range(0, len(values), block):
+            self._add_block(values[start:start + block])
+        return self
+
+    def _add_block(self, values):
+        """欠損値を除いた値を追加し、正確に保持できる数を超えたら圧縮する"""
+        values = values.astype(np.float64, copy=False)
+        values = values[~np.isnan(values)]
+        self.count += len(values)
+        if self.exact and self.count <= self.exact_max_values:
+            self.levels[0] = np.sort(np.concatenate([self.levels[0], values]))
+        else:
+            self.exact = False
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+
+    def merge(self, other):
+        """別のスケッチと結合した結果を返す（元のスケッチは変更しない）"""
+        merged = QuantileSketch(self.k, self.exact_max_values, self._rng)
+        merged.count = self.count + other.count
+        if self.exact and other.exact and merged.count <= self.exact_max_values:
+            # ソート済みの配列どうしの結合なので mergesort（timsort）はほぼ線形時間で済む
+            merged.levels = [np.sort(np.concatenate([self.levels[0], other.levels[0]]), kind='mergesort')]
+            return merged
+
+        merged.exact = False
+        depth = max(len(self.levels), len(other.levels))
+        merged.levels = [
+            np.concatenate([
+                self.levels[h] if h < len(self.levels) else np.empty(0),
+                other.levels[h] if h < len(other.levels) else np.empty(0),
+            ])
+            for h in range(depth)
+        ]
+        merged._compress()
+        return merged
+
+    def _capacity(self, level):
+        """レベルの容量（最上位が k、下のレベルほど 2/3 倍ずつ小さくなる）"""
+        depth = len(self.levels) - 1 - level
+        return max(MIN_LEVEL_CAPACITY, int(np.ceil(self.k * LEVEL_CAPACITY_RATIO ** depth)))
+
+    def _compress(self):
+        """容量を超えたレベルを下から順に圧縮（重みの合計は変わらない）"""
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) <= self._capacity(level):
+                level += 1
+                continue
+            items = np.sort(items)
+            # 奇数個のときは1つをこのレベルに残し、残りを1つおきに上のレベルへ送る
+            kept = items[len(items) - len(items) % 2:]
+            promoted = items[self._rng.integers(2):len(items) - len(items) % 2:2]
+            self.levels[level] = kept
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            # レベルが増えると下のレベルの容量が小さくなるため、最下位から確認し直す
+            level = 0
+
+    @property
+    def retained(self):
+        """保持している値の数"""
+        return sum(len(items) for items in self.levels)
+
+    def quantiles(self, probabilities):
+        """分位点（正確な間は describe() と同じ線形補間、近似時は重み付きの順位で補間）"""
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        if self.count == 0:
+            return np.full(len(probabilities), np.nan)
+        if self.exact:
+            return np.quantile(self.levels[0], probabilities)
+
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level_items), 2.0 ** h) for h, level_items in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        items, weights = items[order], weights[order]
+        # 各値が表す順位の範囲の中央を、その値の順位とみなして補間する
+        cumulative = np.cumsum(weights)
+        centers = cumulative - weights / 2 - 0.5
+        return np.interp(probabilities * (self.count - 1), centers, items)
@@ -0,0 +1,315 @@
+"""スーパーマーケットの取引のセグメント分け（ミニバッチ k-means）
+
+取引を 顧客タイプ・支払方法（one-hot）と 単価・数量・合計金額・評価（標準化）の特徴量で
+k 個のセグメントに分ける。データには顧客 ID がないため、RFM の「金額（合計金額）」「購入量（数量）」に
+単価・評価・顧客タイプ・支払方法を加えた取引単位のセグメントとする。
+
+大きなデータでも一度にメモリに載るのはチャンク1つ分だけになるよう、
+1. 標準化に使う平均・標準偏差は DatasetStatistics（チャンクごとに集計して結合できる）から求め、
+2. k-means はチャンクを batch_rows 行ずつのミニバッチに分けて MiniBatchKMeans.partial_fit で学習し、
+3. 各セグメントの件数・平均・構成比はもう一度チャンクを走査して集計する。
+学習結果（重心と各セグメントの集計）は data/cache/segments にデータセットのチェックサムをキーとして保存し、
+次回以降は学習せずに読み込む。
+"""
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils import atomic_files, dataset_cache, dataset_stats
+from utils.lazy_imports import lazy_import
+
+cluster = lazy_import("sklearn.cluster")
+
+logger = logging.getLogger(__name__)
+
+NUMERIC_FEATURES = ['単価', '数量', '合計金額', '評価']
+CATEGORICAL_FEATURES = ['顧客タイプ', '支払方法']
+DEFAULT_CLUSTERS = 4
+DEFAULT_CHUNK_ROWS = 200_000
+BATCH_ROWS = 4096
+
+SEGMENT_CACHE_DIR = os.path.join(dataset_cache.CACHE_DIR, "segments")
+SEGMENT_CACHE_EXTENSION = ".npz"
+SEGMENT_CACHE_MAX_FILES = 20
+SEGMENT_CACHE_VERSION = 1
+
+_lock = threading.Lock()
+_segmentations = {}  # (checksum, n_clusters) -> Segmentation
+
+
+class FeatureEncoder:
+    """チャンクを特徴量の行列（float32）に変換する"""
+
+    def __init__(self, means, scales, categories):
+        self.means = np.asarray(means, dtype=np.float32)
+        self.scales = np.asarray(scales, dtype=np.float32)
+        self.categories = {column: list(values) for column, values in categories.items()}
+
+    @classmethod
+    def from_statistics(cls, statistics, categories):
+        """数値列の統計量（DatasetStatistics）とカテゴリ列の値の一覧から作成"""
+        describe = statistics.describe().loc[NUMERIC_FEATURES]
+        means = describe['mean'].to_numpy(copy=True)
+        scales = describe['std'].to_numpy(copy=True)
+        # ±inf を含む列は平均・標準偏差が求まらないため、標準化せずに使う
+        means[~np.isfinite(means)] = 0.0
+        scales[~np.isfinite(scales) | (scales == 0)] = 1.0
+        return cls(means, scales, categories)
+
+    @property
+    def feature_names(self):
+        return NUMERIC_FEATURES + [
+            f"{column}: {value}" for column in CATEGORICAL_FEATURES for value in self.categories[column]
+        ]
+
+    def category_codes(self, chunk, column):
+        """カテゴリ列の値の位置（一覧にない値・欠損値は -1）"""
+        return pd.Categorical(chunk[column], categories=self.categories[column]).codes.astype(np.intp)
+
+    def transform(self, chunk):
+        """標準化した数値列（欠損値・±inf は平均 = 0）と one-hot のカテゴリ列を並べた行列"""
+        numeric = (chunk[NUMERIC_FEATURES].to_numpy(dtype=np.float32, na_value=np.nan) - self.means) / self.scales
+        numeric[~np.isfinite(numeric)] = 0.0
+        blocks = [numeric]
+        for column in CATEGORICAL_FEATURES:
+            codes = self.category_codes(chunk, column)
+            one_hot = np.zeros((len(chunk), len(self.categories[column])), dtype=np.float32)
+            known = codes >= 0
+            one_hot[np.flatnonzero(known), codes[known]] = 1.0
+            blocks.append(one_hot)
+        return np.hstack(blocks)
+
+
+def iter_frame_chunks(df, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """DataFrame を chunk_rows 行ずつ返す（コピーしない）"""
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def assign_segments(features, centroids):
+    """各行に最も近い重心の番号"""
+    distances = (
+        np.einsum('ij,ij->i', features, features)[:, None]
+        - 2 * features @ centroids.T
+        + np.einsum('ij,ij->i', centroids, centroids)[None, :]
+    )
+    return distances.argmin(axis=1)
+
+
+def fit_centroids(chunks, encoder, n_clusters=DEFAULT_CLUSTERS, batch_rows=BATCH_ROWS, random_state=0):
+    """チャンクを順にミニバッチとして学習し、重心を返す"""
+    model = cluster.MiniBatchKMeans(
+        n_clusters=n_clusters, batch_size=batch_rows, random_state=random_state, n_init=3
+    )
+    fitted = False
+    for chunk in chunks:
+        features = encoder.transform(chunk)
+        for start in range(0, len(features), batch_rows):
+            batch = features[start:start + batch_rows]
+            # 最初のミニバッチで重心を初期化するため、セグメント数より少ない行では始めない
+            if not fitted and len(batch) < n_clusters:
+                continue
+            model.partial_fit(batch)
+            fitted = True
+    if not fitted:
+        raise ValueError(f"{n_clusters}個のセグメントに分けるにはデータが少なすぎます。")
+    return model.cluster_centers_.astype(np.float32)
+
+
+def summarize_segments(chunks, encoder, centroids):
+    """各セグメントの件数・数値列の合計と件数・カテゴリ列の値ごとの件数を集計"""
+    n_clusters = len(centroids)
+    counts = np.zeros(n_clusters, dtype=np.int64)
+    numeric_sums = np.zeros((n_clusters, len(NUMERIC_FEATURES)))
+    numeric_counts = np.zeros((n_clusters, len(NUMERIC_FEATURES)), dtype=np.int64)
+    category_counts = {
+        column: np.zeros((n_clusters, len(encoder.categories[column])), dtype=np.int64)
+        for column in CATEGORICAL_FEATURES
+    }
+    for chunk in chunks:
+        labels = assign_segments(encoder.transform(chunk), centroids)
+        counts += np.bincount(labels, minlength=n_clusters)
+        for i, column in enumerate(NUMERIC_FEATURES):
+            values = chunk[column].to_numpy(dtype=np.float64, na_value=np.nan)
+            present = ~np.isnan(values)
+            numeric_sums[:, i] += np.bincount(labels[present], weights=values[present], minlength=n_clusters)
+            numeric_counts[:, i] += np.bincount(labels[present], minlength=n_clusters)
+        for column in CATEGORICAL_FEATURES:
+            codes = encoder.category_codes(chunk, column)
+            known = codes >= 0
+            size = len(encoder.categories[column])
+            category_counts[column] += np.bincount(
+                labels[known] * size + codes[known], minlength=n_clusters * size
+            ).reshape(n_clusters, size)
+    return {
+        'counts': counts,
+        'numeric_sums': numeric_sums,
+        'numeric_counts': numeric_counts,
+        'category_counts': category_counts,
+    }
+
+
+class Segmentation:
+    """学習済みのセグメント（重心・特徴量の変換・各セグメントの集計）"""
+
+    def __init__(self, encoder, centroids, summary):
+        self.encoder = encoder
+        self.centroids = centroids
+        self.summary = summary
+
+    @property
+    def n_clusters(self):
+        return len(self.centroids)
+
+    def predict(self, chunk):
+        """チャンクの各行のセグメント番号"""
+        return assign_segments(self.encoder.transform(chunk), self.centroids)
+
+    def _sorted_by_total(self):
+        """合計金額の平均が大きい順にセグメントを並べ替える（番号を解釈しやすくする）"""
+        total_index = NUMERIC_FEATURES.index('合計金額')
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = self.summary['numeric_sums'][:, total_index] / self.summary['numeric_counts'][:, total_index]
+        order = np.argsort(-np.nan_to_num(means, nan=-np.inf), kind='stable')
+        self.centroids = self.centroids[order]
+        self.summary = {
+            'counts': self.summary['counts'][order],
+            'numeric_sums': self.summary['numeric_sums'][order],
+            'numeric_counts': self.summary['numeric_counts'][order],
+            'category_counts': {column: counts[order] for column, counts in self.summary['category_counts'].items()},
+        }
+        return self
+
+    def profile(self):
+        """セグメントごとの件数・構成比・数値列の平均・カテゴリ列の最多の値とその割合"""
+        counts = self.summary['counts']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = self.summary['numeric_sums'] / self.summary['numeric_counts']
+        profile = pd.DataFrame(
+            {'件数': counts, '構成比': counts / max(counts.sum(), 1)},
+            index=pd.Index([f"セグメント{i + 1}" for i in range(self.n_clusters)], name='セグメント'),
+        )
+        for i, column in enumerate(NUMERIC_FEATURES):
+            profile[f'{column}_平均'] = means[:, i]
+        for column in CATEGORICAL_FEATURES:
+            category_counts = self.summary['category_counts'][column]
+            top = category_counts.argmax(axis=1)
+            categories = self.encoder.categories[column]
+            profile[f'{column}_最多'] = [categories[j] if len(categories) else None for j in top]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                profile[f'{column}_割合'] = category_counts[np.arange(self.n_clusters), top] / category_counts.sum(axis=1)
+        return profile
+
+    def save(self, path):
+        """重心と集計を保存（一時ファイルに書いてから置き換える）"""
+        metadata = {
+            'version': SEGMENT_CACHE_VERSION,
+            'categories': self.encoder.categories,
+        }
+        arrays = {
+            'metadata': np.array(json.dumps(metadata, ensure_ascii=False)),
+            'means': self.encoder.means,
+            'scales': self.encoder.scales,
+            'centroids': self.centroids,
+            'counts': self.summary['counts'],
+            'numeric_sums': self.summary['numeric_sums'],
+            'numeric_counts': self.summary['numeric_counts'],
+        }
+        for column, counts in self.summary['category_counts'].items():
+            arrays[f'category_counts:{column}'] = counts
+        # np.savez は拡張子がないパスに .npz を補うため、一時ファイルにも拡張子を付ける
+        atomic_files.atomic_write(path, lambda tmp_path: np.savez(tmp_path, **arrays), SEGMENT_CACHE_EXTENSION)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            metadata = json.loads(str(data['metadata']))
+            if metadata.get('version') != SEGMENT_CACHE_VERSION:
+                raise ValueError("セグメントのキャッシュの形式が異なります")
+            encoder = FeatureEncoder(data['means'], data['scales'], metadata['categories'])
+            summary = {
+                'counts': data['counts'],
+                'numeric_sums': data['numeric_sums'],
+                'numeric_counts': data['numeric_counts'],
+                'category_counts': {column: data[f'category_counts:{column}'] for column in CATEGORICAL_FEATURES},
+            }
+            return cls(encoder, data['centroids'], summary)
+
+
+def segment_chunks(make_chunks, statistics, categories, n_clusters=DEFAULT_CLUSTERS, random_state=0):
+    """チャンクの列からセグメントを学習する
+
+    make_chunks() は呼び出すたびに同じデータのチャンクの列を最初から返すこと（学習と集計で2回走査する）。
+    statistics は数値列の DatasetStatistics（チャンクごとに取り込んだ際の集計結果などを使う）。
+    """
+    encoder = FeatureEncoder.from_statistics(statistics, categories)
+    centroids = fit_centroids(make_chunks(), encoder, n_clusters, random_state=random_state)
+    summary = summarize_segments(make_chunks(), encoder, centroids)
+    return Segmentation(encoder, centroids, summary)._sorted_by_total()
+
+
+def supports(df):
+    """セグメント分けに使う列がそろっているか"""
+    return all(column in df.columns for column in NUMERIC_FEATURES + CATEGORICAL_FEATURES)
+
+
+def frame_categories(df):
+    """DataFrame のカテゴリ列の値の一覧（category 型ならそのカテゴリ）"""
+    categories = {}
+    for column in CATEGORICAL_FEATURES:
+        series = df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            categories[column] = [str(value) for value in series.cat.categories]
+        else:
+            categories[column] = sorted(str(value) for value in series.dropna().unique())
+    return categories
+
+
+def get_segment_cache_path(checksum, n_clusters):
+    return os.path.join(SEGMENT_CACHE_DIR, f"segments-{checksum}-k{n_clusters}{SEGMENT_CACHE_EXTENSION}")
+
+
+def _remove_old_segments(keep_path):
+    """古いセグメントのキャッシュを削除（新しい順に SEGMENT_CACHE_MAX_FILES 個まで残す）"""
+    pattern = os.path.join(SEGMENT_CACHE_DIR, f"segments-*{SEGMENT_CACHE_EXTENSION}")
+    atomic_files.prune_siblings(pattern, keep_path, SEGMENT_CACHE_MAX_FILES)
+
+
+def get_segmentation(df, checksum, n_clusters=DEFAULT_CLUSTERS):
+    """DataFrame のセグメントを取得（プロセス内 → ディスクのキャッシュの順に探し、なければ学習して保存）
+
+    checksum はデータセットの内容のチェックサム（figure_cache.dataset_checksum など）。
+    """
+    key = (checksum, n_clusters)
+    with _lock:
+        segmentation = _segmentations.get(key)
+    if segmentation is not None:
+        return segmentation
+
+    cache_path = get_segment_cache_path(checksum, n_clusters)
+    segmentation = None
+    if os.path.exists(cache_path):
+        try:
+            segmentation = Segmentation.load(cache_path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("セグメントのキャッシュを読み込めないため学習し直します (%s): %s", cache_path, e)
+
+    if segmentation is None:
+        segmentation = segment_chunks(
+            lambda: iter_frame_chunks(df), dataset_stats.get_statistics(df), frame_categories(df), n_clusters
+        )
+        try:
+            segmentation.save(cache_path)
+            _remove_old_segments(cache_path)
+        except OSError as e:
+            logger.warning("セグメントのキャッシュを保存できませんでした (%s): %s", cache_path, e)
+
+    with _lock:
+        _segmentations[key] = segmentation
+        while len(_segmentations) > SEGMENT_CACHE_MAX_FILES:
+            _segmentations.pop(next(iter(_segmentations)))
+    return segmentation
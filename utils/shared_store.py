@@ -0,0 +1,100 @@
+"""読み取り専用データセットのプロセス共有ストア
+
+st.cache_data は呼び出しのたびに DataFrame を pickle から復元するため、
+セッション数に比例してメモリと CPU を消費する。読み取り専用のデータセットは
+shared_dataset で st.cache_resource に一つだけ保持し、全セッションで同じ
+オブジェクトを参照する。
+
+共有オブジェクトへの誤った書き込みが他のセッションに影響しないよう、
+- 各列の配列を書き込み不可（writeable=False）にし、値の上書き（df.loc[...] = ...）を例外にする
+- 列の追加・削除・置き換え（df['x'] = ...）や行数の変更は取得時に検知し、警告を出して
+  キャッシュを破棄し、読み込み直した DataFrame を返す（変更したセッション以外は元のデータを使い続ける）
+連鎖した代入（df['x'].iloc[0] = ...）は共有データには反映されない（pandas の Copy-on-Write で無視されるか、
+書き込み不可の例外になる）。
+利用側で加工する場合は必ず .copy() や絞り込み結果に対して行うこと。
+"""
+import functools
+import logging
+
+import numpy as np
+import pandas as pd
+from utils import frame_memo, instrumentation
+
+logger = logging.getLogger(__name__)
+
+READ_ONLY_ATTRS = ("_ndarray", "_codes", "_data", "_mask")
+
+_frozen = frame_memo.FrameMemo()  # 読み取り専用にした DataFrame（列構成・行数を記録する）
+
+
+def _internal_arrays(values):
+    """配列（または拡張配列が内部に持つ配列）"""
+    if isinstance(values, np.ndarray):
+        return [values]
+    arrays = (getattr(values, attr, None) for attr in READ_ONLY_ATTRS)
+    return [array for array in arrays if isinstance(array, np.ndarray)]
+
+
+def freeze_dataframe(df):
+    """DataFrame を読み取り専用にし、構造の変更を検知できるよう記録"""
+    for block in df._mgr.blocks:
+        for array in _internal_arrays(block.values):
+            array.flags.writeable = False
+    _frozen.put(df, True)
+    return df
+
+
+def is_modified(df):
+    """読み取り専用にした DataFrame の列構成・行数・型が変わったか、列が置き換えられたか
+
+    置き換えられた列は新しい（書き込み可能な）配列を持つため、それで検知する。
+    読み取り専用にしていない DataFrame は False。
+    """
+    if _frozen.changed(df):
+        return True
+    if _frozen.get(df) is None:
+        return False
+    return any(array.flags.writeable for block in df._mgr.blocks for array in _internal_arrays(block.values))
+
+
+def _frames(result):
+    """戻り値（DataFrame またはそれを含むタプル）に含まれる DataFrame"""
+    if isinstance(result, pd.DataFrame):
+        return [result]
+    if isinstance(result, tuple):
+        return [value for value in result if isinstance(value, pd.DataFrame)]
+    return []
+
+
+def shared_dataset(func=None, **options):
+    """読み込み関数の結果をプロセス全体で共有する（st.cache_resource + 読み取り専用化）
+
+    options は st.cache_resource に渡す（max_entries など）。
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def load_and_freeze(*args, **kwargs):
+            result = func(*args, **kwargs)
+            for df in _frames(result):
+                freeze_dataframe(df)
+            return result
+
+        cached = instrumentation.cache_resource(show_spinner=False, **options)(load_and_freeze)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            result = cached(*args, **kwargs)
+            if any(is_modified(df) for df in _frames(result)):
+                # 1つのセッションの誤った変更で、他のセッションが壊れたデータを使わないようにする
+                logger.warning(
+                    "共有データセット %s が変更されていたため読み込み直します。"
+                    "加工する場合は .copy() したものを使用してください。", func.__qualname__
+                )
+                cached.clear(*args, **kwargs)
+                result = cached(*args, **kwargs)
+            return result
+
+        wrapper.clear = cached.clear
+        return wrapper
+
+    return decorator(func) if func is not None else decorator